@@ -40,6 +40,24 @@ class ChatSession:
     ) -> AsyncGenerator[str, None]:
         """
         执行一个完整的、可能包含工具调用的 ReAct 交互流程。
+        生成器形式的接口，完成后产出一条状态消息；只关心最终历史的调用方应直接 await complete()。
+        """
+        if not self.adapters:
+            print("错误：此会话中没有任何可用的模型适配器。")
+            return
+
+        await self.complete(message, max_turns=max_turns, enabled_tags=enabled_tags, **kwargs)
+        yield json.dumps({"status": "completed"})
+
+    async def complete(
+        self,
+        message: str,
+        max_turns: int = 5,
+        enabled_tags: List[str] | str = None,
+        **kwargs,
+    ) -> None:
+        """
+        执行一个完整的、可能包含工具调用的 ReAct 交互流程，结果写入 conversation_history。
         """
 
         async def reason() -> Union[InternalMessageUnion, None]:
@@ -123,8 +141,6 @@ class ChatSession:
                 # 如果不是助手消息，也直接退出
                 break
 
-        # 这个生成器现在只是为了保持接口一致性，但实际上我们只关心最终的 history
-        yield json.dumps({"status": "completed"})
 
 
 class LLMRouter:
@@ -0,0 +1,53 @@
+"""Use server-side defaults for entry and follow-up timestamps
+
+Revision ID: 5e1a9c3d7b42
+Revises: c2e7f4a91b35
+Create Date: 2026-10-15 18:05:12.403517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1a9c3d7b42'
+down_revision: Union[str, Sequence[str], None] = 'c2e7f4a91b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ('knowledge_entries', 'follow_ups')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in _TABLES:
+        # 旧数据理论上都有时间戳，保险起见先补齐再加 NOT NULL
+        op.execute(
+            sa.text(f'UPDATE {table_name} SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL')
+        )
+        with op.batch_alter_table(table_name) as batch_op:
+            # 已有的值由应用以 UTC 写入（utcnow），转换为 timestamptz 时按 UTC 解释
+            batch_op.alter_column(
+                'timestamp',
+                existing_type=sa.DateTime(),
+                type_=sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+                postgresql_using='"timestamp" AT TIME ZONE \'UTC\'',
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in _TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column(
+                'timestamp',
+                existing_type=sa.DateTime(timezone=True),
+                type_=sa.DateTime(),
+                server_default=None,
+                nullable=True,
+                postgresql_using='"timestamp" AT TIME ZONE \'UTC\'',
+            )
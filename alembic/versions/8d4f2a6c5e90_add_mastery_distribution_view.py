@@ -0,0 +1,43 @@
+"""Add lp_mastery_dist materialized view
+
+Revision ID: 8d4f2a6c5e90
+Revises: 3b9c1e7a4d21
+Create Date: 2026-10-15 10:03:11.472915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a6c5e90'
+down_revision: Union[str, Sequence[str], None] = '3b9c1e7a4d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 物化视图仅 PostgreSQL 支持
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW lp_mastery_dist AS
+        SELECT mastery_level, COUNT(*) AS count
+        FROM learning_progress
+        GROUP BY mastery_level
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX ix_lp_mastery_dist_mastery_level ON lp_mastery_dist (mastery_level)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS lp_mastery_dist")
@@ -0,0 +1,46 @@
+"""Store learning_progress.ease_factor as SMALLINT scaled by 100
+
+Revision ID: 9a3e5b7c1d64
+Revises: 5e1a9c3d7b42
+Create Date: 2026-10-15 23:41:27.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3e5b7c1d64'
+down_revision: Union[str, Sequence[str], None] = '5e1a9c3d7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 先在原浮点列上换算为 ×100 的整数值，再改列类型；
+    # SQLite 的 batch 模式按 CAST 复制数据，提前换算后两种数据库结果一致
+    op.execute(sa.text('UPDATE learning_progress SET ease_factor = ROUND(ease_factor * 100)'))
+    with op.batch_alter_table('learning_progress') as batch_op:
+        batch_op.alter_column(
+            'ease_factor',
+            existing_type=sa.Float(),
+            type_=sa.SmallInteger(),
+            existing_nullable=False,
+            postgresql_using='ROUND(ease_factor)::smallint',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('learning_progress') as batch_op:
+        batch_op.alter_column(
+            'ease_factor',
+            existing_type=sa.SmallInteger(),
+            type_=sa.Float(),
+            existing_nullable=False,
+            postgresql_using='ease_factor::double precision',
+        )
+    op.execute(sa.text('UPDATE learning_progress SET ease_factor = ease_factor / 100.0'))
@@ -0,0 +1,30 @@
+"""Rebuild the query_text covering index without preview
+
+Revision ID: b4d8e2f6a0c3
+Revises: 9a3e5b7c1d64
+Create Date: 2026-10-16 09:12:44.530871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8e2f6a0c3'
+down_revision: Union[str, Sequence[str], None] = '9a3e5b7c1d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 旧索引的 INCLUDE 含不限长度的 preview；删除后由启动时的 create_performance_indexes 按新定义重建
+    op.execute(sa.text('DROP INDEX IF EXISTS idx_knowledge_entries_query_covering'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 索引由应用启动时创建，降级无需恢复旧定义
+    pass
@@ -0,0 +1,50 @@
+"""Add preview column to knowledge_entries
+
+Revision ID: c2e7f4a91b35
+Revises: 8d4f2a6c5e90
+Create Date: 2026-10-15 14:22:40.118306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.preview import get_preview_from_analysis
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7f4a91b35'
+down_revision: Union[str, Sequence[str], None] = '8d4f2a6c5e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('knowledge_entries', sa.Column('preview', sa.Text(), nullable=True))
+
+    # 回填已有条目的预览，提取逻辑与应用写入时保持一致
+    entries = sa.table(
+        'knowledge_entries',
+        sa.column('id', sa.Integer),
+        sa.column('analysis_markdown', sa.Text),
+        sa.column('preview', sa.Text),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(entries.c.id, entries.c.analysis_markdown)).all()
+    if rows:
+        bind.execute(
+            entries.update()
+            .where(entries.c.id == sa.bindparam('entry_id'))
+            .values(preview=sa.bindparam('new_preview')),
+            [
+                {'entry_id': entry_id, 'new_preview': get_preview_from_analysis(analysis_markdown or '')}
+                for entry_id, analysis_markdown in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('knowledge_entries', 'preview')
@@ -0,0 +1,39 @@
+"""Make the query_text unique index a covering index
+
+Revision ID: d1f7a3c9e5b2
+Revises: b4d8e2f6a0c3
+Create Date: 2026-10-16 09:48:05.276194
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f7a3c9e5b2'
+down_revision: Union[str, Sequence[str], None] = 'b4d8e2f6a0c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 单独的 query_text 覆盖索引由唯一索引取代
+    op.execute(sa.text('DROP INDEX IF EXISTS idx_knowledge_entries_query_covering'))
+    # PostgreSQL 的 DDL 在迁移事务内执行，删除与重建之间不会出现缺少唯一约束的窗口
+    op.drop_index('ix_knowledge_entries_query_text', table_name='knowledge_entries')
+    op.create_index(
+        'ix_knowledge_entries_query_text',
+        'knowledge_entries',
+        ['query_text'],
+        unique=True,
+        postgresql_include=['id', 'entry_type', 'timestamp'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_knowledge_entries_query_text', table_name='knowledge_entries')
+    op.create_index('ix_knowledge_entries_query_text', 'knowledge_entries', ['query_text'], unique=True)
@@ -2,9 +2,10 @@
 API端点：重构后的简洁端点定义
 """
 
-from typing import Deque, List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, Depends, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 
 from ai_adapter.llm_router import LLMRouter
@@ -33,6 +34,7 @@ from app.api.v1.services import (
 )
 from app.core.llm_service import get_llm_router
 from app.core.state import get_recent_searches
+from app.db.serializers import export_knowledge_entries_json
 from app.db.session import get_db
 from app.schemas.dictionary import (
     AliasCreateRequest,
@@ -48,6 +50,9 @@ from app.schemas.dictionary import (
 
 router = APIRouter()
 
+# 所有 JSON 端点都声明响应模型或返回类型，并保持默认响应类：
+# FastAPI 此时由 Pydantic 的 Rust 核心直接序列化为 JSON 字节，比自定义 orjson 响应类更快
+
 # =================================================================================
 # 1. 基础查询端点 (Basic Query Endpoints)
 # =================================================================================
@@ -56,14 +61,14 @@ router = APIRouter()
 @router.get("/entries/recent", response_model=List[RecentItem], tags=["Dictionary"])
 def get_recent_entries(
     db: Session = Depends(get_db),
-    recent_searches: Deque[str] = Depends(get_recent_searches),
+    recent_searches: "OrderedDict[str, None]" = Depends(get_recent_searches),
 ):
     """
     获取最近成功查询的知识条目列表，按查询时间倒序排列。
 
     Args:
         db (Session): SQLAlchemy数据库会话
-        recent_searches (Deque[str]): 最近搜索的查询文本队列
+        recent_searches (OrderedDict[str, None]): 最近搜索的查询文本（按时间倒序）
 
     Returns:
         List[RecentItem]: 最近查询的条目列表，每个条目包含查询文本和预览
@@ -77,11 +82,17 @@ def get_recent_entries(
 
 
 @router.get("/entries/all", response_model=List[RecentItem], tags=["Dictionary"])
-def get_all_entries(db: Session = Depends(get_db)):
+def get_all_entries(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
     获取知识库中的所有条目，按字母顺序排序。
 
     Args:
+        limit (Optional[int]): 每页最多返回的条目数，不传则返回全部
+        after (Optional[str]): 键集分页游标，只返回 query_text 大于该值的条目
         db (Session): SQLAlchemy数据库会话
 
     Returns:
@@ -91,8 +102,9 @@ def get_all_entries(db: Session = Depends(get_db)):
         - 包含所有已存储的知识条目
         - 每个条目都包含从分析中提取的预览信息
         - 适用于浏览整个知识库内容
+        - 分页时以上一页最后一项的 query_text 作为下一页的 after
     """
-    return get_all_entries_service(db)
+    return get_all_entries_service(db, limit=limit, after=after)
 
 
 @router.get("/suggestions", response_model=SuggestionResponse, tags=["Dictionary"])
@@ -127,7 +139,7 @@ async def analyze_entry(
     request: AnalyzeRequest,
     llm_router: LLMRouter = Depends(get_llm_router),
     db: Session = Depends(get_db),
-    recent_searches: Deque[str] = Depends(get_recent_searches),
+    recent_searches: "OrderedDict[str, None]" = Depends(get_recent_searches),
 ) -> AnalyzeResponse:
     """
     分析德语知识条目，支持单词、短语、前缀和后缀的统一分析。
@@ -136,7 +148,7 @@ async def analyze_entry(
         request (AnalyzeRequest): 包含查询文本和条目类型的请求对象
         llm_router (LLMRouter): LLM路由器实例，用于调用AI服务
         db (Session): SQLAlchemy数据库会话
-        recent_searches (Deque[str]): 最近搜索队列，用于更新搜索历史
+        recent_searches (OrderedDict[str, None]): 最近搜索记录，用于更新搜索历史
 
     Returns:
         AnalyzeResponse: 包含详细分析的响应对象
@@ -220,7 +232,7 @@ async def regenerate_entry_analysis(
 
 
 @router.delete("/entries/{entry_id}", status_code=200, tags=["Management"])
-def delete_entry(entry_id: int, db: Session = Depends(get_db)):
+def delete_entry(entry_id: int, db: Session = Depends(get_db)) -> Dict:
     """
     从数据库中删除指定的知识条目及其相关数据。
 
@@ -240,7 +252,7 @@ def delete_entry(entry_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/aliases", status_code=201, tags=["Management"])
-def create_alias(request: AliasCreateRequest, db: Session = Depends(get_db)):
+def create_alias(request: AliasCreateRequest, db: Session = Depends(get_db)) -> Dict:
     """
     为指定的知识条目创建别名，支持多种查询方式。
 
@@ -265,7 +277,7 @@ async def intelligent_search(
     request: IntelligentSearchRequest,
     llm_router: LLMRouter = Depends(get_llm_router),
     db: Session = Depends(get_db),
-    recent_searches: Deque[str] = Depends(get_recent_searches),
+    recent_searches: "OrderedDict[str, None]" = Depends(get_recent_searches),
 ):
     """
     基于用户的模糊输入和提示，使用AI推断最可能的德语单词并返回详细分析。
@@ -274,7 +286,7 @@ async def intelligent_search(
         request (IntelligentSearchRequest): 包含搜索词和提示的请求对象
         llm_router (LLMRouter): LLM路由器实例，用于调用AI服务
         db (Session): SQLAlchemy数据库会话
-        recent_searches (Deque[str]): 最近搜索队列，用于更新搜索历史
+        recent_searches (OrderedDict[str, None]): 最近搜索记录，用于更新搜索历史
 
     Returns:
         AnalyzeResponse: 推断单词的完整分析响应
@@ -305,6 +317,24 @@ async def export_database():
     return await export_database_service()
 
 
+@router.get("/database/export/json", tags=["Management"])
+def export_knowledge_json(db: Session = Depends(get_db)) -> Response:
+    """
+    以 JSON 数组导出全部知识条目及其追问。
+
+    Args:
+        db (Session): SQLAlchemy数据库会话
+
+    Returns:
+        Response: 已编码的 JSON 字节，条目和追问均按 id 排序
+
+    Note:
+        - PostgreSQL 上由数据库端 json_agg 一次拼好 JSON，不在 Python 中构建行对象
+        - 结果直接作为响应体返回，不再经过响应模型校验
+    """
+    return Response(content=export_knowledge_entries_json(db), media_type="application/json")
+
+
 @router.post("/database/import", tags=["Management"])
 async def import_database(
     request: Optional[DatabaseImportRequest] = None,
@@ -330,7 +360,7 @@ async def import_database(
 
 
 @router.get("/status", tags=["Health Check"])
-def get_server_status(db: Session = Depends(get_db)):
+def get_server_status(db: Session = Depends(get_db)) -> Dict:
     """
     检查后端服务和数据库连接的健康状态。
 
@@ -350,7 +380,7 @@ def get_server_status(db: Session = Depends(get_db)):
 
 
 @router.get("/debug/cors", tags=["Debug"])
-def debug_cors():
+def debug_cors() -> Dict:
     """
     调试CORS配置，显示当前允许的源。
 
@@ -365,6 +395,7 @@ def debug_cors():
     from app.core.config import settings
     return {
         "cors_origins": settings.api.cors_origins,
+        "cors_origin_regex": settings.api.cors_origin_regex,
         "environment": settings.environment
     }
 
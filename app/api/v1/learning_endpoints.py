@@ -5,7 +5,8 @@
 import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+import msgspec
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
@@ -15,16 +16,23 @@ from app.api.v1.learning_service import (
     generate_dynamic_example_service,
     generate_synonym_quiz_service,
     get_learning_session_service,
+    get_progress_by_entry_id,
     get_word_insight_service,
     update_learning_progress_service,
+    compute_learning_progress_v2,
     get_learning_session_service_v2,
-    update_learning_progress_service_v2,
+    persist_learning_progress_v2,
+)
+from app.core.state import DailyLearningSession, get_daily_learning_session
+from app.schemas.dictionary import (
+    LearningProgressItem,
+    LearningProgressResponse,
+    LearningSessionResponse,
 )
-from app.core.state import get_daily_learning_session
-from app.schemas.dictionary import LearningSessionResponse, LearningProgressResponse
 from app.core.llm_service import get_llm_router
 from app.db import models
-from app.db.session import get_db
+from app.db.materialized_views import get_mastery_distribution
+from app.db.session import SessionLocal, get_db
 
 router = APIRouter()
 
@@ -105,7 +113,7 @@ def add_word_to_learning(
         - 如果单词不存在，返回404错误
     """
     # 检查单词是否存在
-    entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id == entry_id).first()
+    entry = db.get(models.KnowledgeEntry, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail="单词不存在")
     
@@ -159,7 +167,7 @@ def submit_review_result(
     if not 0 <= quality <= 5:
         raise HTTPException(status_code=400, detail="质量评分必须在0-5之间")
     
-    progress = db.query(models.LearningProgress).filter(models.LearningProgress.entry_id == entry_id).first()
+    progress = get_progress_by_entry_id(db, entry_id)
     if not progress:
         raise HTTPException(status_code=404, detail="学习进度不存在")
     
@@ -289,7 +297,7 @@ async def generate_synonym_quiz(
 
 
 @router.get("/progress", tags=["Learning"])
-def get_learning_progress(db: Session = Depends(get_db)) -> Dict:
+def get_learning_progress(db: Session = Depends(get_db)) -> Response:
     """
     获取所有单词的学习进度信息
     
@@ -302,25 +310,25 @@ def get_learning_progress(db: Session = Depends(get_db)) -> Dict:
     Note:
         - 用于词库管理中判断单词学习状态
         - 返回entry_id到学习进度的映射
+        - 按列查询并用 msgspec 直接编码，避免逐行构建 ORM 对象和嵌套字典
     """
-    progress_list = db.query(models.LearningProgress).all()
-    
-    progress_map = {}
-    for progress in progress_list:
-        progress_map[progress.entry_id] = {
-            "id": progress.id,
-            "entry_id": progress.entry_id,
-            "mastery_level": progress.mastery_level,
-            "review_count": progress.review_count,
-            "next_review_at": progress.next_review_at.isoformat(),
-            "last_reviewed_at": progress.last_reviewed_at.isoformat() if progress.last_reviewed_at else None,
-            "ease_factor": progress.ease_factor,
-            "interval": progress.interval
-        }
-    
-    return {
-        "progress": progress_map
-    }
+    rows = db.query(
+        models.LearningProgress.id,
+        models.LearningProgress.entry_id,
+        models.LearningProgress.mastery_level,
+        models.LearningProgress.review_count,
+        models.LearningProgress.next_review_at,
+        models.LearningProgress.last_reviewed_at,
+        models.LearningProgress.ease_factor,
+        models.LearningProgress.interval,
+    ).all()
+
+    progress_map = {row.entry_id: LearningProgressItem(*row) for row in rows}
+
+    return Response(
+        content=msgspec.json.encode({"progress": progress_map}),
+        media_type="application/json",
+    )
 
 
 @router.get("/stats", tags=["Learning"])
@@ -336,14 +344,12 @@ def get_learning_stats(db: Session = Depends(get_db)) -> Dict:
         
     Note:
         - 包括总学习单词数、复习统计、掌握等级分布等
+        - 掌握等级分布在 PostgreSQL 上读取定时刷新的物化视图，可能有几分钟延迟
     """
     total_learning = db.query(models.LearningProgress).count()
     
     # 按掌握等级统计
-    mastery_stats = db.query(
-        models.LearningProgress.mastery_level,
-        func.count(models.LearningProgress.id).label('count')
-    ).group_by(models.LearningProgress.mastery_level).all()
+    mastery_stats = get_mastery_distribution(db)
     
     # 今日需要复习的数量
     today = datetime.datetime.utcnow()
@@ -352,8 +358,10 @@ def get_learning_stats(db: Session = Depends(get_db)) -> Dict:
     ).count()
     
     # 平均难度系数
+    # 列按 ×100 的整数存储，沿用列类型让结果换算回浮点数
+    ease_factor = models.LearningProgress.ease_factor
     avg_ease_factor = db.query(
-        func.avg(models.LearningProgress.ease_factor)
+        func.avg(ease_factor, type_=ease_factor.type)
     ).scalar() or 0
     
     return {
@@ -376,7 +384,7 @@ def get_learning_stats(db: Session = Depends(get_db)) -> Dict:
 def get_learning_session_v2(
     limit_new_words: int = 5,
     db: Session = Depends(get_db),
-    daily_session: Dict[str, Any] = Depends(get_daily_learning_session)
+    daily_session: DailyLearningSession = Depends(get_daily_learning_session)
 ):
     """
     获取学习会话 V2: 从每日动态队列中获取一个单词及当前进度。
@@ -388,18 +396,38 @@ def get_learning_session_v2(
 @router.post("/review/v2/{entry_id}", response_model=LearningProgressResponse, tags=["Learning V2"])
 def submit_review_result_v2(
     entry_id: int,
+    background_tasks: BackgroundTasks,
     quality: int = Body(..., embed=True),
     db: Session = Depends(get_db),
-    daily_session: Dict[str, Any] = Depends(get_daily_learning_session)
+    daily_session: DailyLearningSession = Depends(get_daily_learning_session)
 ):
     """
     提交复习结果 V2: 更新每日队列和核心SRS数据。
+    每日会话在内存中即时更新；当日毕业时新的 SRS 数据已在内存中算好，立即返回并放到后台任务中提交。
+    未毕业时只推进复习时间和次数，以单条 UPDATE ... RETURNING 同步写入，并以写入后的行作为响应。
     """
     if not 0 <= quality <= 5:
         raise HTTPException(status_code=400, detail="质量评分必须在0-5之间")
     
     try:
-        updated_progress = update_learning_progress_service_v2(entry_id, quality, db, daily_session)
-        return updated_progress
+        updated_progress = compute_learning_progress_v2(entry_id, quality, db, daily_session)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+
+    if not updated_progress["daily_stats"]["completed_today"]:
+        return persist_learning_progress_v2(updated_progress, db)
+
+    background_tasks.add_task(_persist_progress_in_background, updated_progress)
+    return updated_progress
+
+
+def _persist_progress_in_background(progress: Dict[str, Any]) -> None:
+    """后台任务：使用独立的数据库会话写入学习进度，不复用请求级会话。"""
+    db = SessionLocal()
+    try:
+        persist_learning_progress_v2(progress, db)
+    except Exception as e:
+        db.rollback()
+        print(f"--- [后台任务] 写入学习进度失败 (entry_id={progress['entry_id']}): {e} ---")
+    finally:
+        db.close()
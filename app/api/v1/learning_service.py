@@ -3,16 +3,20 @@
 """
 
 import datetime
-import json
 import re
 import random
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Date 
+import orjson
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Date, cast, exists, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from ai_adapter.llm_router import LLMRouter
 from app.core.llm_service import call_llm_service
+# 【修复 4】"学习日"的计算统一由 app.core.state 提供，避免两处定义不一致
+from app.core.state import DailyLearningSession, get_learning_day
 from app.db import models
 
 # ==============================================================================
@@ -21,12 +25,35 @@ from app.db import models
 
 # --- 当日任务管理器配置 ---
 GRADUATION_THRESHOLD = 10
-QUALITY_SCORE_MAP = {5: 6, 4: 4, 3: 2, 2: -3, 1: -5, 0: -7}
-DIFFICULTY_DISCOUNT_MAP = {5: 4, 4: 3, 3: 2}
+# 按评分 quality (0-5) 直接下标索引；端点已保证 0 <= quality <= 5
+QUALITY_SCORE = (-7, -5, -3, 2, 4, 6)
+# 困难词的加分打折；quality < 3 时与 QUALITY_SCORE 相同
+DIFFICULTY_DISCOUNT = (-7, -5, -3, 2, 3, 4)
 MAX_DAILY_REPS = 5
 
 # --- 长线重复调度器配置 ---
-SMOOTH_INTERVAL_LADDER = [1, 2, 4, 7, 15]
+SMOOTH_INTERVAL_LADDER = (1, 2, 4, 7, 15)
+
+# --- V1 SM-2 配置 ---
+SM2_MIN_EASE_FACTOR = 1.3
+# 按评分 quality (0-5) 索引的难度系数增量：不及格时为固定惩罚，
+# 及格时为 SM-2 多项式 0.1 - (5-q) * (0.08 + (5-q) * 0.02) 的预计算值
+SM2_EASE_DELTA = (-0.20, -0.20, -0.15) + tuple(
+    0.1 - (5 - q) * (0.08 + (5 - q) * 0.02) for q in (3, 4, 5)
+)
+# 前两次连续及格后的固定间隔（天），之后按难度系数放大
+SM2_INITIAL_INTERVALS = {1: 1, 2: 6}
+
+# --- 支持 ON CONFLICT 的方言各自的 INSERT 构造 ---
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# --- 预编译的正则表达式 ---
+# "深度解析 (Einblicke)" 段落
+_INSIGHT_RE = re.compile(r"#### 🧐 深度解析 \(Einblicke\)(.*?)(?=####|\Z)", re.DOTALL | re.IGNORECASE)
+# 核心释义中的第一个加粗释义
+_CORE_MEANING_RE = re.compile(r"\*\s*\*\*[nv\./adj\.]*\*\*\s*\*\*(.*?)\*\*", re.IGNORECASE)
+# LLM 返回中被 ```json 代码块包裹的内容
+_JSON_FENCE_RE = re.compile(r'```json\s*([\s\S]*?)\s*```')
 
 
 # ==============================================================================
@@ -36,17 +63,19 @@ SMOOTH_INTERVAL_LADDER = [1, 2, 4, 7, 15]
 def calculate_weighted_quality(qualities: List[int]) -> float:
     """
     根据当日所有评分历史，计算加权综合分，用于长线调度。
+    首次评分占一半权重，其余评分的平均值占另一半。
+    评分列表通常不超过 MAX_DAILY_REPS 个，直接累加整数，避免切片和浮点列表的分配。
     """
-    if not qualities:
-        return 0
-    if len(qualities) == 1:
+    n = len(qualities)
+    if n == 0:
+        return 0.0
+    if n == 1:
         return float(qualities[0])
-    
-    first_quality = float(qualities[0])
-    rest_qualities = [float(q) for q in qualities[1:]]
-    
-    weighted_score = (first_quality * 0.5) + (sum(rest_qualities) / len(rest_qualities) * 0.5)
-    return weighted_score
+
+    total = 0
+    for i in range(1, n):
+        total += qualities[i]
+    return qualities[0] * 0.5 + (total / (n - 1)) * 0.5
 
 # ==============================================================================
 # 核心服务 (Core Service Logic) - 已根据审查报告修复
@@ -54,13 +83,34 @@ def calculate_weighted_quality(qualities: List[int]) -> float:
 
 # --- 算法常量 (保留) ---
 ACTIVE_POOL_SIZE = 7
+_EMPTY_STATS: Dict[str, Any] = {}  # 只读，用作 word_stats 缺省值
+
+# 复习后需要写回数据库的 SRS 字段（review_count 在 SQL 中自增）
+_PERSISTED_PROGRESS_FIELDS = (
+    "mastery_level",
+    "next_review_at",
+    "last_reviewed_at",
+    "ease_factor",
+    "interval",
+)
+
+# UPDATE/INSERT ... RETURNING 返回的进度列
+_PROGRESS_RETURNING = (
+    models.LearningProgress.entry_id,
+    models.LearningProgress.mastery_level,
+    models.LearningProgress.review_count,
+    models.LearningProgress.next_review_at,
+    models.LearningProgress.last_reviewed_at,
+    models.LearningProgress.ease_factor,
+    models.LearningProgress.interval,
+)
+
+def get_progress_by_entry_id(db: Session, entry_id: int) -> Optional[models.LearningProgress]:
+    """按 entry_id 获取学习进度（entry_id 唯一，至多一条）"""
+    return db.execute(
+        select(models.LearningProgress).where(models.LearningProgress.entry_id == entry_id)
+    ).scalar_one_or_none()
 
-def get_learning_day() -> datetime.date:
-    """
-    【修复 4】统一"学习日"的计算方式，定义为服务器时间的凌晨4点。
-    所有与日期相关的操作都应调用此函数，确保一致性。
-    """
-    return (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=4)).date()
 
 def _generate_daily_queue(db: Session, limit_new_words: int) -> List[Dict[str, Any]]:
     """
@@ -69,80 +119,91 @@ def _generate_daily_queue(db: Session, limit_new_words: int) -> List[Dict[str, A
     today = get_learning_day()
 
     # 1. 获取所有已加入学习计划且今天到期的单词
-    review_progress = (
-        db.query(models.LearningProgress)
+    #    JOIN 知识条目表，已删除条目的进度记录不会进入队列
+    review_entry_ids = (
+        db.query(models.LearningProgress.entry_id)
+        .join(models.KnowledgeEntry, models.KnowledgeEntry.id == models.LearningProgress.entry_id)
         .filter(cast(models.LearningProgress.next_review_at, Date) <= today)
         .all()
     )
     
     # 2. 【核心修改】不再自动获取任何新词。队列只应包含用户添加过的词。
     
-    queue = []
     # 只将到期的单词添加到队列
-    for progress in review_progress:
-        queue.append({"entry_id": progress.entry_id})
+    queue = [{"entry_id": entry_id} for (entry_id,) in review_entry_ids]
         
     random.shuffle(queue)
     return queue
 
 
+def _reset_completed_session(daily_session: DailyLearningSession) -> Dict[str, Any]:
+    """当日队列已全部完成：重置队列状态并返回完成响应"""
+    # 只重置与队列相关的状态，保留日期
+    daily_session.reset()
+
+    return {
+        "current_word": None,
+        "completed_count": 0,
+        "total_count": 0,
+        "is_completed": True,
+    }
+
+
 def get_learning_session_service_v2(
     db: Session,
-    daily_session: Dict[str, Any],
+    daily_session: DailyLearningSession,
     limit_new_words: int = 5
 ) -> Dict[str, Any]:
     """
     获取学习会话 (已根据审查报告修复)
     """
-    if not daily_session.get("queue"):
+    if not daily_session.queue:
         new_queue = _generate_daily_queue(db, limit_new_words)
-        daily_session["queue"] = new_queue
-        daily_session["word_stats"] = {}
-        daily_session["initial_count"] = len(new_queue)
-        daily_session["last_shown_entry_id"] = None
+        daily_session.reset()
+        daily_session.queue = new_queue
+        daily_session.initial_count = len(new_queue)
     
-    active_queue = [
-        word_data for word_data in daily_session["queue"]
-        if not daily_session.get("word_stats", {}).get(word_data["entry_id"], {}).get("completed_today", False)
-    ]
-
-    if not active_queue:
-        # 【核心修复】不再使用 daily_session.clear()
-        # 只重置与队列相关的状态，保留 "date" 键
-        daily_session["queue"] = []
-        daily_session["word_stats"] = {}
-        daily_session["initial_count"] = 0
-        daily_session["last_shown_entry_id"] = None
-        
-        return { 
-            "current_word": None, 
-            "completed_count": daily_session.get("initial_count", 0), # 这里会是0
-            "total_count": daily_session.get("initial_count", 0), # 这里会是0
-            "is_completed": True 
-        }
+    # 单次遍历队列：同时统计未完成数量，并划分候选池
+    word_stats = daily_session.word_stats
+    last_id = daily_session.last_shown_entry_id
+    active_count = 0
+    candidate_pool = []
+    last_shown_pool = []  # 只剩上一次展示的词时，才从这里选
+    for word_data in daily_session.queue:
+        if word_stats.get(word_data["entry_id"], _EMPTY_STATS).get("completed_today", False):
+            continue
+        active_count += 1
+        if word_data["entry_id"] != last_id:
+            candidate_pool.append(word_data)
+        else:
+            last_shown_pool.append(word_data)
 
-    last_id = daily_session.get("last_shown_entry_id")
-    candidate_pool = [word for word in active_queue if word["entry_id"] != last_id]
-    
-    if not candidate_pool:
-        candidate_pool = active_queue
+    # 迭代取词（不递归）：候选池耗尽时才退回到上一次展示的词
+    while True:
+        if not candidate_pool:
+            if not last_shown_pool:
+                return _reset_completed_session(daily_session)
+            candidate_pool, last_shown_pool = last_shown_pool, []
 
-    focus_pool = candidate_pool[:ACTIVE_POOL_SIZE]
-    current_word_data = random.choice(focus_pool)
-    daily_session["last_shown_entry_id"] = current_word_data["entry_id"]
+        focus_pool = candidate_pool[:ACTIVE_POOL_SIZE]
+        current_entry_id = random.choice(focus_pool)["entry_id"]
 
-    entry = db.query(models.KnowledgeEntry).get(current_word_data["entry_id"]) # 【修复 1】模型名称
+        entry = db.get(models.KnowledgeEntry, current_entry_id) # 【修复 1】模型名称
+        if entry:
+            break
 
-    # 【修复 5】增加错误处理
-    if not entry:
-        # 如果数据库中找不到该词，则从队列中移除并尝试获取下一个
-        daily_session["queue"] = [w for w in daily_session["queue"] if w["entry_id"] != current_word_data["entry_id"]]
-        return get_learning_session_service_v2(db, daily_session, limit_new_words)
+        # 【修复 5】数据库中找不到该词：从队列和候选池中移除，继续选下一个
+        daily_session.queue = [w for w in daily_session.queue if w["entry_id"] != current_entry_id]
+        remaining_pool = [w for w in candidate_pool if w["entry_id"] != current_entry_id]
+        active_count -= len(candidate_pool) - len(remaining_pool)
+        candidate_pool = remaining_pool
+
+    daily_session.last_shown_entry_id = entry.id
 
     # --- 【核心修复】---
     # 重新获取 progress 和当日统计数据，以构建完整的前端对象
-    progress = db.query(models.LearningProgress).filter_by(entry_id=entry.id).first()
-    stats = daily_session.get("word_stats", {}).get(entry.id, {"repetitions": 0})
+    progress = get_progress_by_entry_id(db, entry.id)
+    stats = daily_session.word_stats.get(entry.id, {"repetitions": 0})
     
     # 估算一个 repetitions_left 用于显示
     # 例如：如果一个词需要10分毕业，当前2分，大概还需要(10-2)/4=2次左右
@@ -156,12 +217,12 @@ def get_learning_session_service_v2(
         "progress": progress # 修复：添加 progress 对象
     }
     
-    completed_count = daily_session["initial_count"] - len(active_queue)
+    completed_count = daily_session.initial_count - active_count
 
     return {
         "current_word": current_word_for_frontend,
         "completed_count": completed_count,
-        "total_count": daily_session["initial_count"],
+        "total_count": daily_session.initial_count,
         "is_completed": False,
     }
 
@@ -174,23 +235,39 @@ def update_learning_progress_service_v2(
     entry_id: int, 
     quality: int, 
     db: Session, 
-    daily_session: Dict[str, Any]
+    daily_session: DailyLearningSession
 ):
     """
     【V3.1 - 最终版】引入“快速通道”逻辑并修复了返回类型
+    同步版本：计算新的学习进度并立即写入数据库，返回写入后的进度。
+    """
+    progress = compute_learning_progress_v2(entry_id, quality, db, daily_session)
+    return persist_learning_progress_v2(progress, db)
+
+
+def compute_learning_progress_v2(
+    entry_id: int,
+    quality: int,
+    db: Session,
+    daily_session: DailyLearningSession
+) -> Dict[str, Any]:
+    """
+    更新当日会话统计，并计算复习后需要写入的学习进度（不提交）。
+
+    - 当日任务完成（毕业）时读取上一次的 SRS 状态，返回完整的新进度，可直接作为响应
+    - 未毕业时不读数据库，只返回 next_review_at / last_reviewed_at；
+      写入时不会回写 mastery_level / ease_factor / interval 的旧快照，
+      避免与并发提交的毕业写入互相覆盖
+    两种结果都交给 persist_learning_progress_v2 写入。
     """
-    stats = daily_session.setdefault('word_stats', {}).setdefault(entry_id, {
+    stats = daily_session.word_stats.setdefault(entry_id, {
         "qualities": [], "repetitions": 0, "completed_today": False, 
         "mastery_score": 0, "is_difficult": False
     })
     stats['qualities'].append(quality)
     stats['repetitions'] += 1
     
-    score_change = 0
-    if stats['is_difficult']:
-        score_change = DIFFICULTY_DISCOUNT_MAP.get(quality, QUALITY_SCORE_MAP.get(quality, 0))
-    else:
-        score_change = QUALITY_SCORE_MAP.get(quality, 0)
+    score_change = DIFFICULTY_DISCOUNT[quality] if stats['is_difficult'] else QUALITY_SCORE[quality]
     stats['mastery_score'] = max(0, stats['mastery_score'] + score_change)
 
     if not stats['is_difficult'] and quality < 3:
@@ -216,106 +293,150 @@ def update_learning_progress_service_v2(
         
     stats['completed_today'] = task_completed
 
-    progress = db.query(models.LearningProgress).filter_by(entry_id=entry_id).first()
-    if not progress:
-        progress = models.LearningProgress(entry_id=entry_id, ease_factor=2.5)
-        db.add(progress)
-
     today = get_learning_day() # 【修复 4】统一日期计算
+    progress = {
+        "entry_id": entry_id,
+        "next_review_at": today,
+        "last_reviewed_at": today,
+        "daily_stats": stats,
+    }
+    if not task_completed:
+        return progress
+
+    # 只有毕业时才需要上一次的 SRS 状态，按列读取，不构建 ORM 对象
+    LP = models.LearningProgress
+    previous = db.execute(
+        select(LP.mastery_level, LP.review_count, LP.ease_factor, LP.interval)
+        .where(LP.entry_id == entry_id)
+    ).first()
+    mastery_level, review_count, ease_factor, interval = previous if previous else (0, 0, 2.5, 0)
+
+    progress.update(
+        mastery_level=mastery_level or 0,
+        review_count=(review_count or 0) + 1,
+        ease_factor=ease_factor or 2.5,
+        interval=interval or 0,
+    )
+    progress.update(
+        _schedule_completed_review(stats, mastery_level, ease_factor, interval, today)
+    )
+    return progress
 
-    if task_completed:
-        final_quality = calculate_weighted_quality(stats['qualities'])
-        
-        is_punished = False
-        if stats['repetitions'] >= MAX_DAILY_REPS and stats['mastery_score'] < GRADUATION_THRESHOLD:
-            if stats['mastery_score'] < 7:
-                 progress.ease_factor = max(1.3, progress.ease_factor - 0.4)
-                 progress.mastery_level = 0
-            else:
-                 progress.ease_factor = max(1.3, progress.ease_factor - 0.2)
-            is_punished = True
-
-        if is_punished and progress.mastery_level == 0:
-            progress.next_review_at = today + datetime.timedelta(days=1)
+
+def persist_learning_progress_v2(progress: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """
+    将 compute_learning_progress_v2 的结果写回数据库并提交，返回写入后的进度。
+    只写入结果中实际包含的 SRS 字段；review_count 在 SQL 中自增。
+    使用单条 UPDATE ... RETURNING，记录不存在时改为 INSERT ... RETURNING（其余列取模型默认值）。
+    """
+    LP = models.LearningProgress
+    entry_id = progress["entry_id"]
+    values = {field: progress[field] for field in _PERSISTED_PROGRESS_FIELDS if field in progress}
+
+    row = db.execute(
+        update(LP)
+        .where(LP.entry_id == entry_id)
+        .values(review_count=func.coalesce(LP.review_count, 0) + 1, **values)
+        .returning(*_PROGRESS_RETURNING)
+    ).first()
+    if row is None:
+        row = db.execute(
+            insert(LP)
+            .values(entry_id=entry_id, review_count=1, **values)
+            .returning(*_PROGRESS_RETURNING)
+        ).first()
+    db.commit()
+
+    return {**row._mapping, "daily_stats": progress["daily_stats"]}
+
+
+def _schedule_completed_review(
+    stats: Dict[str, Any],
+    mastery_level: Optional[int],
+    ease_factor: Optional[float],
+    interval: Optional[int],
+    today: datetime.date,
+) -> Dict[str, Any]:
+    """
+    根据当日评分历史和上一次的 SRS 状态，计算当日任务完成后的长线调度参数。
+    """
+    final_quality = calculate_weighted_quality(stats['qualities'])
+    mastery_level = mastery_level or 0
+    ease_factor = ease_factor or 2.5
+
+    is_punished = False
+    if stats['repetitions'] >= MAX_DAILY_REPS and stats['mastery_score'] < GRADUATION_THRESHOLD:
+        if stats['mastery_score'] < 7:
+            ease_factor = max(1.3, ease_factor - 0.4)
+            mastery_level = 0
         else:
-            current_mastery = progress.mastery_level or 0
-            if current_mastery < len(SMOOTH_INTERVAL_LADDER):
-                progress.interval = SMOOTH_INTERVAL_LADDER[current_mastery]
-            else:
-                progress.interval = round((progress.interval or 1) * (progress.ease_factor or 2.5))
-            
-            progress.mastery_level = (progress.mastery_level or 0) + 1
-            
-            new_ef = (progress.ease_factor or 2.5) + (0.1 - (5 - final_quality) * (0.08 + (5 - final_quality) * 0.02))
-            progress.ease_factor = max(1.3, new_ef)
-            progress.next_review_at = today + datetime.timedelta(days=progress.interval)
+            ease_factor = max(1.3, ease_factor - 0.2)
+        is_punished = True
+
+    if is_punished and mastery_level == 0:
+        return {
+            "mastery_level": mastery_level,
+            "ease_factor": ease_factor,
+            "next_review_at": today + datetime.timedelta(days=1),
+        }
+
+    if mastery_level < len(SMOOTH_INTERVAL_LADDER):
+        interval = SMOOTH_INTERVAL_LADDER[mastery_level]
     else:
-        progress.next_review_at = today
-    
-    progress.last_reviewed_at = today
-    if progress.review_count is None:
-        progress.review_count = 0
-    progress.review_count += 1
-    db.commit()
-    db.refresh(progress)
+        interval = round((interval or 1) * ease_factor)
 
+    new_ef = ease_factor + (0.1 - (5 - final_quality) * (0.08 + (5 - final_quality) * 0.02))
     return {
-        "entry_id": progress.entry_id,
-        "mastery_level": progress.mastery_level,
-        "review_count": progress.review_count,
-        "next_review_at": progress.next_review_at,
-        "last_reviewed_at": progress.last_reviewed_at,
-        "ease_factor": progress.ease_factor,
-        "interval": progress.interval,
-        "daily_stats": stats
+        "mastery_level": mastery_level + 1,
+        "ease_factor": max(1.3, new_ef),
+        "interval": interval,
+        "next_review_at": today + datetime.timedelta(days=interval),
     }
 
 # ==============================================================================
 # 其他原有函数 (保持不变)
 # ==============================================================================
 
-def update_learning_progress_service(progress: models.LearningProgress, quality: int, db: Session):
-    # ... 此处是你提供的原有代码，完全没有改动 ...
+def _update_progress_no_commit(progress: models.LearningProgress, quality: int) -> models.LearningProgress:
+    """
+    在已附着于会话的进度对象上执行 SM-2 更新，不提交。
+    批量复习时可对多张卡片依次调用，最后由调用方统一提交一次。
+    """
     if quality < 3:
         progress.mastery_level = 0
         progress.interval = 0
-        if quality == 2:
-            progress.ease_factor = max(1.3, progress.ease_factor - 0.15)
-        else:
-            progress.ease_factor = max(1.3, progress.ease_factor - 0.20)
     else:
         progress.mastery_level += 1
-        if progress.mastery_level == 1:
-            progress.interval = 1
-        elif progress.mastery_level == 2:
-            progress.interval = 6
+        if progress.mastery_level in SM2_INITIAL_INTERVALS:
+            progress.interval = SM2_INITIAL_INTERVALS[progress.mastery_level]
         else:
             progress.interval = round(progress.interval * progress.ease_factor)
-        progress.ease_factor += (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        if progress.ease_factor < 1.3:
-            progress.ease_factor = 1.3
+    progress.ease_factor = max(SM2_MIN_EASE_FACTOR, progress.ease_factor + SM2_EASE_DELTA[quality])
     progress.review_count += 1
     progress.last_reviewed_at = datetime.datetime.now(datetime.timezone.utc)
     progress.next_review_at = progress.last_reviewed_at + datetime.timedelta(days=progress.interval)
-    db.add(progress)
-    db.commit()
     return progress
 
-# ... (后面所有其他函数 get_learning_session_service, add_word_to_learning_service 等都完全保留，此处省略以节约篇幅) ...
-# 请将你本地文件里该函数之后的所有内容，都原封不动地保留在下面。
+
+def update_learning_progress_service(progress: models.LearningProgress, quality: int, db: Session):
+    # progress 已由当前会话加载，属性变更会被自动跟踪，无需再次 db.add
+    _update_progress_no_commit(progress, quality)
+    db.commit()
+    return progress
 
 def get_learning_session_service(db: Session, limit_new_words: int = 5) -> dict:
     """
     获取学习会话：包括需要复习的单词和新单词
     修复：只返回用户明确添加到学习计划的单词
     """
-    today = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=4)).date()
+    today = get_learning_day()
     
     # 获取需要复习的单词（用户已添加到学习计划的单词）
     review_words = (
         db.query(models.LearningProgress)
+        # 端点会逐个访问 progress.entry，这里随主查询一并加载，避免 N+1
+        .options(joinedload(models.LearningProgress.entry, innerjoin=True))
         .filter(models.LearningProgress.next_review_at <= today)
-        .join(models.KnowledgeEntry)
         .all()
     )
     
@@ -331,44 +452,81 @@ def get_learning_session_service(db: Session, limit_new_words: int = 5) -> dict:
     }
 
 
-def add_word_to_learning_service(entry_id: int, db: Session) -> models.LearningProgress:
+def add_words_to_learning_service(entry_ids: List[int], db: Session) -> List[models.LearningProgress]:
     """
-    将单词添加到学习计划
+    批量将单词添加到学习计划：已存在的进度直接复用，缺失的一次性插入并只提交一次
+
+    "哪些条目还没有学习进度" 由数据库通过 NOT EXISTS 判断，不在 Python 中做集合差集；
+    不存在的知识条目会被忽略。
     """
-    # 检查是否已经存在学习进度
-    existing_progress = (
-        db.query(models.LearningProgress)
-        .filter(models.LearningProgress.entry_id == entry_id)
-        .first()
+    if not entry_ids:
+        return []
+
+    today = datetime.datetime.now(datetime.timezone.utc).date()  # 立即可学习
+    missing_entries = select(
+        models.KnowledgeEntry.id, literal(today, Date)
+    ).where(
+        models.KnowledgeEntry.id.in_(entry_ids),
+        ~select(models.LearningProgress.id)
+        .where(models.LearningProgress.entry_id == models.KnowledgeEntry.id)
+        .exists(),
     )
-    
-    if existing_progress:
-        return existing_progress
-    
-    # 创建新的学习进度记录
-    new_progress = models.LearningProgress(
-        entry_id=entry_id,
-        next_review_at=datetime.datetime.now(datetime.timezone.utc)  # 立即可学习
+    db.execute(
+        insert(models.LearningProgress).from_select(
+            ["entry_id", "next_review_at"], missing_entries
+        )
     )
-    
-    db.add(new_progress)
     db.commit()
-    db.refresh(new_progress)
-    
-    return new_progress
+
+    progress_by_entry = {
+        progress.entry_id: progress
+        for progress in db.scalars(
+            select(models.LearningProgress).where(models.LearningProgress.entry_id.in_(entry_ids))
+        )
+    }
+    return [progress_by_entry[entry_id] for entry_id in entry_ids if entry_id in progress_by_entry]
+
+
+def add_word_to_learning_service(entry_id: int, db: Session) -> models.LearningProgress:
+    """
+    将单词添加到学习计划
+    """
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        # INSERT ... ON CONFLICT (entry_id) DO UPDATE ... RETURNING：
+        # 一次往返完成"已存在则返回、不存在则创建"，并且没有检查与插入之间的竞态
+        stmt = dialect_insert(models.LearningProgress).values(
+            entry_id=entry_id,
+            next_review_at=datetime.datetime.now(datetime.timezone.utc).date(),  # 立即可学习
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.LearningProgress.entry_id],
+            set_={"entry_id": stmt.excluded.entry_id},
+        ).returning(models.LearningProgress)
+        progress = db.scalars(stmt).one()
+        db.commit()
+        return progress
+
+    # 其他数据库：已在学习计划中时只做一次 EXISTS 探测，跳过 INSERT ... SELECT 与提交
+    already_added = db.scalar(
+        select(exists().where(models.LearningProgress.entry_id == entry_id))
+    )
+    if already_added:
+        return get_progress_by_entry_id(db, entry_id)
+
+    return add_words_to_learning_service([entry_id], db)[0]
 
 
 def get_word_insight_service(entry_id: int, db: Session) -> Optional[str]:
     """
     获取单词的"深度解析"部分用于提示
     """
-    entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id == entry_id).first()
+    entry = db.get(models.KnowledgeEntry, entry_id)
     if not entry:
         return None
     
     # 使用正则表达式提取"深度解析 (Einblicke)"部分
-    insight_pattern = r"#### 🧐 深度解析 \(Einblicke\)(.*?)(?=####|\Z)"
-    match = re.search(insight_pattern, entry.analysis_markdown, re.DOTALL | re.IGNORECASE)
+    match = _INSIGHT_RE.search(entry.analysis_markdown)
     
     if match:
         return match.group(1).strip()
@@ -380,7 +538,7 @@ async def generate_dynamic_example_service(entry_id: int, llm_router: LLMRouter,
     """
     AI动态生成例句 (已增加诊断日志和修复)
     """
-    entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id == entry_id).first()
+    entry = db.get(models.KnowledgeEntry, entry_id)
     if not entry:
         raise ValueError("单词不存在")
     
@@ -393,15 +551,15 @@ async def generate_dynamic_example_service(entry_id: int, llm_router: LLMRouter,
     print("---------------------------------------------------------")
     
     try:
-        json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response_text)
+        json_match = _JSON_FENCE_RE.search(response_text)
         if json_match:
             json_str = json_match.group(1)
         else:
             json_str = response_text
         
-        result = json.loads(json_str)
+        result = orjson.loads(json_str)
         return result
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise ValueError(f"AI返回的例句格式错误, 原始返回: {response_text}")
 
 
@@ -409,12 +567,11 @@ async def generate_synonym_quiz_service(entry_id: int, llm_router: LLMRouter, db
     """
     AI生成同义词辨析选择题 (已增加诊断日志和修复)
     """
-    entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id == entry_id).first()
+    entry = db.get(models.KnowledgeEntry, entry_id)
     if not entry:
         raise ValueError("单词不存在")
     
-    core_meaning_pattern = r"\*\s*\*\*[nv\./adj\.]*\*\*\s*\*\*(.*?)\*\*"
-    meaning_match = re.search(core_meaning_pattern, entry.analysis_markdown, re.IGNORECASE)
+    meaning_match = _CORE_MEANING_RE.search(entry.analysis_markdown)
     core_meaning = meaning_match.group(1).strip() if meaning_match else entry.query_text
     
     word_details = f"单词: {entry.query_text}\n核心释义: {core_meaning}"
@@ -427,13 +584,13 @@ async def generate_synonym_quiz_service(entry_id: int, llm_router: LLMRouter, db
     print("------------------------------------------------------")
     
     try:
-        json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response_text)
+        json_match = _JSON_FENCE_RE.search(response_text)
         if json_match:
             json_str = json_match.group(1)
         else:
             json_str = response_text
             
-        result = json.loads(json_str)
+        result = orjson.loads(json_str)
         return result
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise ValueError(f"AI返回的题目格式错误, 原始返回: {response_text}")
@@ -4,23 +4,31 @@
 
 import asyncio
 import datetime
-import json
 import os
 import shutil
-from typing import Optional
+import time
+import urllib.parse
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
 
+import orjson
 from fastapi import Body, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import literal, select, text, union_all
+from sqlalchemy.orm import Session, selectinload, sessionmaker
 from starlette.background import BackgroundTask
 
 from ai_adapter.llm_router import LLMRouter
 from app.api.v1.services import (
     analyze_entry_service,
 )
-from app.core.config import get_database_url
+from app.core.config import get_database_url, settings
 from app.core.errors import ErrorMessages, HTTPStatusCodes
-from app.core.llm_service import call_llm_service
+from app.core.llm_service import (
+    call_llm_service,
+    get_cached_vocabulary,
+    invalidate_vocabulary_cache,
+)
 from app.db import models
 from app.schemas.dictionary import (
     AliasCreateRequest,
@@ -28,6 +36,7 @@ from app.schemas.dictionary import (
     AnalyzeResponse,
     DatabaseImportRequest,
     FollowUpCreateRequest,
+    FOLLOW_UP_LIST_ADAPTER,
     FollowUpItem,
     IntelligentSearchRequest,
 )
@@ -37,6 +46,83 @@ from app.schemas.dictionary import (
 # =================================================================================
 
 
+# 追问上下文（原始分析 + 历史问答 + 词汇表）的合并准备：同一条目在短时间内的并发追问
+# 共享同一个准备任务；新追问写入后立即失效，保证下一次追问能看到最新的历史。
+FOLLOW_UP_CONTEXT_TTL = 30  # 秒
+_follow_up_context_tasks: Dict[int, Tuple[float, "asyncio.Task[Optional[Tuple[str, str]]]"]] = {}
+
+
+def _prepare_follow_up_context(
+    entry_id: int, session_factory: "sessionmaker[Session]"
+) -> Optional[Tuple[str, str]]:
+    """
+    查询条目与历史追问并构建 (context_str, vocabulary_list)；条目不存在时返回 None
+
+    在工作线程中执行并使用独立的会话：同步查询不阻塞事件循环，
+    共享的准备任务也不会占用发起它的那个请求的会话。
+    会话由请求会话的 bind 创建，get_db 依赖覆盖（如测试数据库）同样生效。
+    """
+    db = session_factory()
+    try:
+        entry = (
+            db.query(models.KnowledgeEntry)
+            .options(selectinload(models.KnowledgeEntry.follow_ups))
+            .filter(models.KnowledgeEntry.id == entry_id)
+            .first()
+        )
+        if not entry:
+            return None
+
+        history_str = "\n".join(f"Q: {fu.question}\nA: {fu.answer}" for fu in entry.follow_ups)
+        context_str = f"原始分析:\n{entry.analysis_markdown}\n\n历史问答:\n{history_str}"
+        return context_str, get_cached_vocabulary(db)
+    finally:
+        db.close()
+
+
+def _is_reusable(task: "asyncio.Task[Optional[Tuple[str, str]]]") -> bool:
+    """进行中或已成功完成的任务可以复用；被取消或以异常结束的任务不能"""
+    if not task.done():
+        return True
+    return not task.cancelled() and task.exception() is None
+
+
+async def get_follow_up_context(entry_id: int, db: Session) -> Optional[Tuple[str, str]]:
+    """获取追问上下文，复用同一条目 TTL 内已有（或进行中）的准备任务"""
+    now = time.monotonic()
+    cached = _follow_up_context_tasks.get(entry_id)
+    if cached and now - cached[0] < FOLLOW_UP_CONTEXT_TTL and _is_reusable(cached[1]):
+        task = cached[1]
+    else:
+        session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+        task = asyncio.ensure_future(
+            asyncio.to_thread(_prepare_follow_up_context, entry_id, session_factory)
+        )
+        _follow_up_context_tasks[entry_id] = (now, task)
+
+    try:
+        # shield：某个客户端断开只取消它自己的等待，不会取消其他请求共享的准备任务
+        context = await asyncio.shield(task)
+    except BaseException:
+        _discard_follow_up_context_task(entry_id, task)
+        raise
+    if context is None:
+        _discard_follow_up_context_task(entry_id, task)
+    return context
+
+
+def _discard_follow_up_context_task(entry_id: int, task: "asyncio.Task") -> None:
+    """只丢弃仍是当前缓存的那个任务，避免误删其他请求之后新建的任务"""
+    cached = _follow_up_context_tasks.get(entry_id)
+    if cached and cached[1] is task:
+        del _follow_up_context_tasks[entry_id]
+
+
+def invalidate_follow_up_context(entry_id: int) -> None:
+    """条目的分析或追问历史变化后，丢弃缓存的追问上下文"""
+    _follow_up_context_tasks.pop(entry_id, None)
+
+
 async def create_follow_up_service(
     request: FollowUpCreateRequest, db: Session, llm_router: LLMRouter
 ) -> FollowUpItem:
@@ -58,27 +144,19 @@ async def create_follow_up_service(
         - 函数会获取条目的历史追问记录作为上下文
         - 使用知识库中的所有词汇作为参考列表
         - AI回答会基于原始分析和历史对话生成
+        - 同一条目的并发追问共享一次上下文准备，LLM 调用仍按问题各自进行
     """
-    entry = (
-        db.query(models.KnowledgeEntry)
-        .options(joinedload(models.KnowledgeEntry.follow_ups))
-        .filter(models.KnowledgeEntry.id == request.entry_id)
-        .first()
-    )
-    if not entry:
+    context = await get_follow_up_context(request.entry_id, db)
+    if context is None:
         raise HTTPException(status_code=404, detail=f"ID为 {request.entry_id} 的知识条目不存在。")
 
     try:
-        all_prototypes = db.query(models.KnowledgeEntry.query_text).all()
-        vocabulary_list = [item[0] for item in all_prototypes]
-
-        history_str = "\n".join([f"Q: {fu.question}\nA: {fu.answer}" for fu in entry.follow_ups])
-        context_str = f"原始分析:\n{entry.analysis_markdown}\n\n历史问答:\n{history_str}"
+        context_str, vocabulary_list = context
 
         system_prompt = llm_router.config.follow_up_prompt.format(
             context=context_str,
             question=request.question, # Pass the question here as well for the prompt
-            vocabulary_list=", ".join(vocabulary_list),
+            vocabulary_list=vocabulary_list,
         )
 
         answer_text = await call_llm_service(
@@ -91,6 +169,7 @@ async def create_follow_up_service(
         db.add(new_follow_up)
         db.commit()
         db.refresh(new_follow_up)
+        invalidate_follow_up_context(request.entry_id)
 
         return FollowUpItem.model_validate(new_follow_up)
 
@@ -129,7 +208,7 @@ async def regenerate_entry_analysis_service(
     """
     entry = (
         db.query(models.KnowledgeEntry)
-        .options(joinedload(models.KnowledgeEntry.follow_ups))
+        .options(selectinload(models.KnowledgeEntry.follow_ups))
         .filter(models.KnowledgeEntry.id == entry_id)
         .first()
     )
@@ -137,8 +216,7 @@ async def regenerate_entry_analysis_service(
         raise HTTPException(status_code=404, detail=f"ID为 {entry_id} 的知识条目未找到。")
 
     try:
-        all_prototypes = [item[0] for item in db.query(models.KnowledgeEntry.query_text).all()]
-        vocabulary_list = ", ".join(all_prototypes)
+        vocabulary_list = get_cached_vocabulary(db)
 
         system_prompt = llm_router.config.analysis_prompt.format(
             vocabulary_list=vocabulary_list or "知识库为空"
@@ -148,16 +226,18 @@ async def regenerate_entry_analysis_service(
             llm_router, system_prompt, entry.query_text, use_tools=True
         )
         entry.analysis_markdown = new_analysis_text
-        db.commit()
-        db.refresh(entry)
-
-        return AnalyzeResponse(
+        invalidate_follow_up_context(entry_id)
+        # 在提交前组装响应：提交会使实例过期，之后再访问追问列表会触发额外的 SELECT
+        response = AnalyzeResponse(
             entry_id=entry.id,
             query_text=entry.query_text,
-            analysis_markdown=entry.analysis_markdown,
+            analysis_markdown=new_analysis_text,
             source="generated",
-            follow_ups=[FollowUpItem.model_validate(fu) for fu in entry.follow_ups],
+            follow_ups=FOLLOW_UP_LIST_ADAPTER.validate_python(entry.follow_ups, from_attributes=True),
         )
+        db.commit()
+
+        return response
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"重新生成时发生错误: {e}")
@@ -182,7 +262,7 @@ def delete_entry_service(entry_id: int, db: Session) -> dict:
         - 删除操作不可逆，请谨慎使用
         - 返回的消息包含被删除条目的查询文本用于确认
     """
-    entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id == entry_id).first()
+    entry = db.get(models.KnowledgeEntry, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail=f"ID为 {entry_id} 的知识条目未找到。")
 
@@ -190,6 +270,8 @@ def delete_entry_service(entry_id: int, db: Session) -> dict:
         query_text = entry.query_text
         db.delete(entry)
         db.commit()
+        invalidate_vocabulary_cache()
+        invalidate_follow_up_context(entry_id)
         return {"message": f"成功删除知识条目 '{query_text}'"}
     except Exception as e:
         db.rollback()
@@ -216,33 +298,38 @@ def create_alias_service(request: AliasCreateRequest, db: Session) -> dict:
         - 创建后用户可以通过别名查询到对应的知识条目
         - 支持为同一个条目创建多个别名
     """
-    entry = (
-        db.query(models.KnowledgeEntry)
-        .filter(models.KnowledgeEntry.query_text == request.entry_query_text)
-        .first()
+    entry_id = db.scalar(
+        select(models.KnowledgeEntry.id).where(
+            models.KnowledgeEntry.query_text == request.entry_query_text
+        )
     )
-    if not entry:
+    if entry_id is None:
         raise HTTPException(
             status_code=404, detail=f"知识条目 '{request.entry_query_text}' 不存在。"
         )
 
-    if (
-        db.query(models.EntryAlias)
-        .filter(models.EntryAlias.alias_text == request.alias_text)
-        .first()
-    ):
+    # 一次查询同时检查"已是别名"和"已是核心条目"两种冲突
+    conflict_kinds = set(
+        db.scalars(
+            union_all(
+                select(literal("alias").label("kind")).where(
+                    models.EntryAlias.alias_text == request.alias_text
+                ),
+                select(literal("entry").label("kind")).where(
+                    models.KnowledgeEntry.query_text == request.alias_text
+                ),
+            )
+        )
+    )
+    if "alias" in conflict_kinds:
         raise HTTPException(status_code=409, detail=f"'{request.alias_text}' 已作为别名存在。")
 
-    if (
-        db.query(models.KnowledgeEntry)
-        .filter(models.KnowledgeEntry.query_text == request.alias_text)
-        .first()
-    ):
+    if "entry" in conflict_kinds:
         raise HTTPException(
             status_code=409, detail=f"'{request.alias_text}' 已作为核心知识条目存在。"
         )
 
-    new_alias = models.EntryAlias(alias_text=request.alias_text, entry_id=entry.id)
+    new_alias = models.EntryAlias(alias_text=request.alias_text, entry_id=entry_id)
     db.add(new_alias)
     db.commit()
 
@@ -285,7 +372,7 @@ async def intelligent_search_service(
         # 1. 准备给 AI 的输入
         intelligent_search_prompt = llm_router.config.intelligent_search_prompt
         # 将用户的输入构造成一个 JSON 字符串，作为 user_message
-        user_input_json = json.dumps({"term": request.term, "hint": request.hint})
+        user_input_json = orjson.dumps({"term": request.term, "hint": request.hint}).decode()
 
         # 2. 调用 AI 进行推理
         response_text = await call_llm_service(
@@ -295,14 +382,14 @@ async def intelligent_search_service(
         deduced_word = ""
         try:
             # 3. 解析 AI 返回的结果
-            response_data = json.loads(response_text)
+            response_data = orjson.loads(response_text)
             deduced_word = response_data.get("result")
             if not deduced_word:
                 raise HTTPException(
                     status_code=HTTPStatusCodes.NOT_FOUND,
                     detail=ErrorMessages.AI_INFERENCE_FAILED,
                 )
-        except (json.JSONDecodeError, KeyError):
+        except (orjson.JSONDecodeError, KeyError):
             raise HTTPException(
                 status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
                 detail=ErrorMessages.AI_RESPONSE_INVALID.format(response_text=response_text),
@@ -327,6 +414,42 @@ async def intelligent_search_service(
 # 4. 数据库管理 (Database Management)
 # =================================================================================
 
+class DBConnectionParams(NamedTuple):
+    """从数据库URL解析出的 pg_dump / psql 连接参数"""
+
+    path: str
+    host: Optional[str]
+    port: int
+    user: Optional[str]
+    password: Optional[str]
+    dbname: str
+
+
+@lru_cache(maxsize=4)
+def _db_connection_params(db_url: str) -> DBConnectionParams:
+    """解析数据库URL；同一URL只解析一次，导入/导出复用结果"""
+    parsed_url = urllib.parse.urlparse(db_url)
+    return DBConnectionParams(
+        path=parsed_url.path,
+        host=parsed_url.hostname,
+        port=parsed_url.port or 5432,
+        user=parsed_url.username,
+        password=parsed_url.password,
+        dbname=parsed_url.path.lstrip('/') if parsed_url.path else "",
+    )
+
+
+# pg_dump 流式导出时每次从管道读取的字节数
+DUMP_CHUNK_SIZE = 64 * 1024
+# 导入时每次从上传文件读取并写入 psql stdin 的字节数
+IMPORT_CHUNK_SIZE = 1024 * 1024
+
+
+async def _remove_temp_file(path: str) -> None:
+    """后台任务：在工作线程中删除临时备份文件，大文件 unlink 不占用事件循环"""
+    print(f"--- [后台任务] 清理临时备份文件: {path} ---")
+    await asyncio.to_thread(os.remove, path)
+
 
 async def export_database_service():
     """
@@ -342,7 +465,7 @@ async def export_database_service():
 
     Note:
         - SQLite: 直接复制数据库文件，保持.db格式，便于查看表结构
-        - PostgreSQL: 使用pg_dump生成SQL脚本，包含完整的表结构和数据
+        - PostgreSQL: 使用pg_dump生成SQL脚本，包含完整的表结构和数据，stdout 直接流式返回
         - 备份文件名包含时间戳便于管理
         - 使用FastAPI的BackgroundTask机制自动清理临时文件
         - 临时文件存储在/tmp目录下
@@ -358,17 +481,15 @@ async def export_database_service():
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
     temp_backup_path = f"/tmp/de_ai_hilfer_backup_{timestamp}.sql"
 
-    # 解析数据库URL以获取连接参数
-    import urllib.parse
-    
     try:
-        parsed_url = urllib.parse.urlparse(db_url)
+        # 解析数据库URL以获取连接参数
+        db_params = _db_connection_params(db_url)
         
         # 检查数据库类型
         if db_url.startswith("sqlite://"):
             # SQLite数据库备份
             import shutil
-            sqlite_db_path = parsed_url.path  # 获取SQLite数据库文件路径
+            sqlite_db_path = db_params.path  # 获取SQLite数据库文件路径
             if not sqlite_db_path or not os.path.exists(sqlite_db_path):
                 raise HTTPException(
                     status_code=500,
@@ -378,11 +499,7 @@ async def export_database_service():
             # 直接复制SQLite数据库文件
             shutil.copy2(sqlite_db_path, temp_backup_path)
             
-            # 定义清理函数
-            def cleanup():
-                os.remove(temp_backup_path)
-
-            cleanup_task = BackgroundTask(cleanup)
+            cleanup_task = BackgroundTask(_remove_temp_file, temp_backup_path)
             
             return FileResponse(
                 path=temp_backup_path,
@@ -394,7 +511,7 @@ async def export_database_service():
         # PostgreSQL数据库备份
         elif db_url.startswith("postgresql://"):
             # 构建pg_dump命令参数
-            dbname = parsed_url.path.lstrip('/') if parsed_url.path else ""
+            dbname = db_params.dbname
             if not dbname:
                 raise HTTPException(
                     status_code=500,
@@ -402,9 +519,9 @@ async def export_database_service():
                 )
             
             # 验证所有参数都不为None
-            if not parsed_url.hostname:
+            if not db_params.host:
                 raise HTTPException(status_code=500, detail="数据库URL中未指定主机名")
-            if not parsed_url.username:
+            if not db_params.user:
                 raise HTTPException(status_code=500, detail="数据库URL中未指定用户名")
             
             # 尝试创建SQLite格式的备份文件（更便于查看）
@@ -469,22 +586,22 @@ async def export_database_service():
                 print(f"--- [警告] SQLite格式备份失败，回退到SQL格式: {sqlite_error} ---")
                 
                 # 如果SQLite备份失败，使用传统的pg_dump方式
+                # pg_dump 的输出直接经 stdout 流式返回给客户端，不再落盘到 /tmp
                 command = [
                     "pg_dump",
                     "--clean",
                     "--if-exists",
                     "--no-password",  # 避免密码提示
-                    "--host", parsed_url.hostname,
-                    "--port", str(parsed_url.port or 5432),
-                    "--username", parsed_url.username,
+                    "--host", db_params.host,
+                    "--port", str(db_params.port),
+                    "--username", db_params.user,
                     "--dbname", dbname,
-                    "-f", temp_backup_path,
                 ]
                 
                 # 设置密码环境变量
                 env = os.environ.copy()
-                if parsed_url.password:
-                    env["PGPASSWORD"] = parsed_url.password
+                if db_params.password:
+                    env["PGPASSWORD"] = db_params.password
                 
                 process = await asyncio.create_subprocess_exec(
                     *command, 
@@ -492,26 +609,44 @@ async def export_database_service():
                     stderr=asyncio.subprocess.PIPE,
                     env=env  # 传递包含密码的环境变量
                 )
-                stdout, stderr = await process.communicate()
-
-                if process.returncode != 0:
-                    error_message = stderr.decode().strip()
-                    print(f"--- [错误] pg_dump 执行失败: {error_message} ---")
-                    # 如果 pg_dump 失败，也要清理可能创建的空文件
-                    if os.path.exists(temp_backup_path):
-                        os.remove(temp_backup_path)
-                    raise HTTPException(status_code=500, detail=f"数据库备份失败: {error_message}")
-                
-                backup_path = temp_backup_path
-                media_type = "application/sql"
-
-            # 定义清理函数
-            def cleanup():
-                print(f"--- [后台任务] 清理临时备份文件: {backup_path} ---")
-                os.remove(backup_path)
+                # 并发读取 stderr，避免其管道写满后阻塞 pg_dump
+                stderr_task = asyncio.create_task(process.stderr.read())
+
+                # 先取第一个数据块：若 pg_dump 一开始就失败，仍可返回 500
+                first_chunk = await process.stdout.read(DUMP_CHUNK_SIZE)
+                if not first_chunk:
+                    await process.wait()
+                    if process.returncode != 0:
+                        error_message = (await stderr_task).decode().strip()
+                        print(f"--- [错误] pg_dump 执行失败: {error_message} ---")
+                        raise HTTPException(status_code=500, detail=f"数据库备份失败: {error_message}")
+
+                async def stream_dump():
+                    finished = False
+                    try:
+                        yield first_chunk
+                        while chunk := await process.stdout.read(DUMP_CHUNK_SIZE):
+                            yield chunk
+                        finished = True
+                    finally:
+                        # 客户端中途断开时终止 pg_dump
+                        if not finished and process.returncode is None:
+                            process.kill()
+                        await process.wait()
+                        if finished and process.returncode != 0:
+                            error_message = (await stderr_task).decode().strip()
+                            print(f"--- [错误] pg_dump 执行失败: {error_message} ---")
+
+                return StreamingResponse(
+                    stream_dump(),
+                    media_type="application/sql",
+                    headers={
+                        "Content-Disposition": f'attachment; filename="{os.path.basename(temp_backup_path)}"'
+                    },
+                )
 
-            # 将清理函数包装成一个 BackgroundTask
-            cleanup_task = BackgroundTask(cleanup)
+            # 响应发送完毕后在后台删除临时备份文件
+            cleanup_task = BackgroundTask(_remove_temp_file, backup_path)
 
             # 将 background task 传递给 FileResponse
             return FileResponse(
@@ -553,8 +688,9 @@ async def import_database_service(
 
     Note:
         - 支持两种模式：文件上传（Web）和文件路径（Raycast）
-        - 使用临时文件确保安全性，避免直接操作原始文件
-        - 在finally块中确保临时文件被正确清理
+        - 上传的文件分块直接写入 psql 的 stdin，边接收边恢复，不落盘
+        - 文件路径模式由 psql 通过 -f 直接读取原文件（只读），无需复制
+        - pg_dump 备份中的数据以 COPY 批量载入；恢复在单个事务中执行，任一语句失败则整体回滚
         - 恢复过程会覆盖现有数据，请谨慎使用
     """
     db_url = get_database_url()
@@ -564,9 +700,8 @@ async def import_database_service(
             detail=ErrorMessages.DATABASE_URL_NOT_SET,
         )
 
-    timestamp = datetime.datetime.now().timestamp()
-    temp_sql_path = f"/tmp/temp_import_{timestamp}.sql"
     source_description = ""  # 用于日志记录
+    sql_file_path: Optional[str] = None  # 为 None 时从上传文件经 stdin 输入
 
     try:
         # --- 【逻辑恢复】模式一：处理文件上传 (Web 客户端) ---
@@ -578,9 +713,6 @@ async def import_database_service(
                     detail=ErrorMessages.INVALID_FILE_TYPE,
                 )
 
-            # 将上传的文件内容写入临时文件
-            with open(temp_sql_path, "wb") as buffer:
-                shutil.copyfileobj(backup_file.file, buffer)
 
         # --- 【逻辑恢复】模式二：处理文件路径 (Raycast 客户端) ---
         elif request and request.file_path:
@@ -596,8 +728,7 @@ async def import_database_service(
                     detail=ErrorMessages.INVALID_FILE_EXTENSION,
                 )
 
-            # 为了安全，我们先复制再操作
-            shutil.copyfile(request.file_path, temp_sql_path)
+            sql_file_path = request.file_path
 
         # --- 如果两种模式都没有匹配，则报错 ---
         else:
@@ -609,14 +740,12 @@ async def import_database_service(
         # --- 统一的 psql 执行逻辑 ---
         print(f"--- [数据库导入] 开始从 {source_description} 恢复...")
         
-        # 解析数据库URL以获取连接参数（与导出逻辑保持一致）
-        import urllib.parse
-        
         try:
-            parsed_url = urllib.parse.urlparse(db_url)
+            # 解析数据库URL以获取连接参数（与导出逻辑共用缓存）
+            db_params = _db_connection_params(db_url)
             
             # 构建psql命令参数
-            dbname = parsed_url.path.lstrip('/') if parsed_url.path else ""
+            dbname = db_params.dbname
             if not dbname:
                 raise HTTPException(
                     status_code=500,
@@ -626,17 +755,24 @@ async def import_database_service(
             command = [
                 "psql",
                 "--no-password",  # 避免密码提示
-                "--host", parsed_url.hostname,
-                "--port", str(parsed_url.port or 5432),
-                "--username", parsed_url.username,
+                # 整个恢复在一个事务中执行：只在最后提交一次，而不是每条语句各自提交；
+                # pg_dump --clean 的输出会先 DROP/CREATE 表再 COPY 数据，
+                # 同一事务内新建的表在 wal_level=minimal 时 COPY 可跳过 WAL
+                "--single-transaction",
+                # 出错立即停止并返回非零退出码，整个恢复回滚，不会留下半恢复的数据库
+                "--set", "ON_ERROR_STOP=1",
+                "--host", db_params.host,
+                "--port", str(db_params.port),
+                "--username", db_params.user,
                 "--dbname", dbname,
-                "-f", temp_sql_path,
             ]
+            if sql_file_path:
+                command += ["-f", sql_file_path]
             
             # 设置密码环境变量
             env = os.environ.copy()
-            if parsed_url.password:
-                env["PGPASSWORD"] = parsed_url.password
+            if db_params.password:
+                env["PGPASSWORD"] = db_params.password
                 
         except Exception as e:
             raise HTTPException(
@@ -646,17 +782,36 @@ async def import_database_service(
 
         process = await asyncio.create_subprocess_exec(
             *command, 
+            stdin=None if sql_file_path else asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE, 
             stderr=asyncio.subprocess.PIPE,
             env=env  # 传递包含密码的环境变量
         )
-        stdout, stderr = await process.communicate()
+        # 并发读取输出，避免管道写满后 psql 阻塞
+        output_task = asyncio.gather(process.stdout.read(), process.stderr.read())
+
+        if not sql_file_path:
+            await backup_file.seek(0)
+            try:
+                while chunk := await backup_file.read(IMPORT_CHUNK_SIZE):
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # psql 提前退出，错误信息以其 stderr 为准
+                pass
+            finally:
+                process.stdin.close()
+
+        _, stderr = await output_task
+        await process.wait()
 
         if process.returncode != 0:
             error_message = stderr.decode().strip()
             print(f"--- [错误] psql 执行失败: {error_message} ---")
             raise HTTPException(status_code=500, detail=f"数据库恢复失败: {error_message}")
 
+        # 整库替换后词汇表必然变化
+        invalidate_vocabulary_cache()
         return {"message": f"数据库从 {source_description} 恢复成功！新数据已生效。"}
 
     except FileNotFoundError:
@@ -671,8 +826,6 @@ async def import_database_service(
     finally:
         if backup_file:
             backup_file.file.close()
-        if os.path.exists(temp_sql_path):
-            os.remove(temp_sql_path)
 
 
 # =================================================================================
@@ -680,6 +833,10 @@ async def import_database_service(
 # =================================================================================
 
 
+# 上次数据库探测成功的时间（time.monotonic）
+_last_db_ping_ok_at = float("-inf")
+
+
 def get_server_status_service(db: Session) -> dict:
     """
     检查后端服务和数据库连接的健康状态。
@@ -695,15 +852,22 @@ def get_server_status_service(db: Session) -> dict:
 
     Note:
         - 执行简单的SELECT 1查询来验证数据库连接
+        - 距上次成功探测不足 status_ping_interval 秒时直接返回，不访问数据库
         - 如果数据库连接正常，返回{"status": "ok", "db_status": "ok"}
         - 用于负载均衡器健康检查和监控系统
     """
-    try:
-        from sqlalchemy import text
+    global _last_db_ping_ok_at
 
+    now = time.monotonic()
+    if now - _last_db_ping_ok_at < settings.api.status_ping_interval:
+        return {"status": "ok", "db_status": "ok"}
+
+    try:
         # 执行一个最简单的SQL查询来唤醒或检查数据库
         db.execute(text("SELECT 1"))
+        _last_db_ping_ok_at = now
         return {"status": "ok", "db_status": "ok"}
     except Exception as e:
         # 如果数据库连接失败，这个接口会报错
+        _last_db_ping_ok_at = float("-inf")
         raise HTTPException(status_code=503, detail=f"Database connection error: {e}")
@@ -2,16 +2,20 @@
 API服务层：包含业务逻辑和辅助函数
 """
 
-import json
-import re
+import asyncio
 import traceback
-from typing import Deque, Dict, List, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Dict, List, Optional
 
+import orjson
 from fastapi import HTTPException
-from sqlalchemy import and_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import String, and_, case, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session, selectinload
 
 from ai_adapter.llm_router import LLMRouter
+from app.core.config import settings
 from app.core.errors import ErrorMessages
 from app.core.llm_service import (
     call_llm_service,
@@ -22,11 +26,13 @@ from app.core.performance import (
     record_cache_hit,
     record_cache_miss,
 )
+from app.core.preview import get_preview_from_analysis
 from app.db import models
 from app.schemas.dictionary import (
     AnalyzeRequest,
     AnalyzeResponse,
     DBSuggestion,
+    FOLLOW_UP_LIST_ADAPTER,
     FollowUpItem,
     RecentItem,
     EntryType, # 导入新的枚举
@@ -36,58 +42,109 @@ from app.schemas.dictionary import (
 # 性能优化：缓存和查询优化
 # =================================================================================
 
-# 全局缓存字典，用于存储预览文本的缓存
-_preview_cache: Dict[str, str] = {}
-_max_cache_size = 1000  # 最大缓存条目数
+# 全局 LRU 缓存，用于存储预览文本；OrderedDict 按访问顺序排列，队首即最久未使用
+# 键为 analysis_markdown 的 16 字节 BLAKE2b 摘要，避免长文本重复驻留与反复哈希
+_preview_cache: "OrderedDict[bytes, str]" = OrderedDict()
+# 最大缓存条目数：需大于知识库条目数，否则 /entries/all 的全量顺序扫描会让 LRU 完全失效
+_max_cache_size = 4096
+
+
+def _preview_cache_key(analysis_markdown: str) -> bytes:
+    """计算预览缓存的定长键"""
+    return blake2b(analysis_markdown.encode("utf-8"), digest_size=16).digest()
 
 
 @monitor_performance("get_cached_preview")
 def get_cached_preview(analysis_markdown: str) -> str:
     """获取缓存的预览文本，如果不存在则计算并缓存"""
-    if analysis_markdown in _preview_cache:
+    key = _preview_cache_key(analysis_markdown)
+    preview = _preview_cache.get(key)
+    if preview is not None:
         record_cache_hit("preview_cache")
-        return _preview_cache[analysis_markdown]
+        _preview_cache.move_to_end(key)
+        return preview
 
     record_cache_miss("preview_cache")
 
-    # 如果缓存过大，清理一半
-    if len(_preview_cache) > _max_cache_size:
-        keys_to_remove = list(_preview_cache.keys())[: _max_cache_size // 2]
-        for key in keys_to_remove:
-            del _preview_cache[key]
+    # 缓存已满时逐个淘汰最久未使用的条目，每次 O(1)
+    while len(_preview_cache) >= _max_cache_size:
+        _preview_cache.popitem(last=False)
 
     # 计算并缓存预览
     preview = get_preview_from_analysis(analysis_markdown)
-    _preview_cache[analysis_markdown] = preview
+    _preview_cache[key] = preview
     return preview
 
 
-def optimize_query_with_cache(db: Session, query_text: str) -> Optional[models.KnowledgeEntry]:
-    """优化的查询函数，使用更高效的查询方式"""
-    # 使用更高效的查询，避免不必要的joinedload
-    entry = (
-        db.query(models.KnowledgeEntry)
-        .filter(models.KnowledgeEntry.query_text == query_text)
-        .first()
+def get_entry_preview(entry) -> str:
+    """
+    读取写入时预先计算的 preview 列；尚未回填的旧数据回退到缓存的实时提取。
+
+    entry 可以是 ORM 对象，也可以是包含 preview 与 analysis_markdown 列的查询结果行。
+    """
+    if entry.preview is not None:
+        return entry.preview
+    return get_cached_preview(entry.analysis_markdown)
+
+
+# 建议列表只需要条目的这几列；按列投影查询，不构造 ORM 对象、不进入 identity map
+_SUGGESTION_COLUMNS = (
+    models.KnowledgeEntry.id,
+    models.KnowledgeEntry.query_text,
+    models.KnowledgeEntry.preview,
+    models.KnowledgeEntry.analysis_markdown,
+)
+
+
+def _lower_prefix_match(column, prefix: str):
+    """
+    不区分大小写的前缀匹配：lower(column) LIKE 'prefix%'
+
+    与 ILIKE 语义相同，但表达式与 lower() 函数索引一致，PostgreSQL 可以走索引范围扫描；
+    模式在 Python 中先转成小写，保证 LIKE 的右侧是常量前缀。
+    """
+    return func.lower(column).like(f"{prefix.lower()}%")
+
+
+def _load_follow_up_items(db: Session, entry_ids: List[int]) -> Dict[int, List[FollowUpItem]]:
+    """按条目批量加载追问，返回 {entry_id: [FollowUpItem, ...]}"""
+    follow_ups_map: Dict[int, List[FollowUpItem]] = {}
+    if not entry_ids:
+        return follow_ups_map
+    rows = db.execute(
+        select(
+            models.FollowUp.entry_id,
+            models.FollowUp.id,
+            models.FollowUp.question,
+            models.FollowUp.answer,
+        )
+        .where(models.FollowUp.entry_id.in_(entry_ids))
+        .order_by(models.FollowUp.id)
     )
+    for entry_id, follow_up_id, question, answer in rows:
+        follow_ups_map.setdefault(entry_id, []).append(
+            FollowUpItem(id=follow_up_id, question=question, answer=answer)
+        )
+    return follow_ups_map
 
-    if entry:
-        # 只有在需要时才加载follow_ups
-        if hasattr(entry, "_follow_ups_loaded"):
-            return entry
-        # 延迟加载follow_ups
-        db.refresh(entry, ["follow_ups"])
-        entry._follow_ups_loaded = True
 
-    return entry
+def optimize_query_with_cache(db: Session, query_text: str) -> Optional[models.KnowledgeEntry]:
+    """优化的查询函数，追问和别名随条目一并批量加载，无需再单独刷新关系"""
+    return db.scalars(
+        models.KnowledgeEntry.with_children_stmt().where(
+            models.KnowledgeEntry.query_text == query_text
+        )
+    ).first()
 
 
 def batch_get_entries_by_ids(db: Session, entry_ids: List[int]) -> Dict[int, models.KnowledgeEntry]:
-    """批量获取条目，减少数据库查询次数"""
+    """批量获取条目，减少数据库查询次数；追问和别名按关系各一次查询预加载"""
     if not entry_ids:
         return {}
 
-    entries = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.id.in_(entry_ids)).all()
+    entries = db.scalars(
+        models.KnowledgeEntry.with_children_stmt().where(models.KnowledgeEntry.id.in_(entry_ids))
+    ).all()
 
     return {entry.id: entry for entry in entries}
 
@@ -97,9 +154,11 @@ def batch_get_entries_by_ids(db: Session, entry_ids: List[int]) -> Dict[int, mod
 # =================================================================================
 
 
+@lru_cache(maxsize=1024)
 def infer_entry_type(query: str) -> EntryType:
     """
     智能推断条目类型（单词、前缀、后缀）。
+    结果只取决于查询文本，自动补全时同一输入会反复出现，因此按查询缓存。
     
     Args:
         query (str): 用户输入的查询文本
@@ -120,86 +179,73 @@ def infer_entry_type(query: str) -> EntryType:
 # 2. 核心辅助函数 (Helper Functions)
 # =================================================================================
 
-
-def get_preview_from_analysis(analysis: str) -> str:
+def check_exact_cache_match(query: str, db: Session) -> Optional[models.KnowledgeEntry]:
     """
-    【V3.8 智能感知版】从完整的Markdown分析中智能提取预览。
-    能够区分单词和词缀，并为它们生成合适的预览。
+    检查精确缓存匹配（知识条目表和别名表）
+
+    一条查询同时匹配条目本身和指向它的别名；两者都命中时优先返回条目本身。
     """
-    try:
-        # 方案1: 尝试匹配词缀格式 (通过关键词: Präfix, Suffix 等)
-        # 格式示例: * **Präfix/Vorsilbe** **核心含义...**
-        affix_pattern = r"\*\s*\*\*(Präfix|Suffix|Vorsilbe|Nachsilbe)[^ ]*\*\*\s*\*\*(.*?)\*\*"
-        affix_match = re.search(affix_pattern, analysis, re.IGNORECASE)
-        if affix_match:
-            # 提取类型和核心含义
-            affix_type = affix_match.group(1).strip()
-            affix_meaning = affix_match.group(2).strip().split("\n")[0]
-            # 返回一个简洁、专门为词缀设计的预览
-            preview = f"{affix_type}: {affix_meaning}"
-            return (preview[:70] + "...") if len(preview) > 70 else preview
-
-        # 方案2: 如果不是词缀，则回退到单词格式匹配
-        # 在 "核心释义" 区域内查找
-        bedeutung_match = re.search(
-            r"#### 核心释义 \(Bedeutung\)(.*?)####", analysis, re.DOTALL | re.IGNORECASE
-        )
-        search_area = bedeutung_match.group(1) if bedeutung_match else analysis
-        
-        # 匹配 `* **词性.** **释义**` 格式
-        pos_pattern = r"([a-z\./]+)\.?"
-        standard_pattern = r"\*\s*\*\*" + pos_pattern + r"\*\*\s*\*\*(.*?)\*\*"
-        matches = re.findall(standard_pattern, search_area, re.IGNORECASE)
-        
-        if matches:
-            preview_parts = []
-            for pos, definition in matches:
-                clean_pos = pos.strip().rstrip('.') + "."
-                clean_def = definition.strip().split("\n")[0]
-                preview_parts.append(f"{clean_pos} {clean_def}")
-            return "; ".join(preview_parts)
+    # 空查询或超长查询不可能命中知识库，直接跳过数据库
+    if not query or len(query) > settings.max_analysis_length:
+        return None
 
-    except Exception as e:
-        print(f"--- {ErrorMessages.PREVIEW_EXTRACTION_ERROR.format(error=e)} ---")
-        pass
-
-    # 方案3: 通用备用方案，适用于任何未知格式
-    # 移除Markdown标题和星号，取第一行有效内容
-    lines = analysis.strip().split('\n')
-    for line in lines:
-        clean_line = line.strip('#* /').strip()
-        if clean_line:
-            return (clean_line[:70] + "...") if len(clean_line) > 70 else clean_line
-    
-    # 如果完全为空，返回一个默认值
-    return "无法生成预览"
+    is_direct_match = models.KnowledgeEntry.query_text == query
+    return (
+        db.query(models.KnowledgeEntry)
+        .options(selectinload(models.KnowledgeEntry.follow_ups))
+        .filter(
+            or_(
+                is_direct_match,
+                models.KnowledgeEntry.id.in_(
+                    select(models.EntryAlias.entry_id).where(models.EntryAlias.alias_text == query)
+                ),
+            )
+        )
+        .order_by(case((is_direct_match, 0), else_=1))
+        .first()
+    )
 
 
-def check_exact_cache_match(query: str, db: Session) -> Optional[models.KnowledgeEntry]:
+def check_exact_cache_matches(
+    queries: List[str], db: Session
+) -> Dict[str, models.KnowledgeEntry]:
     """
-    检查精确缓存匹配（知识条目表和别名表）
+    check_exact_cache_match 的批量版本：返回 {查询文本: 命中的知识条目}，未命中的查询不出现。
+
+    无论批量大小，固定为别名查询、条目查询和追问的 selectin 加载三次往返。
     """
-    # 1. 检查知识条目表
-    entry = (
-        db.query(models.KnowledgeEntry)
-        .options(joinedload(models.KnowledgeEntry.follow_ups))
-        .filter(models.KnowledgeEntry.query_text == query)
-        .first()
+    queries = [
+        query for query in queries if query and len(query) <= settings.max_analysis_length
+    ]
+    if not queries:
+        return {}
+
+    alias_targets = dict(
+        db.query(models.EntryAlias.alias_text, models.EntryAlias.entry_id)
+        .filter(models.EntryAlias.alias_text.in_(queries))
+        .all()
     )
-    if entry:
-        return entry
-
-    # 2. 检查别名表
-    alias = (
-        db.query(models.EntryAlias)
-        .options(joinedload(models.EntryAlias.entry).joinedload(models.KnowledgeEntry.follow_ups))
-        .filter(models.EntryAlias.alias_text == query)
-        .first()
+    entries = (
+        db.query(models.KnowledgeEntry)
+        .options(selectinload(models.KnowledgeEntry.follow_ups))
+        .filter(
+            or_(
+                models.KnowledgeEntry.query_text.in_(queries),
+                models.KnowledgeEntry.id.in_(set(alias_targets.values())),
+            )
+        )
+        .all()
     )
-    if alias and alias.entry:
-        return alias.entry
+    by_query_text = {entry.query_text: entry for entry in entries}
+    by_id = {entry.id: entry for entry in entries}
 
-    return None
+    matches = {}
+    for query in queries:
+        # 与单条版本一致：条目本身优先于别名
+        entry = by_query_text.get(query) or by_id.get(alias_targets.get(query))
+        if entry:
+            matches[query] = entry
+    return matches
 
 
 async def perform_spell_check(query: str, llm_router: LLMRouter) -> tuple[bool, Optional[str]]:
@@ -210,11 +256,11 @@ async def perform_spell_check(query: str, llm_router: LLMRouter) -> tuple[bool,
     response_text = await call_llm_service(llm_router, spell_checker_prompt, query)
 
     try:
-        spell_data = json.loads(response_text)
+        spell_data = orjson.loads(response_text)
         is_correctly_spelled = spell_data.get("is_correct", True)
         suggestion = spell_data.get("suggestion")
         return is_correctly_spelled, suggestion
-    except (json.JSONDecodeError, KeyError):
+    except (orjson.JSONDecodeError, KeyError):
         print(f"--- {ErrorMessages.SPELL_CHECK_WARNING.format(query=query)} ---")
         return True, None
 
@@ -230,10 +276,13 @@ async def identify_prototype_word(query: str, llm_router: LLMRouter) -> str:
 
     prototype_word = query
     try:
-        cleaned_text = re.search(r"\{.*\}", prototype_response_text, re.DOTALL)
-        prototype_data = json.loads(cleaned_text.group(0) if cleaned_text else "{}")
+        # 截取第一个 "{" 到最后一个 "}" 之间的 JSON 对象
+        start = prototype_response_text.find("{")
+        end = prototype_response_text.rfind("}")
+        cleaned_text = prototype_response_text[start : end + 1] if start != -1 and end > start else "{}"
+        prototype_data = orjson.loads(cleaned_text)
         prototype_word = prototype_data.get("prototype", query)
-    except (json.JSONDecodeError, AttributeError):
+    except (orjson.JSONDecodeError, AttributeError):
         error_msg = ErrorMessages.PROTOTYPE_JSON_ERROR.format(
             prototype_response_text=prototype_response_text
         )
@@ -257,13 +306,14 @@ def create_alias_if_needed(query: str, target_word: str, entry_id: int, db: Sess
             db.commit()
 
 
-def update_recent_searches(query: str, recent_searches: Deque[str]) -> None:
+def update_recent_searches(query: str, recent_searches: "OrderedDict[str, None]") -> None:
     """
-    更新最近搜索列表
+    更新最近搜索列表（最新在前，超出上限时淘汰最旧的记录）
     """
-    if query in recent_searches:
-        recent_searches.remove(query)
-    recent_searches.appendleft(query)
+    recent_searches[query] = None
+    recent_searches.move_to_end(query, last=False)
+    while len(recent_searches) > settings.api.recent_searches_limit:
+        recent_searches.popitem(last=True)
 
 
 # =================================================================================
@@ -272,66 +322,87 @@ def update_recent_searches(query: str, recent_searches: Deque[str]) -> None:
 
 
 @monitor_performance("get_recent_entries_service")
-def get_recent_entries_service(db: Session, recent_searches: Deque[str]) -> list[RecentItem]:
+def get_recent_entries_service(
+    db: Session, recent_searches: "OrderedDict[str, None]"
+) -> list[RecentItem]:
     """
     获取最近成功查询的知识条目列表，包含预览。
-    性能优化：使用批量查询和缓存预览。
+    性能优化：使用批量查询，并直接读取写入时预先计算的预览列。
     """
     if not recent_searches:
         return []
 
-    # 批量查询所有需要的条目
-    entries = (
-        db.query(models.KnowledgeEntry)
-        .filter(models.KnowledgeEntry.query_text.in_(list(recent_searches)))
-        .all()
+    # 批量查询所有需要的条目，只投影列表需要的列
+    rows = db.execute(
+        select(
+            models.KnowledgeEntry.id,
+            models.KnowledgeEntry.query_text,
+            models.KnowledgeEntry.preview,
+        ).where(models.KnowledgeEntry.query_text.in_(list(recent_searches)))
     )
 
     # 创建查询到条目的映射
-    entry_map = {entry.query_text: entry for entry in entries}
+    item_map = {}
+    missing_items = {}
+    for entry_id, query_text, preview in rows:
+        item = RecentItem(entry_id=entry_id, query_text=query_text, preview=preview or "")
+        if preview is None:
+            missing_items[entry_id] = item
+        item_map[query_text] = item
+    _fill_missing_previews(db, missing_items)
+
+    return [item_map[query] for query in recent_searches if query in item_map]
+
+
+def _fill_missing_previews(db: Session, missing_items: Dict[int, RecentItem]) -> None:
+    """兼容尚未回填 preview 的旧数据：仅为这些条目单独加载分析内容并提取预览"""
+    if not missing_items:
+        return
+    rows = db.execute(
+        select(models.KnowledgeEntry.id, models.KnowledgeEntry.analysis_markdown).where(
+            models.KnowledgeEntry.id.in_(list(missing_items))
+        )
+    )
+    for entry_id, analysis_markdown in rows:
+        missing_items[entry_id].preview = get_cached_preview(analysis_markdown)
 
-    recent_items = []
-    for query in recent_searches:
-        entry = entry_map.get(query)
-        if entry:
-            # 使用缓存的预览
-            recent_items.append(
-                RecentItem(
-                    entry_id=entry.id,
-                    query_text=entry.query_text,
-                    preview=get_cached_preview(entry.analysis_markdown),
-                )
-            )
 
-    return recent_items
+# 全量浏览时每批从数据库游标取回的行数（PostgreSQL 下使用服务端游标）
+ALL_ENTRIES_BATCH_SIZE = 500
 
 
 @monitor_performance("get_all_entries_service")
-def get_all_entries_service(db: Session) -> list[RecentItem]:
+def get_all_entries_service(
+    db: Session, limit: Optional[int] = None, after: Optional[str] = None
+) -> list[RecentItem]:
     """
     获取知识库中的所有条目，按字母顺序排序，并包含预览。
-    性能优化：使用缓存预览和批量处理。
+    性能优化：只读取写入时预先计算好的 preview 列，不再加载完整的 analysis_markdown；
+    结果按批流式读取，并支持基于 query_text 的键集分页（limit + after）。
     """
-    # 只查询必要的字段，减少内存使用
-    all_entries = (
-        db.query(
-            models.KnowledgeEntry.id,
-            models.KnowledgeEntry.query_text,
-            models.KnowledgeEntry.analysis_markdown,
-        )
-        .order_by(models.KnowledgeEntry.query_text.asc())
-        .all()
-    )
+    stmt = select(
+        models.KnowledgeEntry.id,
+        models.KnowledgeEntry.query_text,
+        models.KnowledgeEntry.preview,
+    ).order_by(models.KnowledgeEntry.query_text.asc())
+    if after is not None:
+        stmt = stmt.where(models.KnowledgeEntry.query_text > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
 
     response_items = []
-    for entry in all_entries:
-        response_items.append(
-            RecentItem(
-                entry_id=entry.id,
-                query_text=entry.query_text,
-                preview=get_cached_preview(entry.analysis_markdown),
-            )
-        )
+    # 兼容尚未回填 preview 的旧数据：记录下来，稍后仅为这些条目单独加载分析内容
+    missing_items: Dict[int, RecentItem] = {}
+    for entry_id, query_text, preview in db.execute(
+        stmt.execution_options(yield_per=ALL_ENTRIES_BATCH_SIZE)
+    ):
+        item = RecentItem(entry_id=entry_id, query_text=query_text, preview=preview or "")
+        if preview is None:
+            missing_items[entry_id] = item
+        response_items.append(item)
+
+    _fill_missing_previews(db, missing_items)
+
     return response_items
 
 
@@ -347,7 +418,6 @@ def get_suggestions_service(q: str, db: Session) -> list[DBSuggestion]:
         return []
 
     suggestion_items = []
-    processed_entry_ids = set()
 
     # =====================================================================
     # 1. 新增：词缀查询的专属处理逻辑
@@ -359,127 +429,102 @@ def get_suggestions_service(q: str, db: Session) -> list[DBSuggestion]:
         clean_query = query.strip('-')
         is_prefix = entry_type == EntryType.PREFIX
         is_suffix = entry_type == EntryType.SUFFIX
-        # 步骤 A: 精确查找词缀条目本身，并置于列表顶部
-        affix_entry = db.query(models.KnowledgeEntry).filter(models.KnowledgeEntry.query_text == query).first()
-        if affix_entry:
-            suggestion_items.append(
-                DBSuggestion(
-                    entry_id=affix_entry.id,
-                    query_text=affix_entry.query_text,
-                    preview=get_cached_preview(affix_entry.analysis_markdown),
-                    analysis_markdown=affix_entry.analysis_markdown,
-                    source="知识库",
-                    follow_ups=[],  # 稍后批量加载
-                )
-            )
-            processed_entry_ids.add(affix_entry.id)
-
-        # 步骤 B: 模糊查找包含该词缀的单词作为示例
+        # 模糊查找包含该词缀的单词作为示例
         if is_prefix:
-            pattern = f"{clean_query}%"
+            affix_match = _lower_prefix_match(models.KnowledgeEntry.query_text, clean_query)
         else:  # is_suffix
-            pattern = f"%{clean_query}"
-        
-        # 只查找单词类型的条目作为示例
-        example_words = (
-            db.query(models.KnowledgeEntry)
-            .filter(
-                models.KnowledgeEntry.query_text.ilike(pattern),
-                models.KnowledgeEntry.id.notin_(processed_entry_ids),
-                models.KnowledgeEntry.entry_type == 'WORD' 
+            # 前置通配无法使用 B-tree；PostgreSQL 上由 idx_knowledge_entries_trgm 三元组索引服务
+            affix_match = models.KnowledgeEntry.query_text.ilike(f"%{clean_query}")
+
+        # 一次查询同时取回词缀条目本身（排在最前）和最多 10 个示例单词，再批量加载追问
+        is_exact = models.KnowledgeEntry.query_text == query
+        affix_rows = db.execute(
+            select(*_SUGGESTION_COLUMNS)
+            .where(
+                or_(
+                    is_exact,
+                    and_(
+                        affix_match,
+                        # 只查找单词类型的条目作为示例
+                        models.KnowledgeEntry.entry_type == 'WORD',
+                    ),
+                )
             )
-            .limit(10)
-            .all()
-        )
-
-        for word in example_words:
+            .order_by(case((is_exact, 0), else_=1))
+            .limit(11)
+        ).all()
+        if affix_rows and affix_rows[0].query_text != query:
+            # 没有词缀条目本身时只保留 10 个示例
+            affix_rows = affix_rows[:10]
+
+        follow_ups_map = _load_follow_up_items(db, [row.id for row in affix_rows])
+        for row in affix_rows:
             suggestion_items.append(
                 DBSuggestion(
-                    entry_id=word.id,
-                    query_text=word.query_text,
-                    preview=get_cached_preview(word.analysis_markdown),
-                    analysis_markdown=word.analysis_markdown,
+                    entry_id=row.id,
+                    query_text=row.query_text,
+                    preview=get_entry_preview(row),
+                    analysis_markdown=row.analysis_markdown,
                     source="知识库",
-                    follow_ups=[], # 稍后批量加载
+                    follow_ups=follow_ups_map.get(row.id, []),
                 )
             )
-            processed_entry_ids.add(word.id)
 
     # =====================================================================
     # 2. 保留：常规单词和别名的查询逻辑
     # =====================================================================
     else:
-        # 步骤 A: 模糊查询别名
-        alias_query = (
-            db.query(
-                models.EntryAlias.alias_text,
-                models.KnowledgeEntry.query_text,
-                models.KnowledgeEntry.analysis_markdown,
-                models.KnowledgeEntry.id.label("entry_id"),
-            )
-            .join(models.KnowledgeEntry, models.EntryAlias.entry_id == models.KnowledgeEntry.id)
-            .filter(
-                models.EntryAlias.alias_text.ilike(f"{query}%"),
-                models.EntryAlias.entry_id.notin_(processed_entry_ids)
+        # 别名命中（最多 5 个）与条目前缀命中（最多 10 个）合并为一条 UNION ALL 查询，
+        # 别名命中排在前面，之后再批量加载追问。
+        # 同一条目的多个别名在 SQL 中按 entry_id 聚合，每个条目只出现一次，无需在 Python 中去重
+        first_alias = func.min(models.EntryAlias.alias_text)
+        alias_hits = (
+            select(
+                models.EntryAlias.entry_id.label("entry_id"),
+                first_alias.label("alias_text"),
+                literal(0).label("rank"),
             )
+            .where(_lower_prefix_match(models.EntryAlias.alias_text, query))
+            .group_by(models.EntryAlias.entry_id)
+            .order_by(first_alias)
             .limit(5)
-            .all()
+            .subquery()
         )
-        for alias_data in alias_query:
-            if alias_data.entry_id not in processed_entry_ids:
-                preview = f"↪️ {alias_data.alias_text} → {get_cached_preview(alias_data.analysis_markdown)}"
-                suggestion_items.append(
-                    DBSuggestion(
-                        entry_id=alias_data.entry_id,
-                        query_text=alias_data.query_text,
-                        preview=preview,
-                        analysis_markdown=alias_data.analysis_markdown,
-                        source="知识库",
-                        follow_ups=[],
-                    )
-                )
-                processed_entry_ids.add(alias_data.entry_id)
-
-        # 步骤 B: 模糊查询知识条目
-        entry_query = (
-            db.query(models.KnowledgeEntry)
-            .filter(
-                models.KnowledgeEntry.query_text.ilike(f"{query}%"),
-                models.KnowledgeEntry.id.notin_(processed_entry_ids),
+        entry_hits = (
+            select(
+                models.KnowledgeEntry.id.label("entry_id"),
+                literal(None, String).label("alias_text"),
+                literal(1).label("rank"),
+            )
+            .where(
+                _lower_prefix_match(models.KnowledgeEntry.query_text, query),
+                models.KnowledgeEntry.id.notin_(select(alias_hits.c.entry_id)),
             )
             .limit(10)
-            .all()
+            .subquery()
         )
-        for entry_data in entry_query:
-            if entry_data.id not in processed_entry_ids:
-                suggestion_items.append(
-                    DBSuggestion(
-                        entry_id=entry_data.id,
-                        query_text=entry_data.query_text,
-                        preview=get_cached_preview(entry_data.analysis_markdown),
-                        analysis_markdown=entry_data.analysis_markdown,
-                        source="知识库",
-                        follow_ups=[],
-                    )
+        hits = union_all(select(alias_hits), select(entry_hits)).subquery()
+        rows = db.execute(
+            select(*_SUGGESTION_COLUMNS, hits.c.alias_text)
+            .join(hits, models.KnowledgeEntry.id == hits.c.entry_id)
+            .order_by(hits.c.rank)
+        ).all()
+
+        follow_ups_map = _load_follow_up_items(db, [row.id for row in rows])
+        for row in rows:
+            preview = get_entry_preview(row)
+            if row.alias_text is not None:
+                preview = f"↪️ {row.alias_text} → {preview}"
+            suggestion_items.append(
+                DBSuggestion(
+                    entry_id=row.id,
+                    query_text=row.query_text,
+                    preview=preview,
+                    analysis_markdown=row.analysis_markdown,
+                    source="知识库",
+                    follow_ups=follow_ups_map.get(row.id, []),
                 )
-                processed_entry_ids.add(entry_data.id)
-
-    # =====================================================================
-    # 3. 统一处理：为所有建议批量加载追问信息（性能优化）
-    # =====================================================================
-    entry_ids_to_load = {s.entry_id for s in suggestion_items}
-    if entry_ids_to_load:
-        follow_ups_query = (
-            db.query(models.FollowUp).filter(models.FollowUp.entry_id.in_(entry_ids_to_load)).all()
-        )
-        follow_ups_map = {}
-        for fu in follow_ups_query:
-            if fu.entry_id not in follow_ups_map:
-                follow_ups_map[fu.entry_id] = []
-            follow_ups_map[fu.entry_id].append(FollowUpItem.model_validate(fu))
-        
-        for suggestion in suggestion_items:
-            suggestion.follow_ups = follow_ups_map.get(suggestion.entry_id, [])
+            )
 
     return suggestion_items
 
@@ -493,7 +538,7 @@ async def analyze_entry_service(
     request: AnalyzeRequest,
     llm_router: LLMRouter,
     db: Session,
-    recent_searches: Deque[str],
+    recent_searches: "OrderedDict[str, None]",
 ) -> AnalyzeResponse:
     """
     【V2 - 统一版】分析德语条目（包括单词、词缀等），提供详细的语法和语义分析。
@@ -505,7 +550,8 @@ async def analyze_entry_service(
 
     try:
         # 1. 精确缓存检查 (所有类型的条目共用)
-        entry = check_exact_cache_match(query, db)
+        # 同步查询放到工作线程执行，命中缓存的请求不再阻塞事件循环
+        entry = await asyncio.to_thread(check_exact_cache_match, query, db)
         if entry:
             update_recent_searches(entry.query_text, recent_searches)
             return AnalyzeResponse(
@@ -513,7 +559,7 @@ async def analyze_entry_service(
                 query_text=entry.query_text,
                 analysis_markdown=entry.analysis_markdown,
                 source="知识库",
-                follow_ups=[FollowUpItem.model_validate(fu) for fu in entry.follow_ups],
+                follow_ups=FOLLOW_UP_LIST_ADAPTER.validate_python(entry.follow_ups, from_attributes=True),
             )
 
         # 2. 根据条目类型，执行不同的处理逻辑
@@ -565,7 +611,7 @@ async def analyze_entry_service(
             query_text=entry.query_text,
             analysis_markdown=entry.analysis_markdown,
             source="generated",
-            follow_ups=[FollowUpItem.model_validate(fu) for fu in entry.follow_ups],
+            follow_ups=FOLLOW_UP_LIST_ADAPTER.validate_python(entry.follow_ups, from_attributes=True),
         )
 
     except Exception as e:
@@ -4,9 +4,10 @@
 集中管理应用的所有配置项，包括数据库配置、API配置等。
 """
 
-import json
+import re
 from typing import Optional, List
 
+import orjson
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -22,8 +23,10 @@ class DatabaseConfig(BaseSettings):
 
     database_url: str = Field(default="sqlite:///./de_ai_hilfer.db", description="数据库连接URL")
     echo: bool = Field(default=False, description="是否打印SQL语句")
-    pool_size: int = Field(default=5, description="连接池大小")
-    max_overflow: int = Field(default=10, description="连接池最大溢出")
+    pool_size: int = Field(default=20, description="连接池大小")
+    max_overflow: int = Field(default=40, description="连接池最大溢出")
+    pool_recycle: int = Field(default=1800, description="连接最长复用时间（秒），超过后重建连接")
+    query_cache_size: int = Field(default=1200, description="SQL编译缓存条目数")
 
     @property
     def url(self) -> str:
@@ -57,17 +60,39 @@ class APIConfig(BaseSettings):
         if isinstance(v, str):
             # 尝试解析为JSON数组
             try:
-                parsed = json.loads(v)
+                parsed = orjson.loads(v)
                 if isinstance(parsed, list):
                     return parsed
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # 如果不是JSON，则按逗号分隔
                 return [origin.strip() for origin in v.split(",") if origin.strip()]
         return v
 
+    @property
+    def cors_allowed_origins(self) -> List[str]:
+        """不含通配符的精确源（以及单独的 "*"），直接交给 CORSMiddleware 的 allow_origins"""
+        return [origin for origin in self.cors_origins if origin == "*" or "*" not in origin]
+
+    @property
+    def cors_origin_regex(self) -> Optional[str]:
+        """
+        将 https://*.vercel.app 这类通配符源合并为一个正则。
+
+        CORSMiddleware 在启动时只编译一次 allow_origin_regex，请求时直接匹配，
+        无需逐个源做字符串处理。
+        """
+        patterns = [
+            re.escape(origin).replace(r"\*", "[^/]*")
+            for origin in self.cors_origins
+            if origin != "*" and "*" in origin
+        ]
+        return "|".join(f"(?:{pattern})" for pattern in patterns) or None
+
     # 缓存配置
     recent_searches_limit: int = Field(10, description="最近搜索记录限制")
     cache_ttl: int = Field(3600, description="缓存TTL（秒）")
+    stats_refresh_interval: int = Field(300, description="统计物化视图刷新间隔（秒）")
+    status_ping_interval: int = Field(30, description="健康检查真正查询数据库的最小间隔（秒）")
 
     class Config:
         env_prefix = "API_"
@@ -5,11 +5,16 @@
 """
 
 import logging
-from typing import Any, Dict, Optional, Union
+from collections import OrderedDict
+from http import HTTPStatus
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
 
+import orjson
 from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from .errors import HTTPStatusCodes, create_error_response
@@ -17,85 +22,114 @@ from .errors import HTTPStatusCodes, create_error_response
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 没有详情的异常共享同一个只读空映射，避免每次抛出都分配新字典
+_EMPTY_DETAILS: Mapping[str, Any] = MappingProxyType({})
+
+
+class ORJSONErrorResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应，供异常处理器返回错误体"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# HTTP 异常的错误体只取决于 (状态码, 详情)；常见组合预先序列化为字节，按 LRU 复用
+_error_body_cache: "OrderedDict[Tuple[int, str], bytes]" = OrderedDict()
+_max_error_body_cache_size = 64
+# 启动时预热的常见状态码（使用 Starlette 默认的状态描述作为详情）
+_PREWARM_STATUS_CODES = (400, 401, 403, 404, 405)
+
+
+def get_error_body(status_code: int, detail: Any) -> bytes:
+    """获取 HTTP 异常的序列化错误体；字符串详情的结果会被缓存"""
+    if not isinstance(detail, str):
+        return orjson.dumps(create_error_response(status_code=status_code, detail=detail))
+
+    key = (status_code, detail)
+    body = _error_body_cache.get(key)
+    if body is not None:
+        _error_body_cache.move_to_end(key)
+        return body
+
+    while len(_error_body_cache) >= _max_error_body_cache_size:
+        _error_body_cache.popitem(last=False)
+    body = orjson.dumps(create_error_response(status_code=status_code, detail=detail))
+    _error_body_cache[key] = body
+    return body
+
 
 class BaseAppException(Exception):
-    """应用基础异常类"""
+    """
+    应用基础异常类
+
+    各子类的状态码是固定的，作为类属性声明，实例化时只需保存消息和详情。
+    """
+
+    __slots__ = ("message", "details")
+
+    status_code: int = HTTPStatusCodes.INTERNAL_SERVER_ERROR
 
     def __init__(
         self,
         message: str,
-        status_code: int = HTTPStatusCodes.INTERNAL_SERVER_ERROR,
         details: Optional[Dict[str, Any]] = None,
+        *,
+        status_code: Optional[int] = None,
     ):
         self.message = message
-        self.status_code = status_code
-        self.details = details or {}
+        self.details = details if details else _EMPTY_DETAILS
+        if status_code is not None:
+            self.status_code = status_code
         super().__init__(message)
 
 
 class DatabaseException(BaseAppException):
     """数据库相关异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(
-            message=message,
-            status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
-            details=details,
-        )
+    __slots__ = ()
+    status_code = HTTPStatusCodes.INTERNAL_SERVER_ERROR
 
 
 class ValidationException(BaseAppException):
     """数据验证异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(message=message, status_code=HTTPStatusCodes.BAD_REQUEST, details=details)
+    __slots__ = ()
+    status_code = HTTPStatusCodes.BAD_REQUEST
 
 
 class NotFoundException(BaseAppException):
     """资源未找到异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(message=message, status_code=HTTPStatusCodes.NOT_FOUND, details=details)
+    __slots__ = ()
+    status_code = HTTPStatusCodes.NOT_FOUND
 
 
 class ConflictException(BaseAppException):
     """资源冲突异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(message=message, status_code=HTTPStatusCodes.CONFLICT, details=details)
+    __slots__ = ()
+    status_code = HTTPStatusCodes.CONFLICT
 
 
 class AIServiceException(BaseAppException):
     """AI服务异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(
-            message=message,
-            status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
-            details=details,
-        )
+    __slots__ = ()
+    status_code = HTTPStatusCodes.INTERNAL_SERVER_ERROR
 
 
 class FileOperationException(BaseAppException):
     """文件操作异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(
-            message=message,
-            status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
-            details=details,
-        )
+    __slots__ = ()
+    status_code = HTTPStatusCodes.INTERNAL_SERVER_ERROR
 
 
 class ConfigurationException(BaseAppException):
     """配置异常"""
 
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        super().__init__(
-            message=message,
-            status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
-            details=details,
-        )
+    __slots__ = ()
+    status_code = HTTPStatusCodes.INTERNAL_SERVER_ERROR
 
 
 def create_app_exception(
@@ -126,10 +160,12 @@ def handle_database_error(error: Exception, operation: str = "数据库操作")
     Returns:
         DatabaseException实例
     """
-    logger.error(f"{operation}失败: {str(error)}", exc_info=True)
+    error_text = str(error)
+    message = f"{operation}失败: {error_text}"
+    logger.error("%s", message, exc_info=True)
     return DatabaseException(
-        message=f"{operation}失败: {str(error)}",
-        details={"operation": operation, "original_error": str(error)},
+        message=message,
+        details={"operation": operation, "original_error": error_text},
     )
 
 
@@ -144,13 +180,15 @@ def handle_validation_error(error: Exception, field: str = None) -> ValidationEx
     Returns:
         ValidationException实例
     """
-    message = f"数据验证失败: {str(error)}"
+    error_text = str(error)
     if field:
-        message = f"字段 '{field}' 验证失败: {str(error)}"
+        message = f"字段 '{field}' 验证失败: {error_text}"
+    else:
+        message = f"数据验证失败: {error_text}"
 
-    logger.warning(message)
+    logger.warning("%s", message)
     return ValidationException(
-        message=message, details={"field": field, "original_error": str(error)}
+        message=message, details={"field": field, "original_error": error_text}
     )
 
 
@@ -165,10 +203,12 @@ def handle_ai_service_error(error: Exception, operation: str = "AI服务调用")
     Returns:
         AIServiceException实例
     """
-    logger.error(f"{operation}失败: {str(error)}", exc_info=True)
+    error_text = str(error)
+    message = f"{operation}失败: {error_text}"
+    logger.error("%s", message, exc_info=True)
     return AIServiceException(
-        message=f"{operation}失败: {str(error)}",
-        details={"operation": operation, "original_error": str(error)},
+        message=message,
+        details={"operation": operation, "original_error": error_text},
     )
 
 
@@ -186,21 +226,27 @@ def handle_file_operation_error(
     Returns:
         FileOperationException实例
     """
-    message = f"{operation}失败: {str(error)}"
+    error_text = str(error)
     if file_path:
-        message = f"{operation}失败 ({file_path}): {str(error)}"
+        message = f"{operation}失败 ({file_path}): {error_text}"
+    else:
+        message = f"{operation}失败: {error_text}"
 
-    logger.error(message, exc_info=True)
+    logger.error("%s", message, exc_info=True)
     return FileOperationException(
         message=message,
         details={
             "operation": operation,
             "file_path": file_path,
-            "original_error": str(error),
+            "original_error": error_text,
         },
     )
 
 
+# 以下处理器虽然内部没有 await，但必须保持 async def：
+# Starlette 对同步处理器会通过 run_in_threadpool 调用，反而多出一次线程池切换。
+
+
 async def app_exception_handler(request: Request, exc: BaseAppException) -> JSONResponse:
     """
     应用异常处理器
@@ -212,9 +258,13 @@ async def app_exception_handler(request: Request, exc: BaseAppException) -> JSON
     Returns:
         JSON响应
     """
-    logger.error(f"应用异常: {exc.message}", exc_info=True)
+    # 只有 5xx 才记录完整堆栈；4xx 属于预期的业务错误，格式化堆栈的开销没有意义
+    if exc.status_code >= HTTPStatusCodes.INTERNAL_SERVER_ERROR:
+        logger.error("应用异常: %s", exc.message, exc_info=True)
+    else:
+        logger.warning("应用异常: %s - %s", exc.status_code, exc.message)
 
-    return JSONResponse(
+    return ORJSONErrorResponse(
         status_code=exc.status_code,
         content=create_error_response(
             status_code=exc.status_code, detail=exc.message, **exc.details
@@ -235,21 +285,23 @@ async def validation_exception_handler(
     Returns:
         JSON响应
     """
-    logger.warning(f"请求验证失败: {exc.errors()}")
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning("请求验证失败: %s", exc.errors())
 
-    return JSONResponse(
+    return ORJSONErrorResponse(
         status_code=HTTPStatusCodes.BAD_REQUEST,
         content=create_error_response(
             status_code=HTTPStatusCodes.BAD_REQUEST,
             detail="请求参数验证失败",
-            validation_errors=exc.errors(),
+            # errors() 的 ctx 中可能带有异常对象等，先统一转换为可序列化的结构
+            validation_errors=jsonable_encoder(exc.errors()),
         ),
     )
 
 
 async def http_exception_handler(
     request: Request, exc: Union[HTTPException, StarletteHTTPException]
-) -> JSONResponse:
+) -> Response:
     """
     HTTP异常处理器
 
@@ -258,13 +310,15 @@ async def http_exception_handler(
         exc: HTTP异常
 
     Returns:
-        JSON响应
+        JSON响应（错误体复用预先序列化的字节）
     """
-    logger.warning(f"HTTP异常: {exc.status_code} - {exc.detail}")
+    logger.warning("HTTP异常: %s - %s", exc.status_code, exc.detail)
 
-    return JSONResponse(
+    return Response(
+        content=get_error_body(exc.status_code, exc.detail),
         status_code=exc.status_code,
-        content=create_error_response(status_code=exc.status_code, detail=exc.detail),
+        media_type="application/json",
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -279,9 +333,9 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
     Returns:
         JSON响应
     """
-    logger.error(f"未处理的异常: {str(exc)}", exc_info=True)
+    logger.error("未处理的异常: %s", exc, exc_info=True)
 
-    return JSONResponse(
+    return ORJSONErrorResponse(
         status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
         content=create_error_response(
             status_code=HTTPStatusCodes.INTERNAL_SERVER_ERROR,
@@ -291,6 +345,18 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
     )
 
 
+# 异常类型 -> 处理器的分发表，注册时遍历一次。
+# Starlette 把 Exception 的处理器交给最外层的 ServerErrorMiddleware，不参与 ExceptionMiddleware
+# 按 MRO 的查找，因此保留它不会拖慢常规异常的匹配，同时保证未处理异常也返回统一的 JSON 格式。
+_EXCEPTION_HANDLERS = {
+    BaseAppException: app_exception_handler,
+    RequestValidationError: validation_exception_handler,
+    HTTPException: http_exception_handler,
+    StarletteHTTPException: http_exception_handler,
+    Exception: general_exception_handler,
+}
+
+
 def setup_exception_handlers(app):
     """
     设置异常处理器
@@ -298,8 +364,8 @@ def setup_exception_handlers(app):
     Args:
         app: FastAPI应用实例
     """
-    app.add_exception_handler(BaseAppException, app_exception_handler)
-    app.add_exception_handler(RequestValidationError, validation_exception_handler)
-    app.add_exception_handler(HTTPException, http_exception_handler)
-    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
-    app.add_exception_handler(Exception, general_exception_handler)
+    for exception_class, handler in _EXCEPTION_HANDLERS.items():
+        app.add_exception_handler(exception_class, handler)
+
+    for status_code in _PREWARM_STATUS_CODES:
+        get_error_body(status_code, HTTPStatus(status_code).phrase)
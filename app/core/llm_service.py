@@ -1,9 +1,13 @@
-import hashlib
-import uuid
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
 from typing import Dict, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
 
 from ai_adapter.llm_router import LLMRouter
 from ai_adapter.schemas import AssistantInternalMessage, TextBlock
@@ -14,36 +18,58 @@ from app.schemas.dictionary import AnalyzeRequest
 # 性能优化：LLM响应缓存
 # =================================================================================
 
-# LLM响应缓存，避免重复调用
-_llm_response_cache: Dict[str, str] = {}
+# LLM响应缓存（LRU），避免重复调用；键为 16 字节 BLAKE2b 摘要，队首即最久未使用
+_llm_response_cache: "OrderedDict[bytes, str]" = OrderedDict()
 _max_llm_cache_size = 500  # 最大缓存条目数
+# 同步端点运行在线程池中，LRU 的 move_to_end / popitem 需要互斥，避免并发修改时 KeyError
+_llm_cache_lock = threading.Lock()
 
 
-def get_cache_key(prompt: str, message: str, use_tools: bool = False) -> str:
-    """生成缓存键"""
-    content = f"{prompt}:{message}:{use_tools}"
-    return hashlib.md5(content.encode()).hexdigest()
+def get_cache_key(prompt: str, message: str, use_tools: bool = False) -> bytes:
+    """
+    生成缓存键
+
+    提示词和消息分别送入哈希器并以 NUL 分隔，不再拼接成一个大字符串再整体编码。
+    """
+    hasher = blake2b(digest_size=16)
+    hasher.update(prompt.encode("utf-8"))
+    hasher.update(b"\x00")
+    hasher.update(message.encode("utf-8"))
+    hasher.update(b"\x01" if use_tools else b"\x00")
+    return hasher.digest()
 
 
-def get_cached_llm_response(cache_key: str) -> Optional[str]:
+def get_cached_llm_response(cache_key: bytes) -> Optional[str]:
     """获取缓存的LLM响应"""
-    return _llm_response_cache.get(cache_key)
+    with _llm_cache_lock:
+        response = _llm_response_cache.get(cache_key)
+        if response is not None:
+            _llm_response_cache.move_to_end(cache_key)
+        return response
 
 
-def cache_llm_response(cache_key: str, response: str) -> None:
+def cache_llm_response(cache_key: bytes, response: str) -> None:
     """缓存LLM响应"""
-    # 如果缓存过大，清理一半
-    if len(_llm_response_cache) > _max_llm_cache_size:
-        keys_to_remove = list(_llm_response_cache.keys())[: _max_llm_cache_size // 2]
-        for key in keys_to_remove:
-            del _llm_response_cache[key]
+    with _llm_cache_lock:
+        # 缓存已满时逐个淘汰最久未使用的条目，每次 O(1)，不再一次性清理一半
+        while len(_llm_response_cache) >= _max_llm_cache_size:
+            _llm_response_cache.popitem(last=False)
 
-    _llm_response_cache[cache_key] = response
+        _llm_response_cache[cache_key] = response
 
 
 # 词汇表缓存，避免重复查询
 _vocabulary_cache: Optional[Tuple[str, float]] = None  # (vocabulary_list, timestamp)
 _vocabulary_cache_ttl = 300  # 5分钟缓存时间
+# 保护词汇表缓存的写入（重建、追加、清除），避免并发时互相覆盖；查询数据库时不持有锁
+_vocabulary_lock = threading.Lock()
+# 只读投影，模块级构建一次；编译结果由 SQLAlchemy 的语句缓存复用
+_VOCABULARY_STMT = select(models.KnowledgeEntry.query_text).execution_options(yield_per=1000)
+# 支持字符串聚合的数据库直接在 SQL 端拼接词汇表，只返回一个字符串
+_VOCABULARY_AGG_STMTS = {
+    "postgresql": select(func.string_agg(models.KnowledgeEntry.query_text, ", ")),
+    "sqlite": select(func.group_concat(models.KnowledgeEntry.query_text, ", ")),
+}
 
 
 def get_cached_vocabulary(db: Session) -> str:
@@ -52,15 +78,44 @@ def get_cached_vocabulary(db: Session) -> str:
 
     global _vocabulary_cache
 
+    # 只读取一次全局变量：其他线程可能在检查与返回之间将其清除
+    cached = _vocabulary_cache
     current_time = time.time()
-    if _vocabulary_cache is None or current_time - _vocabulary_cache[1] > _vocabulary_cache_ttl:
-
-        # 重新查询词汇表
-        vocabulary_list_tuples = db.query(models.KnowledgeEntry.query_text).all()
-        vocabulary_list = ", ".join([item[0] for item in vocabulary_list_tuples])
+    if cached is not None and current_time - cached[1] <= _vocabulary_cache_ttl:
+        return cached[0]
+
+    # 重新查询词汇表：直接在 Core 连接上执行，跳过 ORM 的查询编译与结果解释层
+    connection = db.connection()
+    agg_stmt = _VOCABULARY_AGG_STMTS.get(connection.dialect.name)
+    if agg_stmt is not None:
+        vocabulary_list = connection.execute(agg_stmt).scalar() or ""
+    else:
+        # 其他数据库分批拉取后在 Python 中拼接，避免一次性构建全部行对象
+        query_texts = connection.execute(_VOCABULARY_STMT).scalars()
+        vocabulary_list = ", ".join(query_texts)
+    with _vocabulary_lock:
         _vocabulary_cache = (vocabulary_list, current_time)
 
-    return _vocabulary_cache[0]
+    return vocabulary_list
+
+
+def invalidate_vocabulary_cache() -> None:
+    """知识条目增删后清除词汇表缓存，下次读取时重新查询"""
+    global _vocabulary_cache
+    with _vocabulary_lock:
+        _vocabulary_cache = None
+
+
+def append_to_vocabulary_cache(query_text: str) -> None:
+    """新增条目后直接追加到已缓存的词汇表，缓存保持有效，无需重新查询整张表"""
+    global _vocabulary_cache
+    with _vocabulary_lock:
+        if _vocabulary_cache is not None:
+            vocabulary_list, cached_at = _vocabulary_cache
+            _vocabulary_cache = (
+                f"{vocabulary_list}, {query_text}" if vocabulary_list else query_text,
+                cached_at,
+            )
 
 
 # =================================================================================
@@ -123,21 +178,22 @@ async def call_llm_service(
             print("--- [缓存命中] 使用缓存的LLM响应 ---")
             return cached_response
 
-    session_id = str(uuid.uuid4())
+    # 会话 ID 只是不透明的唯一键，直接取随机字节的十六进制，无需构造 UUID 对象
+    session_id = os.urandom(16).hex()
     session = llm_router.get_session(session_id, system_prompt_override=system_prompt)
 
     # 【修复】根据 use_tools 参数决定是否启用 "database" 标签的工具
     enabled_tags = ["database"] if use_tools else []
 
-    # 【修复】使用更健壮的 async for 循环来驱动异步生成器
-    async for _ in session.run(message=user_message, enabled_tags=enabled_tags):
-        pass
+    # 直接等待协程完成整个交互流程，不再驱动只产出一次状态消息的异步生成器
+    await session.complete(message=user_message, enabled_tags=enabled_tags)
 
     last_message = session.conversation_history[-1]
     response_text = ""
     if isinstance(last_message, AssistantInternalMessage):
+        # 列表推导让 str.join 走列表快速路径；TextBlock 没有子类，用 type() 精确比较即可
         response_text = " ".join(
-            block.text for block in last_message.content if isinstance(block, TextBlock)
+            [block.text for block in last_message.content if type(block) is TextBlock]
         ).strip()
 
     if not response_text:
@@ -152,6 +208,25 @@ async def call_llm_service(
     return response_text
 
 
+def _find_knowledge_entry(db: Session, query_text: str) -> Optional[models.KnowledgeEntry]:
+    """按查询文本加载知识条目及其追问"""
+    # 调用方会立即读取分析内容和追问列表，因此直接加载完整条目并一并加载追问，
+    # 不再先做 EXISTS 检查再查一次；query_text 上已有唯一索引
+    return (
+        db.query(models.KnowledgeEntry)
+        .options(selectinload(models.KnowledgeEntry.follow_ups))
+        .filter(models.KnowledgeEntry.query_text == query_text)
+        .first()
+    )
+
+
+def _save_knowledge_entry(db: Session, entry: models.KnowledgeEntry) -> None:
+    """保存新条目并刷新数据库生成的字段"""
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+
+
 async def get_or_create_knowledge_entry(
     query_text: str,
     request: AnalyzeRequest,
@@ -164,11 +239,8 @@ async def get_or_create_knowledge_entry(
     如果条目已存在，则直接返回；如果不存在，则获取当前词汇表，调用AI分析并创建。
     性能优化：使用缓存的词汇表和LLM响应缓存。
     """
-    entry = (
-        db.query(models.KnowledgeEntry)
-        .filter(models.KnowledgeEntry.query_text == query_text)
-        .first()
-    )
+    # 同步的数据库操作放到工作线程执行，避免阻塞事件循环上的其他请求
+    entry = await asyncio.to_thread(_find_knowledge_entry, db, query_text)
     if entry:
         print(f"--- 内部获取: 知识条目 '{query_text}' 已存在 ---")
         return entry
@@ -176,7 +248,7 @@ async def get_or_create_knowledge_entry(
     print(f"--- 内部创建: 知识条目 '{query_text}' 不存在，准备调用AI分析 ---")
 
     # 1. 使用缓存的词汇表获取当前知识库中的所有原型词汇
-    vocabulary_list = get_cached_vocabulary(db)
+    vocabulary_list = await asyncio.to_thread(get_cached_vocabulary, db)
 
     # 2. 格式化 Prompt
     analysis_prompt = analysis_prompt_template.format(
@@ -196,13 +268,10 @@ async def get_or_create_knowledge_entry(
         entry_type=request.entry_type,
         analysis_markdown=analysis_markdown,
     )
-    db.add(new_entry)
-    db.commit()
-    db.refresh(new_entry)
+    await asyncio.to_thread(_save_knowledge_entry, db, new_entry)
 
-    # 5. 清除词汇表缓存，因为添加了新条目
-    global _vocabulary_cache
-    _vocabulary_cache = None
+    # 5. 把新条目追加到词汇表缓存
+    append_to_vocabulary_cache(query_text)
 
     print(f"--- 新知识条目 '{query_text}' 已创建并存入数据库 ---")
 
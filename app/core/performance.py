@@ -4,25 +4,116 @@
 """
 
 import functools
+import heapq
+import itertools
+import os
 import threading
 import time
 from collections import defaultdict, deque
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    # psutil 未安装时跳过内存监控
+    psutil = None
+
+# 每个函数最多保留的耗时样本数，避免长期运行时列表无限增长
+_MAX_TIMES_PER_NAME = 1000
+# 每个线程缓冲的事件数达到该值时才合并进全局统计
+_FLUSH_THRESHOLD = 64
+# 慢查询只保留最近 _RECENT_SLOW_QUERIES 条，另外单独保留耗时最长的 _SLOWEST_QUERIES 条
+_RECENT_SLOW_QUERIES = 100
+_SLOWEST_QUERIES = 10
 
 # 性能统计数据
 performance_stats = {
-    "query_times": defaultdict(list),
-    "cache_hits": defaultdict(int),
-    "cache_misses": defaultdict(int),
+    "query_times": defaultdict(lambda: deque(maxlen=_MAX_TIMES_PER_NAME)),
+    # 缓存名 -> [hits, misses]，命中与未命中放在同一个可原地修改的列表中
+    "cache_counters": {},
     "function_calls": defaultdict(int),
+    # 名称 -> [total_time, min_time, max_time]，记录时增量更新，生成报告时无需遍历样本
+    "query_aggregates": {},
     "total_queries": 0,
-    "slow_queries": [],
+    "slow_queries": deque(maxlen=_RECENT_SLOW_QUERIES),
+    "slow_queries_total": 0,
+    # 小顶堆，元素为 (duration, seq, record)；seq 保证耗时相同时不比较字典
+    "slowest_heap": [],
     "memory_usage": deque(maxlen=100),
 }
 
 # 线程安全的锁
 _stats_lock = threading.Lock()
 
+# 线程本地的事件缓冲：记录时无需加锁，每 _FLUSH_THRESHOLD 个事件才获取一次全局锁
+_tls = threading.local()
+# 所有线程的缓冲区，生成报告或重置时一并合并/清空；线程池中的线程长期存活，数量有限
+_thread_buffers: List[List[Tuple[str, float, float]]] = []
+# 慢查询堆的插入序号
+_slow_query_seq = itertools.count()
+
+
+def _get_thread_buffer() -> List[Tuple[str, float, float]]:
+    """获取当前线程的事件缓冲区，首次使用时创建并登记"""
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = []
+        with _stats_lock:
+            _thread_buffers.append(buf)
+    return buf
+
+
+def _flush_locked(buf: List[Tuple[str, float, float]]) -> None:
+    """将缓冲区中的 (name, duration, timestamp) 事件合并进全局统计，调用方需持有 _stats_lock"""
+    # 只取出当前已有的事件：所属线程可能同时在末尾追加，切片和删除前缀各自是原子操作
+    count = len(buf)
+    if not count:
+        return
+    events = buf[:count]
+    del buf[:count]
+
+    query_times = performance_stats["query_times"]
+    function_calls = performance_stats["function_calls"]
+    query_aggregates = performance_stats["query_aggregates"]
+    for name, duration, timestamp in events:
+        query_times[name].append(duration)
+        function_calls[name] += 1
+
+        aggregate = query_aggregates.get(name)
+        if aggregate is None:
+            query_aggregates[name] = [duration, duration, duration]
+        else:
+            aggregate[0] += duration
+            if duration < aggregate[1]:
+                aggregate[1] = duration
+            if duration > aggregate[2]:
+                aggregate[2] = duration
+
+        # 记录慢查询（超过1秒）
+        if duration > 1.0:
+            _record_slow_query_locked(name, duration, timestamp)
+    performance_stats["total_queries"] += count
+
+
+def _record_slow_query_locked(name: str, duration: float, timestamp: float) -> None:
+    """记录一条慢查询：最近记录放入定长队列，同时维护耗时最长的前 N 条，调用方需持有 _stats_lock"""
+    record = {"name": name, "duration": duration, "timestamp": timestamp}
+    performance_stats["slow_queries"].append(record)
+    performance_stats["slow_queries_total"] += 1
+
+    heap = performance_stats["slowest_heap"]
+    item = (duration, next(_slow_query_seq), record)
+    if len(heap) < _SLOWEST_QUERIES:
+        heapq.heappush(heap, item)
+    elif duration > heap[0][0]:
+        heapq.heapreplace(heap, item)
+
+
+def _flush_all_locked() -> None:
+    """合并所有线程尚未提交的事件，调用方需持有 _stats_lock"""
+    for buf in _thread_buffers:
+        _flush_locked(buf)
+
 
 class PerformanceMonitor:
     """性能监控器"""
@@ -41,24 +132,15 @@ class PerformanceMonitor:
         self._record_performance()
 
     def _record_performance(self):
-        """记录性能数据"""
+        """记录性能数据：先写入线程本地缓冲，攒够一批再加锁合并"""
         if self.start_time and self.end_time:
             duration = self.end_time - self.start_time
 
-            with _stats_lock:
-                performance_stats["query_times"][self.name].append(duration)
-                performance_stats["function_calls"][self.name] += 1
-                performance_stats["total_queries"] += 1
-
-                # 记录慢查询（超过1秒）
-                if duration > 1.0:
-                    performance_stats["slow_queries"].append(
-                        {
-                            "name": self.name,
-                            "duration": duration,
-                            "timestamp": time.time(),
-                        }
-                    )
+            buf = _get_thread_buffer()
+            buf.append((self.name, duration, self.end_time))
+            if len(buf) >= _FLUSH_THRESHOLD:
+                with _stats_lock:
+                    _flush_locked(buf)
 
     @property
     def duration(self) -> Optional[float]:
@@ -85,48 +167,58 @@ def monitor_performance(name: str):
 def record_cache_hit(cache_name: str):
     """记录缓存命中"""
     with _stats_lock:
-        performance_stats["cache_hits"][cache_name] += 1
+        counters = performance_stats["cache_counters"].get(cache_name)
+        if counters is None:
+            performance_stats["cache_counters"][cache_name] = [1, 0]
+        else:
+            counters[0] += 1
 
 
 def record_cache_miss(cache_name: str):
     """记录缓存未命中"""
     with _stats_lock:
-        performance_stats["cache_misses"][cache_name] += 1
+        counters = performance_stats["cache_counters"].get(cache_name)
+        if counters is None:
+            performance_stats["cache_counters"][cache_name] = [0, 1]
+        else:
+            counters[1] += 1
 
 
 def get_performance_report() -> Dict[str, Any]:
     """获取性能报告"""
     with _stats_lock:
+        _flush_all_locked()
         report = {
             "summary": {
                 "total_queries": performance_stats["total_queries"],
                 "total_functions": len(performance_stats["function_calls"]),
-                "slow_queries_count": len(performance_stats["slow_queries"]),
+                "slow_queries_count": performance_stats["slow_queries_total"],
             },
             "query_performance": {},
             "cache_performance": {},
-            "slow_queries": performance_stats["slow_queries"][-10:],  # 最近10个慢查询
+            "slow_queries": list(performance_stats["slow_queries"])[-10:],  # 最近10个慢查询
+            # 耗时最长的慢查询，按耗时降序
+            "slowest_queries": [
+                record
+                for _, _, record in sorted(performance_stats["slowest_heap"], reverse=True)
+            ],
             "recommendations": [],
         }
 
-        # 查询性能统计
-        for name, times in performance_stats["query_times"].items():
-            if times:
-                report["query_performance"][name] = {
-                    "count": len(times),
-                    "avg_time": sum(times) / len(times),
-                    "min_time": min(times),
-                    "max_time": max(times),
-                    "total_time": sum(times),
-                }
-
-        # 缓存性能统计
-        all_cache_names = set(performance_stats["cache_hits"].keys()) | set(
-            performance_stats["cache_misses"].keys()
-        )
-        for cache_name in all_cache_names:
-            hits = performance_stats["cache_hits"].get(cache_name, 0)
-            misses = performance_stats["cache_misses"].get(cache_name, 0)
+        # 查询性能统计：直接读取增量聚合值，与事件数量无关
+        function_calls = performance_stats["function_calls"]
+        for name, (total_time, min_time, max_time) in performance_stats["query_aggregates"].items():
+            count = function_calls[name]
+            report["query_performance"][name] = {
+                "count": count,
+                "avg_time": total_time / count,
+                "min_time": min_time,
+                "max_time": max_time,
+                "total_time": total_time,
+            }
+
+        # 缓存性能统计：计数器只存整数，命中率字符串仅在生成报告时格式化
+        for cache_name, (hits, misses) in performance_stats["cache_counters"].items():
             total = hits + misses
             hit_rate = (hits / total * 100) if total > 0 else 0
 
@@ -155,7 +247,7 @@ def _generate_recommendations(report: Dict[str, Any]) -> List[str]:
 
     # 检查缓存命中率
     for cache_name, stats in report["cache_performance"].items():
-        hit_rate = float(stats["hit_rate"].rstrip("%"))
+        hit_rate = (stats["hits"] / stats["total"] * 100) if stats["total"] > 0 else 0
         if hit_rate < 50:
             recommendations.append(
                 f"缓存 '{cache_name}' 命中率较低 ({stats['hit_rate']})，建议调整缓存策略"
@@ -181,34 +273,47 @@ def _generate_recommendations(report: Dict[str, Any]) -> List[str]:
 def reset_performance_stats():
     """重置性能统计"""
     with _stats_lock:
+        for buf in _thread_buffers:
+            buf.clear()
         performance_stats["query_times"].clear()
-        performance_stats["cache_hits"].clear()
-        performance_stats["cache_misses"].clear()
+        performance_stats["cache_counters"].clear()
         performance_stats["function_calls"].clear()
+        performance_stats["query_aggregates"].clear()
         performance_stats["total_queries"] = 0
         performance_stats["slow_queries"].clear()
+        performance_stats["slow_queries_total"] = 0
+        performance_stats["slowest_heap"].clear()
         performance_stats["memory_usage"].clear()
 
 
+# 缓存的当前进程句柄；按 PID 校验，fork 出的工作进程会重新创建自己的句柄
+_psutil_process = None
+
+
+def _get_psutil_process():
+    """获取当前进程的 psutil.Process，只在首次使用或 PID 变化后创建"""
+    global _psutil_process
+    process = _psutil_process
+    if process is None or process.pid != os.getpid():
+        process = _psutil_process = psutil.Process()
+    return process
+
+
 def log_memory_usage():
     """记录内存使用情况"""
-    try:
-        import psutil
+    if psutil is None:
+        return
 
-        process = psutil.Process()
-        memory_info = process.memory_info()
+    memory_info = _get_psutil_process().memory_info()
 
-        with _stats_lock:
-            performance_stats["memory_usage"].append(
-                {
-                    "rss": memory_info.rss,
-                    "vms": memory_info.vms,
-                    "timestamp": time.time(),
-                }
-            )
-    except ImportError:
-        # psutil 未安装，跳过内存监控
-        pass
+    with _stats_lock:
+        performance_stats["memory_usage"].append(
+            {
+                "rss": memory_info.rss,
+                "vms": memory_info.vms,
+                "timestamp": time.time(),
+            }
+        )
 
 
 def get_memory_trend() -> Dict[str, Any]:
@@ -0,0 +1,92 @@
+"""
+预览提取：从完整的 Markdown 分析中生成简短预览
+
+纯函数模块，不依赖数据库或 API 层，供模型在写入时计算预览列以及 API 层读取时复用。
+"""
+
+import re
+
+from app.core.errors import ErrorMessages
+
+# 预览提取使用的正则，模块加载时编译一次
+# 词缀格式: * **Präfix/Vorsilbe** **核心含义...**
+_AFFIX_RE = re.compile(
+    r"\*\s*\*\*(Präfix|Suffix|Vorsilbe|Nachsilbe)[^ ]*\*\*\s*\*\*(.*?)\*\*", re.IGNORECASE
+)
+# 词缀正则的前置关键词检查（小写）
+_AFFIX_KEYWORDS = ("präfix", "suffix", "vorsilbe", "nachsilbe")
+# "核心释义" 区域
+_BEDEUTUNG_MARKER = "#### 核心释义"
+_BEDEUTUNG_RE = re.compile(r"#### 核心释义 \(Bedeutung\)(.*?)####", re.DOTALL | re.IGNORECASE)
+# 备用方案中从行首尾去除的 Markdown 标记与空白（一次 strip 完成）
+_FALLBACK_STRIP_CHARS = "#*/ \t\r\f\v"
+# 单词格式: * **词性.** **释义**
+_POS_DEF_RE = re.compile(r"\*\s*\*\*([a-z\./]+)\.?\*\*\s*\*\*(.*?)\*\*", re.IGNORECASE)
+# 单行预览的最大长度，超出部分以省略号代替
+_PREVIEW_MAX_LENGTH = 70
+
+
+def _trim(text: str, max_length: int = _PREVIEW_MAX_LENGTH) -> str:
+    """将预览截断到 max_length 个字符，超出时追加省略号"""
+    return text if len(text) <= max_length else f"{text[:max_length]}..."
+
+
+def get_preview_from_analysis(analysis: str) -> str:
+    """
+    【V3.8 智能感知版】从完整的Markdown分析中智能提取预览。
+    能够区分单词和词缀，并为它们生成合适的预览。
+    """
+    try:
+        # 方案1: 尝试匹配词缀格式 (通过关键词: Präfix, Suffix 等)
+        # 格式示例: * **Präfix/Vorsilbe** **核心含义...**
+        # 大多数条目不是词缀：先用 C 层的子串查找排除，再运行正则（正则忽略大小写，故先转小写）
+        lowered = analysis.lower()
+        affix_match = (
+            _AFFIX_RE.search(analysis)
+            if any(keyword in lowered for keyword in _AFFIX_KEYWORDS)
+            else None
+        )
+        if affix_match:
+            # 提取类型和核心含义
+            affix_type = affix_match.group(1).strip()
+            affix_meaning = affix_match.group(2).strip().partition("\n")[0]
+            # 返回一个简洁、专门为词缀设计的预览
+            preview = f"{affix_type}: {affix_meaning}"
+            return _trim(preview)
+
+        # 方案2: 如果不是词缀，则回退到单词格式匹配
+        # 在 "核心释义" 区域内查找
+        bedeutung_match = (
+            _BEDEUTUNG_RE.search(analysis) if _BEDEUTUNG_MARKER in analysis else None
+        )
+        search_area = bedeutung_match.group(1) if bedeutung_match else analysis
+        
+        # 匹配 `* **词性.** **释义**` 格式
+        matches = _POS_DEF_RE.findall(search_area)
+        
+        if matches:
+            preview_parts = []
+            for pos, definition in matches:
+                clean_pos = pos.strip().rstrip('.') + "."
+                clean_def = definition.strip().partition("\n")[0]
+                preview_parts.append(f"{clean_pos} {clean_def}")
+            return "; ".join(preview_parts)
+
+    except Exception as e:
+        print(f"--- {ErrorMessages.PREVIEW_EXTRACTION_ERROR.format(error=e)} ---")
+        pass
+
+    # 方案3: 通用备用方案，适用于任何未知格式
+    # 移除Markdown标题和星号，取第一行有效内容；逐行向后查找，不切分整篇文本
+    start = 0
+    while start <= len(analysis):
+        end = analysis.find('\n', start)
+        if end == -1:
+            end = len(analysis)
+        clean_line = analysis[start:end].strip(_FALLBACK_STRIP_CHARS)
+        if clean_line:
+            return _trim(clean_line)
+        start = end + 1
+    
+    # 如果完全为空，返回一个默认值
+    return "无法生成预览"
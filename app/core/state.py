@@ -1,40 +1,66 @@
-from collections import deque
-from typing import Deque, List, Dict, Any
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import date, datetime, timezone, timedelta
 
 # --- 原有代码 ---
-_recent_searches: Deque[str] = deque(maxlen=10)
+# 最近搜索按“最新在前”排列；用 OrderedDict 的键保存，移到队首与淘汰队尾都是 O(1)
+_recent_searches: "OrderedDict[str, None]" = OrderedDict()
 
-def get_recent_searches() -> Deque[str]:
-    """FastAPI dependency to get the recent searches deque."""
+def get_recent_searches() -> "OrderedDict[str, None]":
+    """FastAPI dependency to get the recent searches ordered dict."""
     return _recent_searches
 
 # --- 新增代码 ---
+@dataclass(slots=True)
+class DailyLearningSession:
+    """每日学习队列及其状态（属性访问代替字符串键查找，slots 省去实例 __dict__）"""
+
+    learning_day: Optional[date] = None
+    queue: List[Dict[str, int]] = field(default_factory=list)
+    word_stats: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    initial_count: int = 0
+    last_shown_entry_id: Optional[int] = None
+
+    def reset(self) -> None:
+        """重置与队列相关的状态，保留学习日；原地清空列表和字典以复用对象"""
+        self.queue.clear()
+        self.word_stats.clear()
+        self.initial_count = 0
+        self.last_shown_entry_id = None
+
+
 # 用于存储每日学习队列和其状态
-_daily_learning_session: Dict[str, Any] = {
-    "date": None,
-    "queue": [],
-    "initial_count": 0,
-    "last_shown_entry_id": None,  # 新增此行
-}
+_daily_learning_session = DailyLearningSession()
+
+# 学习日相对 UTC 的偏移
+_LEARNING_DAY_OFFSET = timedelta(hours=4)
+# 缓存 (学习日, 下一个学习日开始的时间戳)，在跨过边界之前无需重新计算日期
+_learning_day_cache: Tuple[date, float] = (date.min, 0.0)
 
 def get_learning_day() -> date:
     """获取当前学习日（以UTC+4为基准，即柏林时间上午6点）"""
-    return (datetime.now(timezone.utc) + timedelta(hours=4)).date()
+    global _learning_day_cache
+    now = time.time()
+    learning_day, next_day_starts_at = _learning_day_cache
+    if now < next_day_starts_at:
+        return learning_day
+
+    learning_day = (datetime.fromtimestamp(now, timezone.utc) + _LEARNING_DAY_OFFSET).date()
+    next_day_starts_at = (
+        datetime.combine(learning_day + timedelta(days=1), datetime.min.time(), timezone.utc)
+        - _LEARNING_DAY_OFFSET
+    ).timestamp()
+    _learning_day_cache = (learning_day, next_day_starts_at)
+    return learning_day
 
-def get_daily_learning_session() -> Dict[str, Any]:
+def get_daily_learning_session() -> DailyLearningSession:
     """FastAPI dependency to get the daily learning session queue."""
     today = get_learning_day()
-    
-    # 【核心修复】使用 .get() 方法安全地访问 'date' 键
-    # 无论 _daily_learning_session 是否为空或缺少 'date' 键，都不会报错
-    if _daily_learning_session.get("date") != today:
-        _daily_learning_session.clear()
-        _daily_learning_session["date"] = today
-        # 初始化或重置会话的其他状态
-        _daily_learning_session["queue"] = []
-        _daily_learning_session["word_stats"] = {}
-        _daily_learning_session["initial_count"] = 0
-        _daily_learning_session["last_shown_entry_id"] = None
+
+    if _daily_learning_session.learning_day != today:
+        _daily_learning_session.learning_day = today
+        _daily_learning_session.reset()
 
     return _daily_learning_session
@@ -3,91 +3,120 @@
 为提升查询性能而创建的索引定义
 """
 
-from sqlalchemy import Index
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from sqlalchemy import DDL, Index, event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
 
 from app.db import models
 
 # 定义性能优化索引
+# 复合索引 (a, b) 的最左前缀同样能服务只按 a 过滤的查询，
+# 因此已有以 a 开头的复合索引时不再单独建 a 的单列索引，减少写放大和规划器的候选索引
 PERFORMANCE_INDEXES = [
     # 知识条目表的索引
-    Index("idx_knowledge_entries_query_text", models.KnowledgeEntry.query_text),
+    # query_text 的唯一索引定义在模型上并带 INCLUDE (id, entry_type, timestamp)，这里不再为该列另建索引；
+    # preview 不放入 INCLUDE：它是不限长度的 Text（词性释义预览可达数千字符），
+    # 会撑大索引，且可能超过 B-tree 索引行约 2.7 KB 的上限导致写入失败
     Index("idx_knowledge_entries_entry_type", models.KnowledgeEntry.entry_type),
-    Index("idx_knowledge_entries_timestamp", models.KnowledgeEntry.timestamp),
+    # 建议查询按 lower(query_text) LIKE 'xxx%' 做不区分大小写的前缀匹配，索引表达式必须与查询一致；
+    # text_pattern_ops 让 PostgreSQL 在非 C 排序规则下也能用 B-tree 处理 LIKE 前缀
     Index(
-        "idx_knowledge_entries_query_type",
-        models.KnowledgeEntry.query_text,
-        models.KnowledgeEntry.entry_type,
+        "idx_knowledge_entries_lower_query",
+        func.lower(models.KnowledgeEntry.query_text).label("lower_query_text"),
+        postgresql_ops={"lower_query_text": "text_pattern_ops"},
     ),
-    # 别名表的索引
-    Index("idx_entry_aliases_alias_text", models.EntryAlias.alias_text),
+    # 别名表的索引（按 alias_text 的查询由复合索引的前缀承担）
     Index("idx_entry_aliases_entry_id", models.EntryAlias.entry_id),
     Index(
         "idx_entry_aliases_alias_entry",
         models.EntryAlias.alias_text,
         models.EntryAlias.entry_id,
     ),
-    # 追问表的索引
-    Index("idx_follow_ups_entry_id", models.FollowUp.entry_id),
+    Index(
+        "idx_entry_aliases_lower_alias",
+        func.lower(models.EntryAlias.alias_text).label("lower_alias_text"),
+        postgresql_ops={"lower_alias_text": "text_pattern_ops"},
+    ),
+    # 追问表的索引（按 entry_id 的查询由复合索引的前缀承担）
     Index("idx_follow_ups_timestamp", models.FollowUp.timestamp),
     Index("idx_follow_ups_entry_time", models.FollowUp.entry_id, models.FollowUp.timestamp),
 ]
 
+# 仅 PostgreSQL 创建的索引（依赖 pg_trgm 扩展）
+# 词缀建议按 query_text ILIKE '%keit' 做后缀匹配，B-tree 无法使用，只能全表扫描；
+# 三元组 GIN 索引可直接服务任意位置通配的 LIKE/ILIKE，以及 % / <-> 相似度查询
+POSTGRESQL_INDEXES = [
+    Index(
+        "idx_knowledge_entries_trgm",
+        models.KnowledgeEntry.query_text,
+        postgresql_using="gin",
+        postgresql_ops={"query_text": "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql"),
+]
 
-def create_performance_indexes():
-    """创建所有性能优化索引"""
-    print("--- 开始创建性能优化索引 ---")
+# 索引绑定在表上，metadata.create_all 建表时会一并创建，因此建表前先启用扩展
+# （pg_trgm 自 PostgreSQL 13 起为受信任扩展，数据库所有者即可创建）
+_CREATE_PG_TRGM = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+event.listen(
+    models.KnowledgeEntry.__table__,
+    "before_create",
+    _CREATE_PG_TRGM.execute_if(dialect="postgresql"),
+)
 
-    for index in PERFORMANCE_INDEXES:
-        try:
-            index.create(bind=models.Base.metadata.bind)
-            print(f"--- 创建索引: {index.name} ---")
-        except Exception as e:
-            print(f"--- 索引 {index.name} 可能已存在或创建失败: {e} ---")
 
-    print("--- 性能优化索引创建完成 ---")
+def create_performance_indexes(bind: Engine) -> None:
+    """
+    创建缺失的性能优化索引
 
+    索引定义时已通过列绑定到各自的表。metadata.create_all 只会随新建的表一起建索引，
+    已存在的表需要逐个补建；这里在同一个事务中用 CREATE INDEX IF NOT EXISTS 只创建缺失的索引，可重复执行。
+    （checkfirst 依赖反射，SQLite 反射时会跳过 lower() 这类表达式索引，无法判断其是否存在）
+    """
+    print("--- 开始创建性能优化索引 ---")
 
-def drop_performance_indexes():
-    """删除所有性能优化索引（用于测试或重建）"""
-    print("--- 开始删除性能优化索引 ---")
+    with bind.begin() as connection:
+        for index in PERFORMANCE_INDEXES:
+            connection.execute(CreateIndex(index, if_not_exists=True))
 
-    for index in PERFORMANCE_INDEXES:
-        try:
-            index.drop(bind=models.Base.metadata.bind)
-            print(f"--- 删除索引: {index.name} ---")
-        except Exception as e:
-            print(f"--- 索引 {index.name} 删除失败: {e} ---")
+        if connection.dialect.name == "postgresql":
+            connection.execute(_CREATE_PG_TRGM)
+            for index in POSTGRESQL_INDEXES:
+                connection.execute(CreateIndex(index, if_not_exists=True))
 
-    print("--- 性能优化索引删除完成 ---")
+    print("--- 性能优化索引创建完成 ---")
 
 
-def analyze_query_performance():
-    """分析查询性能建议"""
-    performance_tips = {
+# 查询性能建议是固定内容：模块加载时构建一次，以只读映射共享，不再每次调用重新分配
+_PERFORMANCE_TIPS = MappingProxyType(
+    {
         "knowledge_entries": {
             "frequent_queries": [
                 "按query_text精确查询",
                 "按entry_type筛选",
-                "按timestamp排序",
-                "复合查询(query_text + entry_type)",
+                "按lower(query_text)前缀匹配（建议查询）",
+                "按query_text后缀匹配（词缀建议，PostgreSQL 三元组索引）",
+                "按query_text查询并读取id/entry_type/timestamp（覆盖索引）",
             ],
             "indexes": [
-                "idx_knowledge_entries_query_text",
+                "ix_knowledge_entries_query_text",
                 "idx_knowledge_entries_entry_type",
-                "idx_knowledge_entries_timestamp",
-                "idx_knowledge_entries_query_type",
+                "idx_knowledge_entries_lower_query",
+                "idx_knowledge_entries_trgm",
             ],
         },
         "entry_aliases": {
             "frequent_queries": [
-                "按alias_text模糊查询",
+                "按lower(alias_text)前缀匹配（建议查询）",
                 "按entry_id关联查询",
                 "复合查询(alias_text + entry_id)",
             ],
             "indexes": [
-                "idx_entry_aliases_alias_text",
                 "idx_entry_aliases_entry_id",
                 "idx_entry_aliases_alias_entry",
+                "idx_entry_aliases_lower_alias",
             ],
         },
         "follow_ups": {
@@ -97,14 +126,17 @@ def analyze_query_performance():
                 "复合查询(entry_id + timestamp)",
             ],
             "indexes": [
-                "idx_follow_ups_entry_id",
                 "idx_follow_ups_timestamp",
                 "idx_follow_ups_entry_time",
             ],
         },
     }
+)
+
 
-    return performance_tips
+def analyze_query_performance() -> Mapping[str, Any]:
+    """分析查询性能建议"""
+    return _PERFORMANCE_TIPS
 
 
 # 数据库查询优化建议
@@ -0,0 +1,76 @@
+"""
+物化视图模块
+为读多写少的统计查询提供预聚合结果（仅 PostgreSQL 支持，其他数据库回退到实时聚合）
+"""
+
+from typing import List, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# 掌握等级分布：learning_progress 按 mastery_level 预聚合
+MASTERY_DISTRIBUTION_VIEW = "lp_mastery_dist"
+
+CREATE_MASTERY_DISTRIBUTION_VIEW = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {MASTERY_DISTRIBUTION_VIEW} AS
+SELECT mastery_level, COUNT(*) AS count
+FROM learning_progress
+GROUP BY mastery_level
+"""
+
+# 唯一索引是 REFRESH ... CONCURRENTLY 的前提，刷新期间不阻塞读
+CREATE_MASTERY_DISTRIBUTION_INDEX = f"""
+CREATE UNIQUE INDEX IF NOT EXISTS ix_{MASTERY_DISTRIBUTION_VIEW}_mastery_level
+ON {MASTERY_DISTRIBUTION_VIEW} (mastery_level)
+"""
+
+
+def supports_materialized_views(bind) -> bool:
+    """当前连接的数据库是否支持物化视图"""
+    return bind.dialect.name == "postgresql"
+
+
+def create_materialized_views(engine: Engine):
+    """创建物化视图（如果不存在）"""
+    if not supports_materialized_views(engine):
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_MASTERY_DISTRIBUTION_VIEW))
+        conn.execute(text(CREATE_MASTERY_DISTRIBUTION_INDEX))
+    print(f"--- 物化视图 {MASTERY_DISTRIBUTION_VIEW} 已就绪 ---")
+
+
+def refresh_materialized_views(engine: Engine):
+    """并发刷新物化视图，刷新期间读请求仍可使用旧数据"""
+    if not supports_materialized_views(engine):
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {MASTERY_DISTRIBUTION_VIEW}"))
+
+
+def get_mastery_distribution(db: Session) -> List[Tuple[int, int]]:
+    """
+    获取掌握等级分布 [(mastery_level, count), ...]
+    PostgreSQL 读取物化视图；其他数据库实时执行 GROUP BY
+    """
+    if supports_materialized_views(db.get_bind()):
+        return db.execute(
+            text(
+                f"SELECT mastery_level, count FROM {MASTERY_DISTRIBUTION_VIEW} "
+                "ORDER BY mastery_level"
+            )
+        ).all()
+
+    return (
+        db.query(
+            models.LearningProgress.mastery_level,
+            func.count(models.LearningProgress.id).label("count"),
+        )
+        .group_by(models.LearningProgress.mastery_level)
+        .all()
+    )
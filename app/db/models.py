@@ -4,34 +4,94 @@ from sqlalchemy import (
     Column,
     Date,
     DateTime,
-    Float,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     Text,
+    func,
+    select,
 )
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, relationship, selectinload, validates
+from sqlalchemy.types import TypeDecorator
 
-# 导入序列化工具
-from .serializers import (
-    serialize_entry_alias,
-    serialize_follow_up,
-    serialize_knowledge_entry,
-)
+from app.core.preview import get_preview_from_analysis
+
+# 只导入生成序列化函数的工具；to_dict 直接调用类上缓存的函数，不再依赖 serialize_* 包装
+from .serializers import build_serializer
 
 Base = declarative_base()
 
 
+class ScaledSmallInteger(TypeDecorator):
+    """
+    以 SMALLINT 存储定点小数：写入时乘以 scale 后取整，读取时再除回浮点数
+
+    Python 侧和 SQL 表达式中的参数仍按原始浮点值使用；
+    AVG 等聚合的结果类型不是该列类型，需要显式传入 type_=列.type 才会换算回来。
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, scale: int = 100):
+        super().__init__()
+        self.scale = scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return round(value * self.scale)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return float(value) / self.scale
+
+
 class KnowledgeEntry(Base):
     __tablename__ = "knowledge_entries"
+    __table_args__ = (
+        # query_text 唯一索引同时作为覆盖索引：INCLUDE 的列让 PostgreSQL 可用 Index Only Scan 直接返回，
+        # 不再另建一个以 query_text 为键的 B-tree，每次写入只维护一个该列上的索引
+        Index(
+            "ix_knowledge_entries_query_text",
+            "query_text",
+            unique=True,
+            postgresql_include=["id", "entry_type", "timestamp"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    query_text = Column(String, index=True, nullable=False, unique=True)
+    query_text = Column(String, nullable=False)
     entry_type = Column(String(50), nullable=False, default="WORD")
     analysis_markdown = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    # 写入时由 analysis_markdown 计算的预览，列表类接口只需读取这一列
+    preview = Column(Text, nullable=True)
+    # 由数据库在插入时填充，INSERT 不再为每行绑定客户端生成的时间
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     follow_ups = relationship("FollowUp", back_populates="entry", cascade="all, delete-orphan")
+    aliases = relationship("EntryAlias", back_populates="entry", cascade="all, delete-orphan")
+
+    @classmethod
+    def with_children_stmt(cls):
+        """
+        返回预加载追问和别名的条目查询语句
+
+        子对象用 selectinload 按批加载：无论返回多少条目，每个关系只多一次查询，
+        避免序列化时逐条触发延迟加载（N+1）。
+        """
+        return select(cls).options(selectinload(cls.follow_ups), selectinload(cls.aliases))
+
+    @validates("analysis_markdown")
+    def _sync_preview(self, key, analysis_markdown):
+        """每次设置分析内容时同步更新预览列"""
+        self.preview = (
+            get_preview_from_analysis(analysis_markdown) if analysis_markdown is not None else None
+        )
+        return analysis_markdown
 
     def to_dict(self):
         """将SQLAlchemy对象转换为可序列化的字典。
@@ -39,10 +99,13 @@ class KnowledgeEntry(Base):
         注意：此方法已弃用，请使用 serialize_knowledge_entry(self) 替代。
         为了向后兼容性而保留，将在未来版本中移除。
         """
-        return serialize_knowledge_entry(self)
+        return self.__serialize__(self)
 
     def serialize(self, include_fields=None, exclude_fields=None):
         """使用新的序列化系统进行序列化。"""
+        if not include_fields and not exclude_fields:
+            return self.__serialize__(self)
+
         from .serializers import serialize_model
 
         return serialize_model(
@@ -68,7 +131,8 @@ class EntryAlias(Base):
     alias_text = Column(String, index=True, nullable=False, unique=True)
     entry_id = Column(Integer, ForeignKey("knowledge_entries.id"), nullable=False)
 
-    entry = relationship("KnowledgeEntry")
+    # 序列化和日志从不需要父条目；误访问时直接报错，而不是悄悄多发一次查询
+    entry = relationship("KnowledgeEntry", back_populates="aliases", lazy="raise")
 
     def to_dict(self):
         """将SQLAlchemy对象转换为可序列化的字典。
@@ -76,7 +140,7 @@ class EntryAlias(Base):
         注意：此方法已弃用，请使用 serialize_entry_alias(self) 替代。
         为了向后兼容性而保留，将在未来版本中移除。
         """
-        return serialize_entry_alias(self)
+        return self.__serialize__(self)
 
     def serialize(self, include_fields=None, exclude_fields=None):
         """使用新的序列化系统进行序列化。"""
@@ -85,7 +149,7 @@ class EntryAlias(Base):
         return serialize_model(self, include_fields=include_fields, exclude_fields=exclude_fields)
 
     def __repr__(self):
-        return f"<EntryAlias(alias='{self.alias_text}', entry='{self.entry.query_text}')>"
+        return f"<EntryAlias(alias='{self.alias_text}', entry_id={self.entry_id})>"
 
 
 class FollowUp(Base):
@@ -95,9 +159,9 @@ class FollowUp(Base):
     entry_id = Column(Integer, ForeignKey("knowledge_entries.id"), nullable=False)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
-    entry = relationship("KnowledgeEntry", back_populates="follow_ups")
+    entry = relationship("KnowledgeEntry", back_populates="follow_ups", lazy="raise")
 
     def to_dict(self):
         """将SQLAlchemy对象转换为可序列化的字典。
@@ -105,7 +169,7 @@ class FollowUp(Base):
         注意：此方法已弃用，请使用 serialize_follow_up(self) 替代。
         为了向后兼容性而保留，将在未来版本中移除。
         """
-        return serialize_follow_up(self)
+        return self.__serialize__(self)
 
     def serialize(self, include_fields=None, exclude_fields=None):
         """使用新的序列化系统进行序列化。"""
@@ -114,23 +178,39 @@ class FollowUp(Base):
         return serialize_model(self, include_fields=include_fields, exclude_fields=exclude_fields)
 
     def __repr__(self):
-        return f"<FollowUp(question='{self.question[:20]}...', entry='{self.entry.query_text}')>"
+        return f"<FollowUp(question='{self.question[:20]}...', entry_id={self.entry_id})>"
 
 
 class LearningProgress(Base):
     __tablename__ = 'learning_progress'
     id = Column(Integer, primary_key=True, index=True)
-    entry_id = Column(Integer, ForeignKey('knowledge_entries.id'), nullable=False, index=True)
+    entry_id = Column(Integer, ForeignKey('knowledge_entries.id'), nullable=False, index=True, unique=True)
     
     # 间隔重复算法核心字段
     mastery_level = Column(Integer, default=0, nullable=False)
     review_count = Column(Integer, default=0, nullable=False)
     next_review_at = Column(Date, nullable=False, default=datetime.date.today, index=True)
     last_reviewed_at = Column(Date, nullable=True)
-    ease_factor = Column(Float, default=2.5, nullable=False)
+    # SM-2 难度系数只需两位小数（1.3 ~ 3.0 左右），按 ×100 存为 2 字节的 SMALLINT
+    ease_factor = Column(ScaledSmallInteger(100), default=2.5, nullable=False)
     interval = Column(Integer, default=0, nullable=False) # 单位：天
 
     entry = relationship("KnowledgeEntry")
 
     def __repr__(self):
         return f"<LearningProgress(entry_id={self.entry_id}, next_review='{self.next_review_at.date()}')>"
+
+
+# 每个模型的序列化函数在类定义完成后生成一次并缓存在类上
+FollowUp.__serialize__ = staticmethod(build_serializer(FollowUp))
+EntryAlias.__serialize__ = staticmethod(build_serializer(EntryAlias))
+KnowledgeEntry.__serialize__ = staticmethod(
+    build_serializer(
+        KnowledgeEntry,
+        nested={
+            "follow_ups": build_serializer(
+                FollowUp, fields={"id", "question", "answer", "timestamp"}
+            )
+        },
+    )
+)
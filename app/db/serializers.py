@@ -5,14 +5,80 @@
 使用更高效的序列化方案，支持嵌套对象和日期时间处理。
 """
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Type
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Type
 
-try:
-    from sqlalchemy.orm import InstanceProxy
-except ImportError:
-    # 如果InstanceProxy不存在，使用占位符
-    InstanceProxy = type("InstanceProxy", (), {})
+import orjson
+from sqlalchemy import DateTime
+
+Serializer = Callable[[Any], Dict[str, Any]]
+
+
+def build_serializer(
+    model_class: Type[Any],
+    fields: Optional[Set[str]] = None,
+    nested: Optional[Dict[str, Serializer]] = None,
+) -> Serializer:
+    """
+    为模型类生成专用的序列化函数
+
+    只在生成时内省一次 __table__.columns：字段列表、哪些列是 DateTime、
+    嵌套关系使用哪个序列化函数都固定在闭包中，序列化每一行时不再做集合运算和类型判断。
+
+    Args:
+        model_class: SQLAlchemy模型类
+        fields: 要包含的字段集合，如果为None则包含所有列
+        nested: 一对多关系名到子对象序列化函数的映射
+
+    Returns:
+        接收模型实例、返回字典的序列化函数
+    """
+    columns = model_class.__table__.columns
+    names = tuple(
+        column.key for column in columns if fields is None or column.key in fields
+    )
+    datetime_names = tuple(
+        column.key
+        for column in columns
+        if column.key in names and isinstance(column.type, DateTime)
+    )
+    nested_items = tuple((nested or {}).items())
+
+    if len(names) > 1:
+        get_values = attrgetter(*names)
+    elif names:
+        single_getter = attrgetter(names[0])
+
+        def get_values(instance):
+            return (single_getter(instance),)
+
+    else:
+
+        def get_values(instance):
+            return ()
+
+    def serialize(instance: Any) -> Dict[str, Any]:
+        result = dict(zip(names, get_values(instance)))
+        for name in datetime_names:
+            value = result[name]
+            if value is not None:
+                result[name] = value.isoformat()
+        for relation_name, child_serializer in nested_items:
+            result[relation_name] = [
+                child_serializer(item) for item in getattr(instance, relation_name)
+            ]
+        return result
+
+    return serialize
+
+
+@lru_cache(maxsize=None)
+def _get_column_serializer(
+    model_class: Type[Any], fields: Optional[FrozenSet[str]]
+) -> Serializer:
+    """按 (模型类, 字段集合) 缓存生成的序列化函数"""
+    return build_serializer(model_class, fields)
 
 
 def serialize_model(
@@ -36,40 +102,18 @@ def serialize_model(
     if model_instance is None:
         return {}
 
-    result = {}
+    # 确定要处理的字段；未指定时使用覆盖全部列的缓存序列化函数
+    fields = None
+    if include_fields or exclude_fields:
+        columns = model_instance.__table__.columns.keys()
+        fields_to_process = (
+            set(include_fields).intersection(columns) if include_fields else set(columns)
+        )
+        if exclude_fields:
+            fields_to_process -= exclude_fields
+        fields = frozenset(fields_to_process)
 
-    # 获取模型的所有列
-    columns = model_instance.__table__.columns.keys()
-
-    # 确定要处理的字段
-    if include_fields:
-        fields_to_process = include_fields.intersection(columns)
-    else:
-        fields_to_process = set(columns)
-
-    if exclude_fields:
-        fields_to_process = fields_to_process - exclude_fields
-
-    # 处理每个字段
-    for field_name in fields_to_process:
-        value = getattr(model_instance, field_name, None)
-
-        # 处理不同类型的值
-        if isinstance(value, datetime):
-            result[field_name] = value.isoformat() if value else None
-        elif isinstance(value, InstanceProxy):
-            # 处理延迟加载的属性
-            try:
-                loaded_value = value
-                if isinstance(loaded_value, datetime):
-                    result[field_name] = loaded_value.isoformat() if loaded_value else None
-                else:
-                    result[field_name] = loaded_value
-            except Exception:
-                # 如果无法加载，设为None
-                result[field_name] = None
-        else:
-            result[field_name] = value
+    result = _get_column_serializer(type(model_instance), fields)(model_instance)
 
     # 处理嵌套关系
     if nested_relations:
@@ -122,15 +166,7 @@ def serialize_knowledge_entry(entry: Any) -> Dict[str, Any]:
     Returns:
         序列化后的字典
     """
-    return serialize_model(
-        entry,
-        nested_relations={
-            "follow_ups": {
-                "many": True,
-                "include_fields": {"id", "question", "answer", "timestamp"},
-            }
-        },
-    )
+    return entry.__serialize__(entry)
 
 
 def serialize_entry_alias(alias: Any) -> Dict[str, Any]:
@@ -143,7 +179,7 @@ def serialize_entry_alias(alias: Any) -> Dict[str, Any]:
     Returns:
         序列化后的字典
     """
-    return serialize_model(alias)
+    return alias.__serialize__(alias)
 
 
 def serialize_follow_up(follow_up: Any) -> Dict[str, Any]:
@@ -156,7 +192,7 @@ def serialize_follow_up(follow_up: Any) -> Dict[str, Any]:
     Returns:
         序列化后的字典
     """
-    return serialize_model(follow_up)
+    return follow_up.__serialize__(follow_up)
 
 
 def serialize_list(items: List[Any], serializer_func: callable) -> List[Dict[str, Any]]:
@@ -173,6 +209,71 @@ def serialize_list(items: List[Any], serializer_func: callable) -> List[Dict[str
     return [serializer_func(item) for item in items]
 
 
+def export_knowledge_entries_json(db: Any) -> bytes:
+    """
+    将全部知识条目（含追问）导出为 JSON 数组的字节串
+
+    PostgreSQL 上用 json_agg(json_build_object(...)) 在数据库端一次性拼好 JSON，
+    不在 Python 中构建任何行对象；其他数据库回退到预生成的序列化函数 + orjson。
+
+    Args:
+        db: SQLAlchemy数据库会话
+
+    Returns:
+        JSON 数组的 UTF-8 字节串，条目和追问均按 id 排序
+    """
+    from sqlalchemy import Text, cast, func, literal_column, select
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+    from sqlalchemy.orm import selectinload
+
+    from .models import FollowUp, KnowledgeEntry
+
+    if db.get_bind().dialect.name != "postgresql":
+        entries = db.scalars(
+            select(KnowledgeEntry)
+            .options(selectinload(KnowledgeEntry.follow_ups))
+            .order_by(KnowledgeEntry.id)
+        )
+        return orjson.dumps([serialize_knowledge_entry(entry) for entry in entries])
+
+    empty_array = literal_column("'[]'::json")
+
+    def json_object(columns):
+        args = []
+        for column in columns:
+            args.extend((column.key, column))
+        return args
+
+    follow_up_columns = [FollowUp.id, FollowUp.question, FollowUp.answer, FollowUp.timestamp]
+    follow_ups = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(*json_object(follow_up_columns)), FollowUp.id
+                    )
+                ),
+                empty_array,
+            )
+        )
+        .where(FollowUp.entry_id == KnowledgeEntry.id)
+        .scalar_subquery()
+    )
+    entry_object = func.json_build_object(
+        *json_object(KnowledgeEntry.__table__.columns), "follow_ups", follow_ups
+    )
+    stmt = select(
+        cast(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(entry_object, KnowledgeEntry.id)), empty_array
+            ),
+            Text,
+        )
+    )
+    # 以文本取回，避免驱动把 JSON 解码成 Python 对象后再编码一次
+    return db.execute(stmt).scalar_one().encode("utf-8")
+
+
 class ModelSerializer:
     """
     模型序列化器类，提供更高级的序列化功能
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
@@ -15,7 +17,22 @@ if not DATABASE_URL:
 
 # 【修改】移除只针对 SQLite 的 connect_args
 # create_engine 函数会自动为 PostgreSQL 选择正确的配置
-engine = create_engine(DATABASE_URL)
+# pool_pre_ping: 从连接池取出连接时先探活，失效连接由连接池自行替换
+# query_cache_size: 编译后 SQL 的缓存容量，热点端点的语句只编译一次
+engine_options = {
+    "pool_pre_ping": True,
+    "echo": settings.database.echo,
+    "query_cache_size": settings.database.query_cache_size,
+}
+if not DATABASE_URL.startswith("sqlite"):
+    # 同步端点在线程池中并发执行，连接池需与之匹配；pool_recycle 避免使用被服务端断开的空闲连接。
+    # SQLite 使用自己的连接池实现，不接受这些参数
+    engine_options.update(
+        pool_size=settings.database.pool_size,
+        max_overflow=settings.database.max_overflow,
+        pool_recycle=settings.database.pool_recycle,
+    )
+engine = create_engine(DATABASE_URL, **engine_options)
 
 # 创建一个配置好的 "Session" 类
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
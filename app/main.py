@@ -1,17 +1,31 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm import configure_mappers
 
 from app.api.v1.endpoints import router as api_router_v1
 from app.core.config import settings
 from app.core.exceptions import setup_exception_handlers
 from app.core.llm_service import llm_router_instance
+from app.db.indexes import create_performance_indexes
+from app.db.materialized_views import create_materialized_views, refresh_materialized_views
 from app.db.models import Base
 from app.db.session import engine
 
 
+async def refresh_materialized_views_periodically(interval: int):
+    """定时刷新统计物化视图（在线程中执行，避免阻塞事件循环）"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_materialized_views, engine)
+        except Exception as e:
+            print(f"!!! 物化视图刷新失败: {e}")
+
+
 # 使用 lifespan 管理器来处理应用启动和关闭时的逻辑
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -24,19 +38,29 @@ async def lifespan(app: FastAPI):
     # 初始化 LLMRouter 单例
     llm_router_instance.initialize()
 
+    # 启动时一次性完成映射器配置，避免首个请求承担关系解析的开销
+    configure_mappers()
+
     print("--- 正在初始化数据库... ---")
     try:
         Base.metadata.create_all(bind=engine)
         print("--- 数据库表创建成功 (如果不存在)。 ---")
+        create_performance_indexes(engine)
+        create_materialized_views(engine)
     except Exception as e:
         print(f"!!! 数据库初始化失败: {e}")
 
+    refresh_task = asyncio.create_task(
+        refresh_materialized_views_periodically(settings.api.stats_refresh_interval)
+    )
+
     print("--- De-AI-Hilfer 服务加载完成 ---")
 
     yield  # 应用在这里开始运行
 
     # --- 在应用关闭时执行的代码 ---
     print("--- De-AI-Hilfer 正在关闭... ---")
+    refresh_task.cancel()
 
 
 # 创建 FastAPI 应用实例
@@ -47,12 +71,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# 使用配置中的CORS设置
-origins = settings.api.cors_origins
+# 使用配置中的CORS设置；带通配符的源合并为一个正则，由中间件在启动时编译一次
+origins = settings.api.cors_allowed_origins
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
+    allow_origin_regex=settings.api.cors_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],  # 允许所有HTTP方法
     allow_headers=["*"],  # 允许所有HTTP请求头
@@ -3,7 +3,8 @@ from typing import List, Literal, Union, Optional
 import datetime
 from datetime import date
 
-from pydantic import BaseModel, ConfigDict, Field
+import msgspec
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 # 新增：定义条目类型的枚举
@@ -134,6 +135,10 @@ class FollowUpItem(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# 追问列表的批量校验器：整批 ORM 对象交给 pydantic-core 一次完成校验，模块级构建一次
+FOLLOW_UP_LIST_ADAPTER = TypeAdapter(List[FollowUpItem])
+
+
 class FollowUpCreateRequest(BaseModel):
     """创建追问请求模型。
 
@@ -215,3 +220,15 @@ class LearningProgressResponse(BaseModel):
     ease_factor: float
     interval: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class LearningProgressItem(msgspec.Struct):
+    """/progress 端点的单条学习进度记录（msgspec 定长结构，直接编码为 JSON 字节）"""
+    id: int
+    entry_id: int
+    mastery_level: int
+    review_count: int
+    next_review_at: date
+    last_reviewed_at: Optional[date]
+    ease_factor: float
+    interval: int
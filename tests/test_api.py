@@ -22,6 +22,69 @@ class TestHealthEndpoint:
         assert "db_status" in data
 
 
+class TestCorsConfig:
+    """CORS 配置测试"""
+
+    def test_wildcard_origins_become_regex(self):
+        """测试通配符源被合并为正则，精确源保持原样"""
+        import re
+        from app.core.config import APIConfig
+
+        config = APIConfig(cors_origins=["http://localhost", "https://*.vercel.app"])
+
+        assert config.cors_allowed_origins == ["http://localhost"]
+        pattern = re.compile(config.cors_origin_regex)
+        assert pattern.fullmatch("https://preview-1.vercel.app")
+        assert not pattern.fullmatch("https://evil.com/x.vercel.app")
+        assert APIConfig(cors_origins=["http://localhost"]).cors_origin_regex is None
+
+
+class TestExceptionHandlers:
+    """异常处理器测试"""
+
+    @pytest.mark.asyncio
+    async def test_client_errors_log_without_traceback(self, caplog):
+        """测试 4xx 应用异常不记录堆栈，5xx 才记录"""
+        import logging
+        from app.core.exceptions import DatabaseException, NotFoundException, app_exception_handler
+
+        with caplog.at_level(logging.WARNING, logger="app.core.exceptions"):
+            response = await app_exception_handler(None, NotFoundException("条目不存在"))
+            assert response.status_code == 404
+            assert caplog.records[-1].exc_info is None
+
+            try:
+                raise DatabaseException("连接失败")
+            except DatabaseException as exc:
+                response = await app_exception_handler(None, exc)
+            assert response.status_code == 500
+            assert caplog.records[-1].exc_info is not None
+
+
+class TestHTTPErrorBodies:
+    """HTTP 异常错误体测试"""
+
+    def test_not_found_body_is_prebuilt(self, client: TestClient):
+        """测试常见错误体在启动时预热，响应内容与原格式一致"""
+        from app.core.exceptions import _error_body_cache
+
+        assert (404, "Not Found") in _error_body_cache
+        response = client.get("/api/v1/does-not-exist")
+        assert response.status_code == 404
+        assert response.json() == {
+            "error": True,
+            "status_code": 404,
+            "detail": "Not Found",
+            "message": "Not Found",
+        }
+
+    def test_method_not_allowed_keeps_headers(self, client: TestClient):
+        """测试 405 响应保留 Allow 头"""
+        response = client.put("/api/v1/entries/all")
+        assert response.status_code == 405
+        assert "allow" in response.headers
+
+
 class TestKnowledgeEntryEndpoints:
     """知识条目相关端点测试"""
     
@@ -118,6 +181,26 @@ class TestKnowledgeEntryEndpoints:
         assert len(data["suggestions"]) >= 1
         assert "↪️ das Haus" in data["suggestions"][0]["preview"]
 
+    def test_get_suggestions_case_insensitive(self, client: TestClient, sample_knowledge_entry_data, sample_entry_alias_data, db_session: Session):
+        """测试建议查询不区分大小写（条目与别名）"""
+        entry = KnowledgeEntry(**sample_knowledge_entry_data)
+        db_session.add(entry)
+        db_session.commit()
+        db_session.refresh(entry)
+
+        alias_data = sample_entry_alias_data.copy()
+        alias_data["entry_id"] = entry.id
+        db_session.add(EntryAlias(**alias_data))
+        db_session.commit()
+
+        response = client.get("/api/v1/suggestions?q=hA")
+        assert response.status_code == 200
+        assert response.json()["suggestions"][0]["query_text"] == "Haus"
+
+        response = client.get("/api/v1/suggestions?q=DAS")
+        assert response.status_code == 200
+        assert "↪️ das Haus" in response.json()["suggestions"][0]["preview"]
+
 
 class TestAnalysisEndpoints:
     """分析相关端点测试"""
@@ -329,7 +412,22 @@ class TestManagementEndpoints:
 
 class TestDatabaseManagementEndpoints:
     """数据库管理相关端点测试"""
-    
+
+    def test_export_knowledge_json(self, client: TestClient, db_session: Session):
+        """测试以 JSON 导出知识条目及追问"""
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        db_session.add(FollowUp(entry_id=entry.id, question="复数？", answer="Häuser"))
+        db_session.commit()
+
+        response = client.get("/api/v1/database/export/json")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert [item["query_text"] for item in data] == ["Haus"]
+        assert [fu["answer"] for fu in data[0]["follow_ups"]] == ["Häuser"]
+
     @patch('app.api.v1.management.export_database_service')
     @pytest.mark.asyncio
     async def test_export_database(self, mock_export, client: TestClient):
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.main import app
 from app.db.session import get_db
 from app.db.models import KnowledgeEntry, LearningProgress
+from app.core.state import DailyLearningSession
 
 client = TestClient(app)
 
@@ -27,6 +28,27 @@ class TestLearningModule:
         assert data["average_ease_factor"] == 0.0
         assert data["mastery_distribution"] == []
     
+    def test_get_learning_progress(self, client: TestClient, db_session: Session):
+        """测试获取学习进度映射"""
+        test_entry = KnowledgeEntry(
+            query_text="helfen",
+            entry_type="WORD",
+            analysis_markdown="### **helfen**"
+        )
+        db_session.add(test_entry)
+        db_session.commit()
+        db_session.add(LearningProgress(entry_id=test_entry.id, ease_factor=2.5))
+        db_session.commit()
+
+        response = client.get("/api/v1/learning/progress")
+        assert response.status_code == 200
+
+        progress = response.json()["progress"][str(test_entry.id)]
+        assert progress["entry_id"] == test_entry.id
+        assert progress["mastery_level"] == 0
+        assert progress["last_reviewed_at"] is None
+        assert progress["ease_factor"] == 2.5
+
     def test_get_learning_session_empty(self, db_session: Session):
         """测试获取空的学习会话"""
         response = client.get("/api/v1/learning/session")
@@ -187,5 +209,242 @@ def test_learning_progress_algorithm(db_session: Session):
     db_session.commit()
 
 
+def test_get_mastery_distribution_fallback(db_session: Session):
+    """测试非 PostgreSQL 数据库回退到实时 GROUP BY 的掌握等级分布"""
+    from app.db.materialized_views import get_mastery_distribution
+
+    entries = [
+        KnowledgeEntry(query_text=f"wort{i}", entry_type="WORD", analysis_markdown=f"# wort{i}")
+        for i in range(3)
+    ]
+    db_session.add_all(entries)
+    db_session.commit()
+    db_session.add_all([
+        LearningProgress(entry_id=entries[0].id, mastery_level=0, ease_factor=2.5),
+        LearningProgress(entry_id=entries[1].id, mastery_level=2, ease_factor=2.5),
+        LearningProgress(entry_id=entries[2].id, mastery_level=2, ease_factor=2.5),
+    ])
+    db_session.commit()
+
+    assert sorted(tuple(row) for row in get_mastery_distribution(db_session)) == [(0, 1), (2, 2)]
+
+
+def test_calculate_weighted_quality():
+    """测试当日评分的加权综合分"""
+    from app.api.v1.learning_service import calculate_weighted_quality
+
+    assert calculate_weighted_quality([]) == 0.0
+    assert calculate_weighted_quality([4]) == 4.0
+    assert calculate_weighted_quality([2, 4]) == 3.0
+    assert calculate_weighted_quality([1, 3, 4, 5]) == 0.5 + 2.0
+
+
+def test_learning_service_has_single_definitions():
+    """测试学习服务模块中每个顶层函数只定义一次"""
+    import ast
+    import importlib
+    import inspect
+    from collections import Counter
+
+    import app.api.v1.learning_service as learning_service
+
+    module = importlib.reload(learning_service)
+    tree = ast.parse(inspect.getsource(module))
+    names = Counter(
+        node.name for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    )
+    assert [name for name, count in names.items() if count > 1] == []
+    # 学习日只在 app.core.state 中定义
+    assert "get_learning_day" not in names
+
+
+def test_get_learning_session_v2(db_session: Session):
+    """测试 V2 每日队列的取词与完成计数"""
+    from app.api.v1.learning_service import get_learning_session_service_v2
+
+    entries = [
+        KnowledgeEntry(query_text=f"wort{i}", entry_type="WORD", analysis_markdown=f"# wort{i}")
+        for i in range(3)
+    ]
+    db_session.add_all(entries)
+    db_session.commit()
+    db_session.add_all([LearningProgress(entry_id=e.id, ease_factor=2.5) for e in entries])
+    db_session.commit()
+
+    daily_session = DailyLearningSession()
+    result = get_learning_session_service_v2(db_session, daily_session)
+    assert result["is_completed"] is False
+    assert result["total_count"] == 3
+    assert result["completed_count"] == 0
+    first_id = result["current_word"]["entry_id"]
+
+    # 上一次展示过的词不会被连续选中
+    daily_session.word_stats[entries[0].id] = {"completed_today": True}
+    result = get_learning_session_service_v2(db_session, daily_session)
+    assert result["completed_count"] == 1
+    assert result["current_word"]["entry_id"] not in (first_id, entries[0].id)
+
+    for e in entries:
+        daily_session.word_stats[e.id] = {"completed_today": True}
+    result = get_learning_session_service_v2(db_session, daily_session)
+    assert result["is_completed"] is True
+    assert result["current_word"] is None
+
+
+def test_get_learning_session_v2_skips_missing_entries(db_session: Session):
+    """测试队列中已删除的条目被迭代跳过并移出队列"""
+    from app.api.v1.learning_service import get_learning_session_service_v2
+
+    entry = KnowledgeEntry(query_text="helfen", entry_type="WORD", analysis_markdown="# helfen")
+    db_session.add(entry)
+    db_session.commit()
+
+    stale_ids = list(range(1000, 1500))
+    daily_session = DailyLearningSession(
+        queue=[{"entry_id": i} for i in stale_ids] + [{"entry_id": entry.id}],
+        initial_count=len(stale_ids) + 1,
+    )
+    result = get_learning_session_service_v2(db_session, daily_session)
+    assert result["current_word"]["entry_id"] == entry.id
+    # 被选中过的失效条目都已移出队列，未被选中的最多剩下焦点池大小减一个
+    assert {"entry_id": entry.id} in daily_session.queue
+    assert len(daily_session.queue) <= 7
+
+
+def test_update_learning_progress_v2(db_session: Session):
+    """测试 V2 复习进度更新（UPDATE ... RETURNING）"""
+    from app.api.v1.learning_service import get_learning_day, update_learning_progress_service_v2
+
+    test_entry = KnowledgeEntry(
+        query_text="helfen",
+        entry_type="WORD",
+        analysis_markdown="### **helfen**"
+    )
+    db_session.add(test_entry)
+    db_session.commit()
+    db_session.add(LearningProgress(entry_id=test_entry.id, ease_factor=2.5))
+    db_session.commit()
+
+    today = get_learning_day()
+    daily_session = DailyLearningSession()
+
+    # 未毕业：只推进复习次数，今天继续复习
+    result = update_learning_progress_service_v2(test_entry.id, 2, db_session, daily_session)
+    assert result["review_count"] == 1
+    assert result["mastery_level"] == 0
+    assert result["next_review_at"] == today
+    assert result["daily_stats"]["completed_today"] is False
+
+    # 连续高分后毕业：进入平滑间隔阶梯
+    update_learning_progress_service_v2(test_entry.id, 5, db_session, daily_session)
+    result = update_learning_progress_service_v2(test_entry.id, 5, db_session, daily_session)
+    assert result["daily_stats"]["completed_today"] is True
+    assert result["review_count"] == 3
+    assert result["mastery_level"] == 1
+    assert result["interval"] == 1
+    assert result["last_reviewed_at"] == today
+
+    progress = db_session.query(LearningProgress).filter_by(entry_id=test_entry.id).one()
+    db_session.refresh(progress)
+    assert progress.review_count == 3
+    assert progress.mastery_level == 1
+
+
+def test_non_graduating_review_does_not_overwrite_srs_state(db_session: Session):
+    """测试未毕业的复习只写复习时间和次数，不会用旧快照覆盖并发写入的毕业结果"""
+    from app.api.v1.learning_service import (
+        compute_learning_progress_v2,
+        persist_learning_progress_v2,
+    )
+
+    test_entry = KnowledgeEntry(
+        query_text="helfen",
+        entry_type="WORD",
+        analysis_markdown="### **helfen**"
+    )
+    db_session.add(test_entry)
+    db_session.commit()
+    db_session.add(LearningProgress(entry_id=test_entry.id, ease_factor=2.5))
+    db_session.commit()
+
+    daily_session = DailyLearningSession()
+    pending = compute_learning_progress_v2(test_entry.id, 2, db_session, daily_session)
+    assert "mastery_level" not in pending
+
+    # 在未毕业的写入提交之前，另一条毕业写入已经提交
+    db_session.query(LearningProgress).filter_by(entry_id=test_entry.id).update(
+        {"mastery_level": 3, "ease_factor": 2.6, "interval": 15}
+    )
+    db_session.commit()
+
+    result = persist_learning_progress_v2(pending, db_session)
+    assert result["mastery_level"] == 3
+    assert result["ease_factor"] == 2.6
+    assert result["interval"] == 15
+    assert result["review_count"] == 1
+
+
+def test_add_words_to_learning_batch(db_session: Session):
+    """测试批量加入学习计划：已有进度复用，缺失的一次性创建"""
+    from app.api.v1.learning_service import add_words_to_learning_service
+
+    entries = [
+        KnowledgeEntry(query_text=f"satz{i}", entry_type="WORD", analysis_markdown=f"# satz{i}")
+        for i in range(3)
+    ]
+    db_session.add_all(entries)
+    db_session.commit()
+    existing = LearningProgress(entry_id=entries[0].id, ease_factor=2.5)
+    db_session.add(existing)
+    db_session.commit()
+
+    ids = [e.id for e in entries]
+    result = add_words_to_learning_service(ids, db_session)
+    assert [p.entry_id for p in result] == ids
+    assert result[0].id == existing.id
+    assert result[1].mastery_level == 0
+    assert result[1].ease_factor == 2.5
+    assert db_session.query(LearningProgress).count() == 3
+
+    # 重复调用不会产生新记录
+    add_words_to_learning_service(ids, db_session)
+    assert db_session.query(LearningProgress).count() == 3
+
+    # 不存在的条目被忽略
+    assert add_words_to_learning_service([99999], db_session) == []
+
+
+def test_add_word_to_learning_service_idempotent(db_session: Session):
+    """测试单个单词重复加入学习计划时返回已有进度"""
+    from app.api.v1.learning_service import add_word_to_learning_service
+
+    entry = KnowledgeEntry(query_text="helfen", entry_type="WORD", analysis_markdown="# helfen")
+    db_session.add(entry)
+    db_session.commit()
+
+    first = add_word_to_learning_service(entry.id, db_session)
+    second = add_word_to_learning_service(entry.id, db_session)
+    assert first.id == second.id
+    assert db_session.query(LearningProgress).count() == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+def test_get_learning_day_cached_until_boundary():
+    """测试学习日在跨过 UTC+4 零点之前复用缓存，跨过之后立即切换"""
+    import datetime as dt
+    from unittest.mock import patch
+
+    import app.core.state as state
+
+    before = dt.datetime(2026, 10, 15, 19, 59, 59, tzinfo=dt.timezone.utc).timestamp()
+    after = dt.datetime(2026, 10, 15, 20, 0, 0, tzinfo=dt.timezone.utc).timestamp()
+    state._learning_day_cache = (dt.date.min, 0.0)
+    with patch.object(state.time, "time", return_value=before):
+        assert state.get_learning_day() == dt.date(2026, 10, 15)
+    with patch.object(state.time, "time", return_value=after):
+        assert state.get_learning_day() == dt.date(2026, 10, 16)
+    state._learning_day_cache = (dt.date.min, 0.0)
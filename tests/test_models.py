@@ -4,9 +4,23 @@
 
 import pytest
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, selectinload
 
-from app.db.models import KnowledgeEntry, EntryAlias, FollowUp
+from app.db.models import KnowledgeEntry, EntryAlias, FollowUp, LearningProgress
+
+
+def _load_entry(db_session: Session, child):
+    """父条目关系为 lazy="raise"，需要在查询时显式加载"""
+    model = type(child)
+    return (
+        db_session.query(model)
+        .options(selectinload(model.entry))
+        .populate_existing()
+        .filter_by(id=child.id)
+        .one()
+        .entry
+    )
 
 
 class TestKnowledgeEntry:
@@ -45,7 +59,25 @@ class TestKnowledgeEntry:
         assert entry_dict["entry_type"] == "WORD"
         assert "id" in entry_dict
         assert "timestamp" in entry_dict
-    
+
+    def test_knowledge_entry_to_dict_with_follow_ups(self, db_session: Session):
+        """测试知识条目转字典时嵌套追问并转换时间字段"""
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        db_session.add(FollowUp(entry_id=entry.id, question="复数？", answer="Häuser"))
+        db_session.commit()
+        db_session.refresh(entry)
+
+        entry_dict = entry.to_dict()
+        assert entry_dict["timestamp"] == entry.timestamp.isoformat()
+        assert entry_dict["preview"] == entry.preview
+        assert len(entry_dict["follow_ups"]) == 1
+        follow_up_dict = entry_dict["follow_ups"][0]
+        assert set(follow_up_dict) == {"id", "question", "answer", "timestamp"}
+        assert follow_up_dict["answer"] == "Häuser"
+        assert isinstance(follow_up_dict["timestamp"], str)
+
     def test_knowledge_entry_repr(self, db_session: Session):
         """测试知识条目字符串表示"""
         entry = KnowledgeEntry(
@@ -118,7 +150,7 @@ class TestEntryAlias:
         assert alias.id is not None
         assert alias.alias_text == "das Haus"
         assert alias.entry_id == entry.id
-        assert alias.entry == entry
+        assert _load_entry(db_session, alias) == entry
     
     def test_entry_alias_to_dict(self, db_session: Session):
         """测试条目别名转字典"""
@@ -230,7 +262,7 @@ class TestFollowUp:
         assert follow_up.question == "Haus的复数形式是什么？"
         assert follow_up.answer == "Häuser"
         assert follow_up.timestamp is not None
-        assert follow_up.entry == entry
+        assert _load_entry(db_session, follow_up) == entry
     
     def test_follow_up_to_dict(self, db_session: Session):
         """测试后续问题转字典"""
@@ -349,8 +381,8 @@ class TestModelRelationships:
         
         # 测试关系
         assert len(entry.follow_ups) == 2
-        assert follow_up1.entry == entry
-        assert follow_up2.entry == entry
+        assert _load_entry(db_session, follow_up1) == entry
+        assert _load_entry(db_session, follow_up2) == entry
         
         # 验证后续问题内容
         questions = [fu.question for fu in entry.follow_ups]
@@ -376,11 +408,26 @@ class TestModelRelationships:
         db_session.commit()
         
         # 测试关系
-        assert alias1.entry == entry
-        assert alias2.entry == entry
+        assert _load_entry(db_session, alias1) == entry
+        assert _load_entry(db_session, alias2) == entry
         assert alias1.entry_id == entry.id
         assert alias2.entry_id == entry.id
 
+    def test_parent_relationship_raises_on_lazy_load(self, db_session: Session):
+        """测试子对象的父条目关系不会被悄悄延迟加载，repr 也不访问父条目"""
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        alias = EntryAlias(alias_text="das Haus", entry_id=entry.id)
+        follow_up = FollowUp(entry_id=entry.id, question="复数？", answer="Häuser")
+        db_session.add_all([alias, follow_up])
+        db_session.commit()
+
+        for child in (alias, follow_up):
+            assert f"entry_id={entry.id}" in repr(child)
+            with pytest.raises(InvalidRequestError):
+                child.entry
+
 
 class TestModelConstraints:
     """模型约束测试"""
@@ -481,3 +528,103 @@ class TestCascadeDelete:
         assert db_session.query(EntryAlias).filter_by(entry_id=entry.id).count() == 0
         assert db_session.query(FollowUp).filter_by(entry_id=entry.id).count() == 0
         assert db_session.query(KnowledgeEntry).filter_by(id=entry.id).count() == 0
+
+
+class TestLearningProgress:
+    """学习进度模型测试"""
+
+    def test_ease_factor_stored_as_scaled_small_integer(self, db_session: Session):
+        """测试难度系数按 ×100 存为整数，读取和聚合时换算回浮点数"""
+        from sqlalchemy import func, text
+
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+
+        progress = LearningProgress(entry_id=entry.id, ease_factor=2.364)
+        db_session.add(progress)
+        db_session.commit()
+
+        raw = db_session.execute(text("SELECT ease_factor FROM learning_progress")).scalar_one()
+        assert raw == 236
+
+        db_session.expire_all()
+        assert db_session.get(LearningProgress, progress.id).ease_factor == 2.36
+        ease_factor = LearningProgress.ease_factor
+        assert db_session.query(func.avg(ease_factor, type_=ease_factor.type)).scalar() == 2.36
+
+
+class TestPerformanceIndexes:
+    """性能优化索引测试"""
+
+    def test_create_performance_indexes_idempotent(self):
+        """测试对已存在的表补建缺失索引，且可重复执行"""
+        from sqlalchemy import create_engine, inspect
+
+        from app.db.indexes import create_performance_indexes
+        from app.db.models import Base
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX idx_knowledge_entries_entry_type")
+
+        create_performance_indexes(engine)
+        create_performance_indexes(engine)
+
+        index_names = {index["name"] for index in inspect(engine).get_indexes("knowledge_entries")}
+        assert "idx_knowledge_entries_entry_type" in index_names
+
+    def test_query_text_unique_index_is_covering(self):
+        """测试 query_text 只有一个唯一覆盖索引，且 INCLUDE 不含不限长度的 preview 列"""
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateIndex
+
+        from app.db.indexes import PERFORMANCE_INDEXES
+
+        table = KnowledgeEntry.__table__
+        query_text_indexes = [
+            index
+            for index in list(table.indexes) + PERFORMANCE_INDEXES
+            # 只统计以 query_text 列本身为键的 B-tree（不含 lower() 表达式索引和三元组 GIN 索引）
+            if list(index.expressions) == [table.c.query_text]
+            and not index.dialect_options["postgresql"]["using"]
+        ]
+        assert [index.name for index in query_text_indexes] == ["ix_knowledge_entries_query_text"]
+
+        ddl = str(CreateIndex(query_text_indexes[0]).compile(dialect=postgresql.dialect()))
+        assert ddl.startswith("CREATE UNIQUE INDEX")
+        assert "INCLUDE (id, entry_type, timestamp)" in ddl
+
+    def test_lower_indexes_match_suggestion_expression(self):
+        """测试 lower() 函数索引在 PostgreSQL 上带 text_pattern_ops，可服务 LIKE 前缀查询"""
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateIndex
+
+        from app.db.indexes import PERFORMANCE_INDEXES
+
+        ddl = {
+            index.name: str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+            for index in PERFORMANCE_INDEXES
+        }
+        assert "(lower(query_text) text_pattern_ops)" in ddl["idx_knowledge_entries_lower_query"]
+        assert "(lower(alias_text) text_pattern_ops)" in ddl["idx_entry_aliases_lower_alias"]
+
+    def test_trigram_index_postgresql_only(self):
+        """测试三元组 GIN 索引的 DDL，且在 SQLite 上不会创建"""
+        from sqlalchemy import create_engine, inspect
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateIndex
+
+        from app.db.indexes import POSTGRESQL_INDEXES, create_performance_indexes
+        from app.db.models import Base
+
+        ddl = str(CreateIndex(POSTGRESQL_INDEXES[0]).compile(dialect=postgresql.dialect()))
+        assert "USING gin (query_text gin_trgm_ops)" in ddl
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        create_performance_indexes(engine)
+
+        index_names = {index["name"] for index in inspect(engine).get_indexes("knowledge_entries")}
+        assert "idx_knowledge_entries_trgm" not in index_names
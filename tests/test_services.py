@@ -6,7 +6,7 @@ import pytest
 import time
 from unittest.mock import Mock, patch, AsyncMock
 from sqlalchemy.orm import Session
-from collections import deque
+from collections import OrderedDict
 
 from app.api.v1.services import (
     get_preview_from_analysis,
@@ -66,7 +66,7 @@ class TestHelperFunctions:
     
     def test_update_recent_searches(self):
         """测试更新最近搜索"""
-        recent_searches = deque(["word1", "word2"], maxlen=5)
+        recent_searches = OrderedDict.fromkeys(["word1", "word2"])
         
         # 添加新词
         update_recent_searches("word3", recent_searches)
@@ -75,6 +75,14 @@ class TestHelperFunctions:
         # 添加已存在的词
         update_recent_searches("word1", recent_searches)
         assert list(recent_searches) == ["word1", "word3", "word2"]
+
+    def test_update_recent_searches_evicts_oldest(self):
+        """测试超出上限时淘汰最旧的搜索记录"""
+        recent_searches = OrderedDict()
+        with patch("app.api.v1.services.settings.api.recent_searches_limit", 2):
+            for word in ["word1", "word2", "word3"]:
+                update_recent_searches(word, recent_searches)
+        assert list(recent_searches) == ["word3", "word2"]
     
     def test_create_alias_if_needed(self, db_session: Session):
         """测试创建别名"""
@@ -120,7 +128,7 @@ class TestCacheFunctions:
         analysis = "# Haus\n\n**词性**: Nomen"
         
         # 预填充缓存 - 直接操作模块变量
-        services_module._preview_cache[analysis] = "cached preview"
+        services_module._preview_cache[services_module._preview_cache_key(analysis)] = "cached preview"
         
         preview = get_cached_preview(analysis)
         assert preview == "cached preview"
@@ -130,16 +138,32 @@ class TestCacheFunctions:
         import app.api.v1.services as services_module
         
         # 填满缓存
-        for i in range(1001):
+        for i in range(services_module._max_cache_size + 1):
             services_module._preview_cache[f"analysis_{i}"] = f"preview_{i}"
         
         # 触发清理
         get_cached_preview("new_analysis")
         
         # 验证缓存大小
-        assert len(services_module._preview_cache) <= 1000
-        assert "new_analysis" in services_module._preview_cache
+        assert len(services_module._preview_cache) <= services_module._max_cache_size
+        assert services_module._preview_cache_key("new_analysis") in services_module._preview_cache
     
+    def test_get_cached_preview_lru_eviction(self):
+        """测试缓存按最近使用顺序淘汰"""
+        import app.api.v1.services as services_module
+
+        services_module._preview_cache.clear()
+        for i in range(services_module._max_cache_size):
+            services_module._preview_cache[services_module._preview_cache_key(f"analysis_{i}")] = f"preview_{i}"
+
+        # 命中后变为最近使用，不会被淘汰
+        assert get_cached_preview("analysis_0") == "preview_0"
+        get_cached_preview("new_analysis")
+
+        assert len(services_module._preview_cache) == services_module._max_cache_size
+        assert services_module._preview_cache_key("analysis_0") in services_module._preview_cache
+        assert services_module._preview_cache_key("analysis_1") not in services_module._preview_cache
+
     def test_optimize_query_with_cache(self, db_session: Session):
         """测试优化查询"""
         # 创建知识条目
@@ -184,13 +208,33 @@ class TestCacheFunctions:
             assert entry_id in result
             assert result[entry_id].query_text.startswith("word")
 
+    def test_batch_get_entries_preloads_children(self, db_session: Session):
+        """测试批量获取条目时预加载追问和别名，序列化时不再触发延迟加载"""
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        db_session.add_all([
+            FollowUp(entry_id=entry.id, question="复数？", answer="Häuser"),
+            EntryAlias(alias_text="das Haus", entry_id=entry.id),
+        ])
+        db_session.commit()
+        entry_id = entry.id
+        db_session.expunge_all()
+
+        result = batch_get_entries_by_ids(db_session, [entry_id])
+        # 脱离会话后访问未加载的关系会报错，因此能验证关系已被预加载
+        db_session.expunge_all()
+
+        assert [fu.answer for fu in result[entry_id].follow_ups] == ["Häuser"]
+        assert [alias.alias_text for alias in result[entry_id].aliases] == ["das Haus"]
+
 
 class TestDatabaseServiceFunctions:
     """数据库服务函数测试"""
     
     def test_get_recent_entries_service_empty(self, db_session: Session):
         """测试获取空最近条目"""
-        recent_searches = deque()
+        recent_searches = OrderedDict()
         
         result = get_recent_entries_service(db_session, recent_searches)
         assert result == []
@@ -206,14 +250,47 @@ class TestDatabaseServiceFunctions:
         db_session.add(entry)
         db_session.commit()
         
-        recent_searches = deque(["Haus"])
+        recent_searches = OrderedDict.fromkeys(["Haus"])
         
         result = get_recent_entries_service(db_session, recent_searches)
         
         assert len(result) == 1
         assert result[0].query_text == "Haus"
         assert result[0].preview == "Haus\n\n**词性**: Nomen"
-    
+
+    def test_get_recent_entries_service_reads_stored_preview(self, db_session: Session):
+        """测试读取路径直接使用 preview 列而不重新解析分析内容"""
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        db_session.query(KnowledgeEntry).filter_by(id=entry.id).update({"preview": "gespeichert"})
+        db_session.commit()
+
+        with patch("app.api.v1.services.get_cached_preview") as mock_preview:
+            result = get_recent_entries_service(db_session, OrderedDict.fromkeys(["Haus"]))
+
+        assert result[0].preview == "gespeichert"
+        mock_preview.assert_not_called()
+
+    def test_get_recent_entries_service_order_and_missing_preview(self, db_session: Session):
+        """测试最近条目保持查询顺序，并为未回填预览的旧数据实时提取"""
+        db_session.add_all([
+            KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus"),
+            KnowledgeEntry(query_text="Auto", entry_type="WORD", analysis_markdown="# Auto"),
+        ])
+        db_session.commit()
+        db_session.query(KnowledgeEntry).filter_by(query_text="Auto").update({"preview": None})
+        db_session.commit()
+
+        with patch("app.api.v1.services.get_cached_preview", return_value="live") as mock_preview:
+            result = get_recent_entries_service(
+                db_session, OrderedDict.fromkeys(["Auto", "fehlt", "Haus"])
+            )
+
+        assert [item.query_text for item in result] == ["Auto", "Haus"]
+        assert result[0].preview == "live"
+        mock_preview.assert_called_once_with("# Auto")
+
     def test_get_all_entries_service(self, db_session: Session):
         """测试获取所有条目"""
         # 创建多个条目
@@ -236,6 +313,44 @@ class TestDatabaseServiceFunctions:
         
         # 验证排序
         assert query_texts == sorted(query_texts)
+
+    def test_get_all_entries_service_keyset_pagination(self, db_session: Session):
+        """测试基于 query_text 的键集分页"""
+        for word in ["Apfel", "Baum", "Haus", "Tisch"]:
+            db_session.add(KnowledgeEntry(query_text=word, entry_type="WORD", analysis_markdown=f"# {word}"))
+        db_session.commit()
+
+        first_page = get_all_entries_service(db_session, limit=2)
+        assert [item.query_text for item in first_page] == ["Apfel", "Baum"]
+
+        second_page = get_all_entries_service(db_session, limit=2, after=first_page[-1].query_text)
+        assert [item.query_text for item in second_page] == ["Haus", "Tisch"]
+
+        assert get_all_entries_service(db_session, limit=2, after="Tisch") == []
+
+    def test_get_all_entries_service_uses_stored_preview(self, db_session: Session):
+        """测试预览在写入时计算，旧数据缺失预览时回退到分析内容"""
+        entry = KnowledgeEntry(
+            query_text="Haus",
+            entry_type="WORD",
+            analysis_markdown="**核心释义**: Das Haus",
+        )
+        legacy = KnowledgeEntry(
+            query_text="Baum",
+            entry_type="WORD",
+            analysis_markdown="**核心释义**: Der Baum",
+        )
+        db_session.add_all([entry, legacy])
+        db_session.commit()
+        assert entry.preview == get_preview_from_analysis(entry.analysis_markdown)
+
+        # 模拟迁移前写入、尚未回填的条目
+        db_session.query(KnowledgeEntry).filter_by(id=legacy.id).update({"preview": None})
+        db_session.commit()
+
+        result = {item.query_text: item.preview for item in get_all_entries_service(db_session)}
+        assert result["Haus"] == get_preview_from_analysis("**核心释义**: Das Haus")
+        assert result["Baum"] == get_preview_from_analysis("**核心释义**: Der Baum")
     
     def test_get_suggestions_service_empty_query(self, db_session: Session):
         """测试空查询的建议"""
@@ -285,6 +400,46 @@ class TestDatabaseServiceFunctions:
         assert result[0].query_text == "Haus"
         assert result[0].source == "知识库"
 
+    def test_get_suggestions_service_alias_and_entry_combined(self, db_session: Session):
+        """测试别名命中排在前面、不重复，并附带追问"""
+        haus = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        hausaufgabe = KnowledgeEntry(query_text="Hausaufgabe", entry_type="WORD", analysis_markdown="# Hausaufgabe")
+        db_session.add_all([haus, hausaufgabe])
+        db_session.commit()
+        db_session.add_all([
+            EntryAlias(alias_text="Hausen", entry_id=haus.id),
+            EntryAlias(alias_text="Hausbau", entry_id=haus.id),
+            FollowUp(entry_id=hausaufgabe.id, question="Q", answer="A"),
+        ])
+        db_session.commit()
+
+        result = get_suggestions_service("Haus", db_session)
+
+        assert [item.query_text for item in result] == ["Haus", "Hausaufgabe"]
+        assert result[0].preview.startswith("↪️ Hausbau → ")
+        assert [fu.question for fu in result[1].follow_ups] == ["Q"]
+
+    def test_get_suggestions_service_affix(self, db_session: Session):
+        """测试词缀建议：词缀条目本身排在最前，并附带示例单词及其追问"""
+        db_session.add_all([
+            KnowledgeEntry(query_text="verstehen", entry_type="WORD", analysis_markdown="# verstehen"),
+            KnowledgeEntry(query_text="ver-", entry_type="PREFIX", analysis_markdown="# ver-"),
+            KnowledgeEntry(query_text="vergessen", entry_type="WORD", analysis_markdown="# vergessen"),
+            KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus"),
+        ])
+        db_session.commit()
+        example = db_session.query(KnowledgeEntry).filter_by(query_text="vergessen").one()
+        db_session.add(FollowUp(entry_id=example.id, question="Q", answer="A"))
+        db_session.commit()
+
+        result = get_suggestions_service("ver-", db_session)
+
+        assert result[0].query_text == "ver-"
+        assert {item.query_text for item in result[1:]} == {"verstehen", "vergessen"}
+        follow_ups = {item.query_text: item.follow_ups for item in result}
+        assert [fu.question for fu in follow_ups["vergessen"]] == ["Q"]
+        assert follow_ups["verstehen"] == []
+
 
 class TestAnalysisService:
     """分析服务测试"""
@@ -327,10 +482,49 @@ class TestAnalysisService:
         assert result is not None
         assert result.query_text == "Haus"
     
+    def test_check_exact_cache_match_prefers_entry_over_alias(self, db_session: Session):
+        """测试条目与别名同名时优先返回条目本身"""
+        haus = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        gebaeude = KnowledgeEntry(query_text="Gebäude", entry_type="WORD", analysis_markdown="# Gebäude")
+        db_session.add_all([haus, gebaeude])
+        db_session.commit()
+        db_session.add(EntryAlias(alias_text="Haus", entry_id=gebaeude.id))
+        db_session.commit()
+
+        result = check_exact_cache_match("Haus", db_session)
+
+        assert result.id == haus.id
+
+    def test_check_exact_cache_matches_batch(self, db_session: Session):
+        """测试批量精确匹配：条目、别名与未命中"""
+        from app.api.v1.services import check_exact_cache_matches
+
+        haus = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        auto = KnowledgeEntry(query_text="Auto", entry_type="WORD", analysis_markdown="# Auto")
+        db_session.add_all([haus, auto])
+        db_session.commit()
+        db_session.add(EntryAlias(alias_text="das Haus", entry_id=haus.id))
+        db_session.add(FollowUp(entry_id=auto.id, question="Q", answer="A"))
+        db_session.commit()
+
+        result = check_exact_cache_matches(["Auto", "das Haus", "nonexistent"], db_session)
+
+        assert set(result) == {"Auto", "das Haus"}
+        assert result["das Haus"].id == haus.id
+        assert [fu.question for fu in result["Auto"].follow_ups] == ["Q"]
+
     def test_check_exact_cache_match_not_found(self, db_session: Session):
         """测试精确缓存匹配（未找到）"""
         result = check_exact_cache_match("nonexistent", db_session)
         assert result is None
+
+    def test_check_exact_cache_match_skips_db_for_impossible_queries(self):
+        """测试空查询和超长查询不访问数据库"""
+        db = Mock()
+        with patch("app.api.v1.services.settings.max_analysis_length", 5):
+            assert check_exact_cache_match("", db) is None
+            assert check_exact_cache_match("zu lang", db) is None
+        db.query.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_perform_spell_check_success(self):
@@ -387,6 +581,19 @@ class TestAnalysisService:
             
             assert prototype == "Haus"
     
+    @pytest.mark.asyncio
+    async def test_identify_prototype_word_embedded_json(self):
+        """测试从带有说明文字的回复中提取 JSON"""
+        mock_llm_router = Mock()
+        mock_llm_router.config.prototype_identification_prompt = "prototype prompt"
+
+        with patch('app.api.v1.services.call_llm_service') as mock_call:
+            mock_call.return_value = '结果如下：\n```json\n{"prototype": "Haus"}\n```'
+
+            prototype = await identify_prototype_word("Häuser", mock_llm_router)
+
+            assert prototype == "Haus"
+
     @pytest.mark.asyncio
     async def test_identify_prototype_word_error(self):
         """测试原型词识别错误"""
@@ -422,7 +629,7 @@ class TestAnalysisService:
         db_session.commit()
         
         request = AnalyzeRequest(query_text="Haus")
-        recent_searches = deque()
+        recent_searches = OrderedDict()
         
         with patch('app.api.v1.services.get_llm_router') as mock_router:
             mock_llm_router = Mock()
@@ -440,7 +647,7 @@ class TestAnalysisService:
     async def test_analyze_entry_service_cache_miss(self, db_session: Session):
         """测试分析条目服务（缓存未命中）"""
         request = AnalyzeRequest(query_text="Haus")
-        recent_searches = deque()
+        recent_searches = OrderedDict()
         
         with patch('app.api.v1.services.get_llm_router') as mock_router, \
              patch('app.api.v1.services.get_or_create_knowledge_entry') as mock_create:
@@ -470,6 +677,152 @@ class TestAnalysisService:
                 assert result.source == "generated"
 
 
+class TestLLMResponseCache:
+    """LLM响应缓存测试"""
+
+    def test_get_cache_key_distinguishes_inputs(self):
+        """测试缓存键区分提示词/消息边界和工具开关"""
+        from app.core.llm_service import get_cache_key
+
+        assert get_cache_key("a", "b") == get_cache_key("a", "b")
+        assert get_cache_key("a:b", "c") != get_cache_key("a", "b:c")
+        assert get_cache_key("a", "b", use_tools=True) != get_cache_key("a", "b")
+        assert len(get_cache_key("a", "b")) == 16
+
+    def test_llm_response_cache_lru_eviction(self):
+        """测试缓存满时淘汰最久未使用的响应"""
+        import app.core.llm_service as llm_service
+
+        with patch.object(llm_service, "_max_llm_cache_size", 2), \
+                patch.object(llm_service, "_llm_response_cache", llm_service.OrderedDict()):
+            llm_service.cache_llm_response(b"a", "A")
+            llm_service.cache_llm_response(b"b", "B")
+            assert llm_service.get_cached_llm_response(b"a") == "A"  # a 变为最近使用
+            llm_service.cache_llm_response(b"c", "C")
+
+            assert llm_service.get_cached_llm_response(b"b") is None
+            assert llm_service.get_cached_llm_response(b"a") == "A"
+            assert llm_service.get_cached_llm_response(b"c") == "C"
+
+
+class TestPerformanceStats:
+    """性能统计测试"""
+
+    def test_buffered_events_included_in_report(self):
+        """测试线程本地缓冲中尚未合并的事件也会出现在报告中"""
+        from app.core.performance import (
+            PerformanceMonitor,
+            get_performance_report,
+            reset_performance_stats,
+        )
+
+        reset_performance_stats()
+        for _ in range(3):
+            with PerformanceMonitor("buffered_op"):
+                pass
+
+        report = get_performance_report()
+        assert report["summary"]["total_queries"] == 3
+        assert report["query_performance"]["buffered_op"]["count"] == 3
+        reset_performance_stats()
+
+    def test_query_times_bounded(self):
+        """测试每个函数的耗时样本数有上限，调用次数仍完整计数"""
+        import app.core.performance as performance
+
+        performance.reset_performance_stats()
+        for _ in range(performance._MAX_TIMES_PER_NAME + 10):
+            with performance.PerformanceMonitor("bounded_op"):
+                pass
+
+        report = performance.get_performance_report()
+        assert len(performance.performance_stats["query_times"]["bounded_op"]) == performance._MAX_TIMES_PER_NAME
+        assert report["query_performance"]["bounded_op"]["count"] == performance._MAX_TIMES_PER_NAME + 10
+        performance.reset_performance_stats()
+
+    def test_query_aggregates_report(self):
+        """测试报告中的耗时统计来自增量聚合值"""
+        import app.core.performance as performance
+
+        performance.reset_performance_stats()
+        buf = performance._get_thread_buffer()
+        buf.extend([("agg_op", 0.2, 1.0), ("agg_op", 0.1, 2.0), ("agg_op", 0.3, 3.0)])
+
+        stats = performance.get_performance_report()["query_performance"]["agg_op"]
+        assert stats["count"] == 3
+        assert stats["min_time"] == 0.1
+        assert stats["max_time"] == 0.3
+        assert stats["total_time"] == pytest.approx(0.6)
+        assert stats["avg_time"] == pytest.approx(0.2)
+        performance.reset_performance_stats()
+
+    def test_log_memory_usage_reuses_process_handle(self):
+        """测试内存采样复用同一个进程句柄"""
+        import os
+        import app.core.performance as performance
+
+        fake_psutil = Mock()
+        fake_psutil.Process.return_value.pid = os.getpid()
+        fake_psutil.Process.return_value.memory_info.return_value = Mock(rss=10, vms=20)
+
+        performance.reset_performance_stats()
+        with patch.object(performance, "psutil", fake_psutil), \
+                patch.object(performance, "_psutil_process", None):
+            performance.log_memory_usage()
+            performance.log_memory_usage()
+
+        assert fake_psutil.Process.call_count == 1
+        assert performance.get_memory_trend()["samples"] == 2
+        performance.reset_performance_stats()
+
+    def test_cache_counters_report(self):
+        """测试缓存命中/未命中计数与命中率报告"""
+        import app.core.performance as performance
+
+        performance.reset_performance_stats()
+        performance.record_cache_hit("demo_cache")
+        performance.record_cache_hit("demo_cache")
+        performance.record_cache_hit("demo_cache")
+        performance.record_cache_miss("demo_cache")
+        performance.record_cache_miss("miss_only_cache")
+
+        assert performance.performance_stats["cache_counters"] == {
+            "demo_cache": [3, 1],
+            "miss_only_cache": [0, 1],
+        }
+        report = performance.get_performance_report()
+        assert report["cache_performance"]["demo_cache"] == {
+            "hits": 3,
+            "misses": 1,
+            "total": 4,
+            "hit_rate": "75.00%",
+        }
+        assert any("miss_only_cache" in tip for tip in report["recommendations"])
+        performance.reset_performance_stats()
+
+    def test_slow_queries_bounded_and_slowest_kept(self):
+        """测试慢查询只保留最近记录，同时报告耗时最长的前几条"""
+        import app.core.performance as performance
+
+        performance.reset_performance_stats()
+        total = performance._RECENT_SLOW_QUERIES + 20
+        with performance._stats_lock:
+            for i in range(total):
+                performance._record_slow_query_locked(f"q{i}", 1.0 + (i % 50), float(i))
+
+        report = performance.get_performance_report()
+        assert len(performance.performance_stats["slow_queries"]) == performance._RECENT_SLOW_QUERIES
+        assert report["summary"]["slow_queries_count"] == total
+        assert report["slow_queries"][-1]["name"] == f"q{total - 1}"
+
+        slowest = report["slowest_queries"]
+        assert len(slowest) == performance._SLOWEST_QUERIES
+        assert [q["duration"] for q in slowest] == sorted(
+            (1.0 + (i % 50) for i in range(total)), reverse=True
+        )[: performance._SLOWEST_QUERIES]
+        performance.reset_performance_stats()
+
+
 class TestLLMVocabularyCache:
     """LLM词汇缓存测试"""
     
@@ -528,6 +881,20 @@ class TestLLMVocabularyCache:
         assert result != "old cache"
         assert "Haus" in result
     
+    def test_append_to_vocabulary_cache(self):
+        """测试新增条目被追加到已缓存的词汇表"""
+        import app.core.llm_service as llm_service
+
+        llm_service._vocabulary_cache = None
+        llm_service.append_to_vocabulary_cache("Haus")
+        assert llm_service._vocabulary_cache is None  # 未缓存时不创建
+
+        llm_service._vocabulary_cache = ("", 123.0)
+        llm_service.append_to_vocabulary_cache("Haus")
+        llm_service.append_to_vocabulary_cache("Auto")
+        assert llm_service._vocabulary_cache == ("Haus, Auto", 123.0)
+        llm_service._vocabulary_cache = None
+
     def test_get_cached_vocabulary_empty_database(self, db_session: Session):
         """测试空数据库"""
         import app.core.llm_service as llm_service
@@ -540,6 +907,23 @@ class TestLLMVocabularyCache:
         assert result == ""
 
 
+    def test_delete_entry_invalidates_vocabulary_cache(self, db_session: Session):
+        """测试删除条目后词汇表缓存失效"""
+        from app.api.v1.management import delete_entry_service
+        import app.core.llm_service as llm_service
+
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+
+        llm_service._vocabulary_cache = None
+        assert "Haus" in get_cached_vocabulary(db_session)
+
+        delete_entry_service(entry.id, db_session)
+
+        assert llm_service._vocabulary_cache is None
+        assert "Haus" not in get_cached_vocabulary(db_session)
+
 class TestServiceErrorHandling:
     """服务错误处理测试"""
     
@@ -547,7 +931,7 @@ class TestServiceErrorHandling:
     async def test_analyze_entry_service_exception(self, db_session: Session):
         """测试分析条目服务异常处理"""
         request = AnalyzeRequest(query_text="Haus")
-        recent_searches = deque()
+        recent_searches = OrderedDict()
         
         with patch('app.api.v1.services.get_llm_router') as mock_router:
             mock_llm_router = Mock()
@@ -558,3 +942,141 @@ class TestServiceErrorHandling:
             with patch('app.api.v1.services.check_exact_cache_match', side_effect=Exception("测试异常")):
                 with pytest.raises(Exception):
                     await analyze_entry_service(request, mock_llm_router, db_session, recent_searches)
+
+    def test_create_alias_service_conflicts(self, db_session: Session):
+        """测试创建别名时的两种冲突检查"""
+        from fastapi import HTTPException
+        from app.api.v1.management import create_alias_service
+        from app.schemas.dictionary import AliasCreateRequest
+
+        haus = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        auto = KnowledgeEntry(query_text="Auto", entry_type="WORD", analysis_markdown="# Auto")
+        db_session.add_all([haus, auto])
+        db_session.commit()
+        db_session.add(EntryAlias(alias_text="das Haus", entry_id=haus.id))
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_alias_service(AliasCreateRequest(alias_text="das Haus", entry_query_text="Haus"), db_session)
+        assert exc_info.value.status_code == 409
+        assert "别名" in exc_info.value.detail
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_alias_service(AliasCreateRequest(alias_text="Auto", entry_query_text="Haus"), db_session)
+        assert exc_info.value.status_code == 409
+        assert "核心知识条目" in exc_info.value.detail
+
+        create_alias_service(AliasCreateRequest(alias_text="Häuser", entry_query_text="Haus"), db_session)
+        assert db_session.query(EntryAlias).filter_by(alias_text="Häuser").one().entry_id == haus.id
+
+    def test_server_status_skips_recent_ping(self):
+        """测试健康检查在探测间隔内不重复查询数据库"""
+        import app.api.v1.management as management
+
+        management._last_db_ping_ok_at = float("-inf")
+        db = Mock()
+
+        assert management.get_server_status_service(db)["db_status"] == "ok"
+        assert management.get_server_status_service(db)["db_status"] == "ok"
+        assert db.execute.call_count == 1
+
+        # 探测失败后下一次必须重新查询
+        management._last_db_ping_ok_at = float("-inf")
+        db.execute.side_effect = Exception("down")
+        with pytest.raises(Exception):
+            management.get_server_status_service(db)
+        with pytest.raises(Exception):
+            management.get_server_status_service(db)
+        assert db.execute.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_follow_up_context_shared_between_concurrent_requests(self, db_session: Session):
+        """测试同一条目的并发追问共享上下文准备，写入后失效"""
+        import asyncio
+        import app.api.v1.management as management
+        from app.schemas.dictionary import FollowUpCreateRequest
+
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        management._follow_up_context_tasks.clear()
+
+        llm_router = Mock()
+        llm_router.config.follow_up_prompt = "{context}{question}{vocabulary_list}"
+        prepare = Mock(wraps=management._prepare_follow_up_context)
+
+        with patch.object(management, "_prepare_follow_up_context", prepare), \
+                patch.object(management, "call_llm_service", AsyncMock(return_value="Antwort")):
+            contexts = await asyncio.gather(
+                management.get_follow_up_context(entry.id, db_session),
+                management.get_follow_up_context(entry.id, db_session),
+            )
+            # 第二个请求到达时准备任务仍在线程中执行，二者共享同一个进行中的任务
+            assert prepare.call_count == 1
+            assert contexts[0] == contexts[1]
+
+            await management.create_follow_up_service(
+                FollowUpCreateRequest(entry_id=entry.id, question="Warum?"), db_session, llm_router
+            )
+            assert entry.id not in management._follow_up_context_tasks
+
+            context_str, _ = await management.get_follow_up_context(entry.id, db_session)
+            assert "Q: Warum?" in context_str
+
+    @pytest.mark.asyncio
+    async def test_follow_up_context_survives_cancelled_waiter(self, db_session: Session):
+        """测试一个请求被取消时，共享同一准备任务的其他请求和之后的请求不受影响"""
+        import asyncio
+        import threading
+        import app.api.v1.management as management
+
+        entry = KnowledgeEntry(query_text="Haus", entry_type="WORD", analysis_markdown="# Haus")
+        db_session.add(entry)
+        db_session.commit()
+        management._follow_up_context_tasks.clear()
+
+        release = threading.Event()
+        prepare_original = management._prepare_follow_up_context
+
+        def slow_prepare(entry_id, session_factory):
+            release.wait(5)
+            return prepare_original(entry_id, session_factory)
+
+        with patch.object(management, "_prepare_follow_up_context", slow_prepare):
+            waiter_a = asyncio.ensure_future(management.get_follow_up_context(entry.id, db_session))
+            waiter_b = asyncio.ensure_future(management.get_follow_up_context(entry.id, db_session))
+            await asyncio.sleep(0)
+
+            waiter_a.cancel()
+            await asyncio.sleep(0)
+            release.set()
+
+            with pytest.raises(asyncio.CancelledError):
+                await waiter_a
+            context_b = await waiter_b
+            assert "原始分析" in context_b[0]
+
+            context_c = await management.get_follow_up_context(entry.id, db_session)
+            assert context_c == context_b
+
+    def test_follow_up_context_drops_failed_task(self):
+        """测试被取消或以异常结束的缓存任务不会被复用"""
+        import asyncio
+        import app.api.v1.management as management
+
+        loop = asyncio.new_event_loop()
+        try:
+            cancelled = loop.create_future()
+            cancelled.cancel()
+            failed = loop.create_future()
+            failed.set_exception(RuntimeError("db down"))
+            done = loop.create_future()
+            done.set_result(("ctx", "vocab"))
+            failed.exception()  # 已检索异常，避免析构时告警
+
+            assert management._is_reusable(cancelled) is False
+            assert management._is_reusable(failed) is False
+            assert management._is_reusable(done) is True
+            assert management._is_reusable(loop.create_future()) is True
+        finally:
+            loop.close()